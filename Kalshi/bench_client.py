@@ -0,0 +1,72 @@
+"""
+Order round-trip latency: bare requests.post vs the pooled KalshiClient,
+against the local stand-in exchange over TLS.
+
+Usage:
+    python -m Kalshi.bench_client
+    python -m Kalshi.bench_client --orders 200 --rtt 0.03
+"""
+
+import argparse
+import os
+import time
+import uuid
+import warnings
+
+from Kalshi.mock_exchange import ensure_test_credentials, start_mock_exchange
+
+
+def _pct(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--rtt", type=float, default=0.02, help="simulated round trip (s)")
+    parser.add_argument("--handshake-rtts", type=int, default=2, help="extra round trips per new connection")
+    args = parser.parse_args()
+
+    ensure_test_credentials()
+    server, base_url = start_mock_exchange(rtt_s=args.rtt, handshake_rtts=args.handshake_rtts, tls=True)
+    os.environ["KALSHI_BASE_URL"] = base_url
+    warnings.filterwarnings("ignore", message="Unverified HTTPS request")
+
+    import requests
+    from Kalshi.client import KalshiClient, ORDER
+    from Kalshi.kalshi_auth import get_kalshi_auth_headers
+
+    endpoint = "/trade-api/v2/portfolio/orders"
+
+    def payload():
+        return {"ticker": "KXBENCH-1", "action": "buy", "side": "yes", "count": 1,
+                "type": "limit", "yes_price": 40, "client_order_id": str(uuid.uuid4())}
+
+    def bare():
+        headers = get_kalshi_auth_headers("POST", endpoint)
+        requests.post(f"{base_url}{endpoint}", json=payload(), headers=headers, verify=False).raise_for_status()
+
+    client = KalshiClient(base_url, verify=False)  # throwaway self-signed cert
+    client.warm(1)
+
+    def pooled():
+        client.post(endpoint, kind=ORDER, json=payload()).raise_for_status()
+
+    print(f"{args.orders} orders, simulated RTT {args.rtt * 1000:.0f}ms "
+          f"(+{args.handshake_rtts} RTT per new connection), TLS\n")
+    print(f"{'client':16s} {'mean':>7s} {'p50':>7s} {'p95':>7s} {'p99':>7s}")
+    for label, fn in (("bare requests", bare), ("KalshiClient", pooled)):
+        latencies = []
+        for _ in range(args.orders):
+            t0 = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - t0)
+        print(f"{label:16s} {sum(latencies) / len(latencies) * 1000:5.1f}ms "
+              + " ".join(f"{_pct(latencies, p) * 1000:5.1f}ms" for p in (50, 95, 99)))
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
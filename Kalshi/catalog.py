@@ -0,0 +1,382 @@
+"""
+Local catalog of Kalshi markets, kept in sync with /trade-api/v2/markets.
+
+The catalog is a SQLite table keyed by ticker. Each row holds the title,
+outcomes, event/series, category, status, close time, last top-of-book,
+and the time the row last changed. Consumers (the index builder in
+News/test.py, routing, the tradability mask) read it without touching the
+network.
+
+Syncing:
+  - full sync (first run, or --full): every open market. Kalshi pages are
+    cursor-linked, so the close-time range is split into windows and the
+    windows are paged in parallel. Markets missing from a full sync are
+    marked closed.
+  - incremental sync: only markets updated since the last sync
+    (min_updated_ts, with a small overlap). Event categories are looked up
+    only for events the catalog has not seen.
+
+Usage:
+    python -m Kalshi.catalog              # incremental (full on first run)
+    python -m Kalshi.catalog --full
+    python -m Kalshi.catalog --bench
+
+    from Kalshi.catalog import get_catalog
+    get_catalog().open_markets()
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .client import get_client, METADATA
+
+CATALOG_PATH = os.environ.get("KALSHI_CATALOG_PATH", "kalshi_catalog.sqlite")
+SYNC_INTERVAL_S = float(os.environ.get("CATALOG_SYNC_S", "300"))
+PAGE_LIMIT = 1000
+SYNC_WORKERS = 4
+SYNC_WINDOWS = 8            # close-time windows per full sync (paged concurrently)
+UPDATE_OVERLAP_S = 120      # re-read this much before the last sync; upserts are idempotent
+CLOSE_WINDOWS_D = (1, 7, 30, 90, 365)   # close-time window edges (days from now) for parallel paging
+
+OPEN_STATUSES = ("active", "open")
+
+
+def _ts(value):
+    """ISO-8601 or epoch → epoch seconds (None if missing)."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class MarketCatalog:
+    def __init__(self, path: str = CATALOG_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # WAL: in sharded mode other processes read while the sync process writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS markets ("
+            " ticker TEXT PRIMARY KEY, event_ticker TEXT, series_ticker TEXT,"
+            " title TEXT, outcomes TEXT, category TEXT, status TEXT,"
+            " close_time REAL, yes_bid INTEGER, yes_ask INTEGER, no_bid INTEGER, no_ask INTEGER,"
+            " volume INTEGER, liquidity INTEGER, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS markets_status ON markets (status, close_time)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS events (event_ticker TEXT PRIMARY KEY, category TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value REAL)")
+        self._db.commit()
+        self._thread = None
+        self.last_stats = {}
+
+    # -- REST paging -------------------------------------------------------
+
+    def _pages(self, path: str, key: str, params: dict) -> list:
+        """All items under `key` across cursor-linked pages."""
+        params = dict(params)
+        items = []
+        while True:
+            response = get_client().get(path, kind=METADATA, params=params)
+            response.raise_for_status()
+            data = response.json()
+            items.extend(data.get(key) or [])
+            cursor = data.get("cursor")
+            if not cursor:
+                return items
+            params["cursor"] = cursor
+
+    def _window_edges(self, now: int) -> list:
+        """
+        Close-time edges splitting open markets into similar-sized windows,
+        from the local catalog's close-time quantiles. Falls back to fixed
+        day offsets before the first sync.
+        """
+        with self._lock:
+            closes = [r[0] for r in self._db.execute(
+                "SELECT close_time FROM markets WHERE close_time > ? ORDER BY close_time", (now,))]
+        if len(closes) < SYNC_WINDOWS * PAGE_LIMIT // 4:
+            return [now] + [now + d * 86400 for d in CLOSE_WINDOWS_D]
+        quantiles = {int(closes[len(closes) * i // SYNC_WINDOWS]) for i in range(1, SYNC_WINDOWS)}
+        return [now] + sorted(q for q in quantiles if q > now)
+
+    def _fetch_open(self) -> list:
+        """Every open market, close-time windows paged in parallel."""
+        now = int(time.time())
+        edges = self._window_edges(now)
+        windows = [{"min_close_ts": lo, "max_close_ts": hi - 1} for lo, hi in zip(edges, edges[1:])]
+        windows.append({"min_close_ts": edges[-1]})
+        with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as pool:
+            pages = pool.map(
+                lambda w: self._pages("/trade-api/v2/markets", "markets",
+                                      {"status": "open", "limit": PAGE_LIMIT, **w}),
+                windows,
+            )
+            markets = {}
+            for page in pages:
+                for m in page:
+                    markets[m["ticker"]] = m
+        return list(markets.values())
+
+    def _fetch_categories(self, event_tickers: set, full: bool) -> dict:
+        if full:
+            events = self._pages("/trade-api/v2/events", "events", {"status": "open", "limit": 200})
+            return {e["event_ticker"]: e.get("category") for e in events if e.get("event_ticker")}
+
+        def one(event_ticker):
+            try:
+                response = get_client().get(f"/trade-api/v2/events/{event_ticker}", kind=METADATA)
+                if response.status_code == 200:
+                    return event_ticker, (response.json().get("event") or {}).get("category")
+            except Exception as e:
+                print(f"[catalog] Could not fetch event {event_ticker}: {e}")
+            return event_ticker, None
+
+        with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as pool:
+            return dict(pool.map(one, event_tickers))
+
+    # -- sync --------------------------------------------------------------
+
+    def sync(self, full: bool = None) -> dict:
+        """Pull changes from Kalshi. Full on first run. Returns {"mode", "fetched", "changed", "closed", "seconds"}."""
+        t0 = time.time()
+        last = self._state("last_sync")
+        full = full if full is not None else last is None
+
+        if full:
+            markets = self._fetch_open()
+        else:
+            markets = self._pages("/trade-api/v2/markets", "markets",
+                                  {"min_updated_ts": int(last - UPDATE_OVERLAP_S), "limit": PAGE_LIMIT})
+
+        with self._lock:
+            known = {row[0] for row in self._db.execute("SELECT event_ticker FROM events")}
+        new_events = {m.get("event_ticker") for m in markets if m.get("event_ticker")} - known
+        categories = self._fetch_categories(new_events, full) if (new_events or full) else {}
+
+        changed = self._upsert(markets, categories, t0)
+        closed = 0
+        if full:
+            closed = self._close_missing({m["ticker"] for m in markets}, t0)
+        self._set_state("last_sync", t0)
+
+        self.last_stats = {"mode": "full" if full else "incremental", "fetched": len(markets),
+                           "changed": changed, "closed": closed, "seconds": round(time.time() - t0, 2)}
+        return self.last_stats
+
+    def _upsert(self, markets: list, categories: dict, now: float) -> int:
+        with self._lock:
+            if categories:
+                self._db.executemany(
+                    "INSERT INTO events (event_ticker, category) VALUES (?, ?)"
+                    " ON CONFLICT(event_ticker) DO UPDATE SET category = COALESCE(excluded.category, category)",
+                    list(categories.items()),
+                )
+            event_category = dict(self._db.execute("SELECT event_ticker, category FROM events"))
+            current = {row[0]: row[1:] for row in self._db.execute(
+                "SELECT ticker, event_ticker, series_ticker, title, outcomes, category, status, close_time,"
+                " yes_bid, yes_ask, no_bid, no_ask, volume, liquidity FROM markets"
+            )}
+            changed = []
+            for m in markets:
+                outcomes = [o for o in (m.get("yes_sub_title"), m.get("no_sub_title")) if o]
+                row = (
+                    m.get("event_ticker"),
+                    m.get("series_ticker") or (m.get("event_ticker") or "").split("-")[0] or None,
+                    m.get("title"),
+                    json.dumps(outcomes),
+                    m.get("category") or event_category.get(m.get("event_ticker")),
+                    m.get("status"),
+                    _ts(m.get("close_time")),
+                    m.get("yes_bid"), m.get("yes_ask"), m.get("no_bid"), m.get("no_ask"),
+                    m.get("volume"), m.get("liquidity"),
+                )
+                if current.get(m["ticker"]) != row:
+                    changed.append((m["ticker"], *row, _ts(m.get("updated_time")) or now))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO markets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", changed
+            )
+            self._db.commit()
+        return len(changed)
+
+    def refresh_quotes(self, tickers, chunk: int = 100) -> int:
+        """
+        Re-read status, close time and top-of-book for these tickers with bulk
+        /markets?tickers=... requests (concurrent chunks). Returns rows updated.
+        """
+        tickers = list(tickers)
+        chunks = [tickers[i:i + chunk] for i in range(0, len(tickers), chunk)]
+
+        def fetch(part):
+            response = get_client().get("/trade-api/v2/markets", kind=METADATA,
+                                        params={"tickers": ",".join(part), "limit": len(part)})
+            response.raise_for_status()
+            return response.json().get("markets") or []
+
+        with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as pool:
+            markets = [m for page in pool.map(fetch, chunks) for m in page]
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "UPDATE markets SET status = ?, close_time = COALESCE(?, close_time),"
+                " yes_bid = ?, yes_ask = ?, no_bid = ?, no_ask = ?, updated_at = ? WHERE ticker = ?",
+                [(m.get("status"), _ts(m.get("close_time")), m.get("yes_bid"), m.get("yes_ask"),
+                  m.get("no_bid"), m.get("no_ask"), now, m["ticker"]) for m in markets],
+            )
+            self._db.commit()
+        return len(markets)
+
+    def _close_missing(self, seen: set, now: float) -> int:
+        with self._lock:
+            open_rows = [r[0] for r in self._db.execute(
+                f"SELECT ticker FROM markets WHERE status IN ({','.join('?' * len(OPEN_STATUSES))})",
+                OPEN_STATUSES,
+            )]
+            missing = [t for t in open_rows if t not in seen]
+            self._db.executemany("UPDATE markets SET status = 'closed', updated_at = ? WHERE ticker = ?",
+                                 [(now, t) for t in missing])
+            self._db.commit()
+        return len(missing)
+
+    def _state(self, key: str):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: float):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (key, value))
+            self._db.commit()
+
+    def start(self, interval_s: float = SYNC_INTERVAL_S):
+        """Re-sync in a daemon thread every interval_s."""
+        def loop():
+            while True:
+                try:
+                    stats = self.sync()
+                    print(f"[catalog] {stats['mode']} sync: {stats['changed']} changed, "
+                          f"{stats['closed']} closed in {stats['seconds']}s")
+                except Exception as e:
+                    print(f"[catalog] Sync error: {e}")
+                time.sleep(interval_s)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=loop, name="catalog-sync", daemon=True)
+            self._thread.start()
+
+    # -- reads (no network) ------------------------------------------------
+
+    def _rows(self, where: str = "", params: tuple = ()) -> list:
+        with self._lock:
+            cursor = self._db.execute(f"SELECT * FROM markets {where}", params)
+            names = [c[0] for c in cursor.description]
+            rows = cursor.fetchall()
+        out = []
+        for row in rows:
+            market = dict(zip(names, row))
+            market["outcomes"] = json.loads(market["outcomes"] or "[]")
+            out.append(market)
+        return out
+
+    def open_markets(self) -> list:
+        """Markets open now (by status and close time)."""
+        return self._rows(
+            f"WHERE status IN ({','.join('?' * len(OPEN_STATUSES))}) AND (close_time IS NULL OR close_time > ?)"
+            " ORDER BY ticker",
+            (*OPEN_STATUSES, time.time()),
+        )
+
+    def get(self, ticker: str):
+        rows = self._rows("WHERE ticker = ?", (ticker,))
+        return rows[0] if rows else None
+
+    def get_many(self, tickers) -> dict:
+        tickers = list(tickers)
+        out = {}
+        for i in range(0, len(tickers), 500):
+            chunk = tickers[i:i + 500]
+            for m in self._rows(f"WHERE ticker IN ({','.join('?' * len(chunk))})", tuple(chunk)):
+                out[m["ticker"]] = m
+        return out
+
+    def changed_since(self, ts: float) -> list:
+        return self._rows("WHERE updated_at > ? ORDER BY updated_at", (ts,))
+
+    def stats(self) -> dict:
+        with self._lock:
+            total, = self._db.execute("SELECT COUNT(*) FROM markets").fetchone()
+        return {"markets": total, "open": len(self.open_markets()), "last_sync": self._state("last_sync"),
+                **self.last_stats}
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> MarketCatalog:
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = MarketCatalog()
+    return _catalog
+
+
+def _bench(markets: int = 6000, changes: int = 50):
+    """Sequential one-shot listing vs parallel windowed sync, then an incremental sync."""
+    import random
+    import tempfile
+
+    from .mock_exchange import ensure_test_credentials, start_mock_exchange
+    from . import client as client_module
+
+    ensure_test_credentials()
+    server, base_url = start_mock_exchange(rtt_s=0.02, page_delay_s=0.001)
+    now = time.time()
+    for i in range(markets):
+        server.state.add_market(f"KXBENCH{i % 300}-{i}", title=f"Bench market {i}",
+                                close_time=now + random.uniform(3600, 500 * 86400),
+                                category=random.choice(["Economics", "Politics", "Sports"]))
+    client_module._client = client_module.KalshiClient(base_url)
+    client_module._client.warm(SYNC_WORKERS)
+
+    catalog = MarketCatalog(os.path.join(tempfile.mkdtemp(), "catalog.sqlite"))
+    t0 = time.perf_counter()
+    sequential = catalog._pages("/trade-api/v2/markets", "markets", {"status": "open", "limit": PAGE_LIMIT})
+    seq_s = time.perf_counter() - t0
+
+    first = catalog.sync(full=True)      # first run: fixed day windows
+    for meta in server.state.meta.values():
+        meta["updated_ts"] -= 86400      # listed a day ago
+    full = catalog.sync(full=True)       # later runs: windows from the catalog's close-time quantiles
+    for ticker in random.sample(list(server.state.meta), changes):
+        server.state.add_market(ticker, title=f"Renamed {ticker}", close_time=now + 86400 * 3)
+    incremental = catalog.sync()
+
+    print(f"{markets} open markets, 20ms simulated RTT, ~1s server time per {PAGE_LIMIT}-market page\n")
+    print(f"sequential paging      {seq_s:6.2f}s  ({len(sequential)} markets)")
+    print(f"full, fixed windows    {first['seconds']:6.2f}s  ({first['fetched']} markets, {first['changed']} written)")
+    print(f"full, quantile windows {full['seconds']:6.2f}s  ({full['fetched']} markets, {full['changed']} written)")
+    print(f"incremental            {incremental['seconds']:6.2f}s  "
+          f"({incremental['fetched']} fetched, {incremental['changed']} changed)")
+    print(f"open_markets() from disk: {len(catalog.open_markets())}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        _bench()
+        sys.exit()
+    catalog = get_catalog()
+    print(catalog.sync(full=True if "--full" in sys.argv else None))
+    print(catalog.stats())
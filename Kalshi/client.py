@@ -0,0 +1,138 @@
+"""
+Shared HTTP client for the Kalshi REST API.
+
+One pooled requests.Session is reused by the order executor, the market
+utilities and the heartbeat, so calls go over warm keep-alive connections
+instead of a fresh TCP+TLS handshake each time. Every request:
+
+  - waits its turn in the KalshiScheduler (rate budgets + priority)
+  - is signed through the shared KalshiSigner
+  - gets a (connect, read) timeout based on its endpoint class
+  - if it is an idempotent GET, is retried on connection errors, timeouts,
+    429 and 5xx with exponential backoff and full jitter
+
+Usage:
+    from Kalshi.client import get_client, QUOTE
+
+    response = get_client().get(f"/trade-api/v2/markets/{ticker}/orderbook", kind=QUOTE)
+"""
+
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from .kalshi_auth import get_kalshi_auth_headers
+from .scheduler import ORDER, QUOTE, PORTFOLIO, METADATA, get_scheduler
+
+BASE_URL = os.environ.get("KALSHI_BASE_URL", "https://api.elections.kalshi.com")
+
+TIMEOUTS = {              # (connect, read) seconds
+    ORDER:     (2.0, 5.0),
+    QUOTE:     (1.0, 2.0),
+    PORTFOLIO: (2.0, 5.0),
+    METADATA:  (3.0, 15.0),
+}
+GET_RETRIES = 2
+BACKOFF_BASE_S = 0.1
+POOL_SIZE = int(os.environ.get("KALSHI_POOL_SIZE", "16"))
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class KalshiClient:
+    def __init__(self, base_url: str = BASE_URL, pool_size: int = POOL_SIZE, verify=True, scheduler=None):
+        self.base_url = base_url.rstrip("/")
+        self.verify = verify
+        self.scheduler = scheduler
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def _count(self, kind: str, field: str):
+        with self._lock:
+            counts = self._counts.setdefault(kind, {"requests": 0, "errors": 0, "retries": 0})
+            counts[field] += 1
+
+    def request(self, method: str, path: str, kind: str = METADATA, params: dict = None,
+                json: dict = None, signed: bool = True) -> requests.Response:
+        """
+        Send one request. path is the API path without host (query string
+        via params). Returns the Response; raises requests exceptions only
+        once retries are exhausted.
+        """
+        method = method.upper()
+        attempts = 1 + (GET_RETRIES if method == "GET" else 0)
+        url = f"{self.base_url}{path}"
+
+        for attempt in range(attempts):
+            if self.scheduler is not None and not self.scheduler.acquire(kind):
+                self._count(kind, "errors")
+                raise requests.Timeout(f"Kalshi {kind} request queued past its rate-budget wait limit")
+            headers = get_kalshi_auth_headers(method, path) if signed else {}
+            self._count(kind, "requests")
+            t0 = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, url, params=params, json=json, headers=headers,
+                    timeout=TIMEOUTS.get(kind, TIMEOUTS[METADATA]), verify=self.verify,
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                self._count(kind, "errors")
+                if attempt + 1 >= attempts:
+                    raise
+            else:
+                if response.status_code >= 400:
+                    self._count(kind, "errors")
+                if response.status_code not in _RETRY_STATUS or attempt + 1 >= attempts:
+                    return response
+            finally:
+                metrics.observe("finnews_external_call_seconds", time.perf_counter() - t0,
+                                service="kalshi", op=kind)
+
+            self._count(kind, "retries")
+            time.sleep(random.uniform(0, BACKOFF_BASE_S * (2 ** attempt)))
+
+    def get(self, path: str, kind: str = METADATA, params: dict = None, signed: bool = True):
+        return self.request("GET", path, kind=kind, params=params, signed=signed)
+
+    def post(self, path: str, kind: str = ORDER, json: dict = None):
+        return self.request("POST", path, kind=kind, json=json)
+
+    def warm(self, connections: int = 2):
+        """Open keep-alive connections ahead of the first real request."""
+        def ping():
+            try:
+                self.get("/trade-api/v2/exchange/status", signed=False)
+            except requests.RequestException as e:
+                print(f"[kalshi] Warm-up failed: {e}")
+
+        threads = [threading.Thread(target=ping, daemon=True) for _ in range(connections)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {kind: dict(c) for kind, c in self._counts.items()}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> KalshiClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = KalshiClient(scheduler=get_scheduler())
+    return _client
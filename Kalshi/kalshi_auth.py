@@ -1,78 +1,155 @@
 import os
 import base64
 import time
+import threading
 from dotenv import load_dotenv
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
 
 load_dotenv()
 
-# Load credentials
-KALSHI_API_KEY = os.getenv("KALSHI_API_KEY")
-raw_key = os.getenv("KALSHI_PRIVATE_KEY")
+_PSS = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()),
+    salt_length=padding.PSS.DIGEST_LENGTH
+)
+
+
+class KalshiSigner:
+    """
+    Signs Kalshi API v2 requests with RSA-PSS.
+
+    The PEM key is parsed and validated once, and re-parsed only when
+    KALSHI_API_KEY / KALSHI_PRIVATE_KEY change (e.g. after /api/config).
+    Safe to share between the heartbeat thread and the main loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._config = None   # (api_key, raw_key) the loaded key came from
+        self._state = None    # (api_key, private_key)
+
+    def _load(self):
+        """Return (api_key, private_key), re-loading only if the env changed."""
+        config = (os.getenv("KALSHI_API_KEY"), os.getenv("KALSHI_PRIVATE_KEY"))
+        state = self._state
+        if state is not None and config == self._config:
+            return state
+
+        with self._lock:
+            if self._state is not None and config == self._config:
+                return self._state
+
+            api_key, raw_key = config
+            if not raw_key:
+                raise ValueError("KALSHI_PRIVATE_KEY is not set.")
+            # Env vars often carry escaped newlines ("Line1\nLine2")
+            if "\\n" in raw_key and "\n" not in raw_key:
+                raw_key = raw_key.replace("\\n", "\n")
+            try:
+                private_key = serialization.load_pem_private_key(
+                    raw_key.encode("utf-8"),
+                    password=None
+                )
+            except ValueError:
+                raise ValueError("Invalid Private Key format. Ensure it is a valid PEM string.")
+            if not isinstance(private_key, rsa.RSAPrivateKey):
+                raise ValueError("KALSHI_PRIVATE_KEY must be an RSA private key.")
+
+            self._state = (api_key, private_key)
+            self._config = config
+            return self._state
+
+    def headers(self, method: str, path: str) -> dict:
+        api_key, private_key = self._load()
+
+        # 1. Prepare Timestamp (current time in milliseconds)
+        timestamp = str(int(time.time() * 1000))
+
+        # 2. Construct the Message Payload
+        # Format: timestamp + method + path (stripped of query params)
+        path_no_query = path.split('?')[0]
+        payload = f"{timestamp}{method}{path_no_query}"
+
+        # 3. Sign the Payload using RSA-PSS, then Base64 encode
+        signature = private_key.sign(payload.encode('utf-8'), _PSS, hashes.SHA256())
+        signature_b64 = base64.b64encode(signature).decode('utf-8')
+
+        return {
+            "KALSHI-ACCESS-KEY": api_key,
+            "KALSHI-ACCESS-SIGNATURE": signature_b64,
+            "KALSHI-ACCESS-TIMESTAMP": timestamp,
+            "Content-Type": "application/json"
+        }
+
+
+_signer = KalshiSigner()
+
+
+def get_signer() -> KalshiSigner:
+    return _signer
+
 
 def get_kalshi_auth_headers(method: str, path: str) -> dict:
     """
     Generates the authentication headers required by Kalshi API v2.
-    
+
     Args:
         method (str): HTTP method (e.g., "GET", "POST").
-        path (str): The API path (e.g., "/trade-api/v2/portfolio/balance"). 
+        path (str): The API path (e.g., "/trade-api/v2/portfolio/balance").
                     Must NOT include the host or query parameters.
     """
-    # 1. Prepare Timestamp (current time in milliseconds)
-    timestamp = str(int(time.time() * 1000))
+    return _signer.headers(method, path)
+
+
+def _bench(n: int = 500):
+    """Headers/sec: parse-per-request (previous behaviour) vs the cached signer."""
+    if not os.getenv("KALSHI_PRIVATE_KEY"):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        os.environ["KALSHI_PRIVATE_KEY"] = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode("utf-8")
+        os.environ.setdefault("KALSHI_API_KEY", "bench")
+    raw_key = os.environ["KALSHI_PRIVATE_KEY"]
+    path = "/trade-api/v2/portfolio/orders"
+
+    def parse_per_request():
+        timestamp = str(int(time.time() * 1000))
+        private_key = serialization.load_pem_private_key(raw_key.encode("utf-8"), password=None)
+        signature = private_key.sign(f"{timestamp}POST{path}".encode("utf-8"), _PSS, hashes.SHA256())
+        return base64.b64encode(signature).decode("utf-8")
+
+    signer = KalshiSigner()
+    signer.headers("POST", path)  # first call loads the key
+    for label, fn in (("parse per request", parse_per_request),
+                      ("cached signer", lambda: signer.headers("POST", path))):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        elapsed = time.perf_counter() - t0
+        print(f"{label:18s} {n / elapsed:8.0f} headers/s  ({elapsed / n * 1e6:7.0f} µs each)")
 
-    # 2. Load Private Key
-    # We ensure the key is bytes. If your env var has escaped newlines (e.g. "Line1\nLine2"),
-    # you might need to replace them: raw_key.replace('\\n', '\n').encode()
-    try:
-        private_key = serialization.load_pem_private_key(
-            raw_key.encode("utf-8"),
-            password=None
-        )
-    except ValueError:
-        raise ValueError("Invalid Private Key format. Ensure it is a valid PEM string.")
-
-    # 3. Construct the Message Payload
-    # Format: timestamp + method + path (stripped of query params)
-    path_no_query = path.split('?')[0]
-    payload = f"{timestamp}{method}{path_no_query}"
-
-    # 4. Sign the Payload using RSA-PSS
-    signature = private_key.sign(
-        payload.encode('utf-8'),
-        padding.PSS(
-            mgf=padding.MGF1(hashes.SHA256()),
-            salt_length=padding.PSS.DIGEST_LENGTH
-        ),
-        hashes.SHA256()
-    )
-
-    # 5. Base64 Encode the Signature
-    signature_b64 = base64.b64encode(signature).decode('utf-8')
-
-    # 6. Return Headers
-    return {
-        "KALSHI-ACCESS-KEY": KALSHI_API_KEY,
-        "KALSHI-ACCESS-SIGNATURE": signature_b64,
-        "KALSHI-ACCESS-TIMESTAMP": timestamp,
-        "Content-Type": "application/json"
-    }
 
 # --- Usage Example ---
 if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        _bench()
+        sys.exit()
+
     # Example: getting portfolio balance
     method = "GET"
     endpoint = "/trade-api/v2/portfolio/balance"
-    
+
     try:
         headers = get_kalshi_auth_headers(method, endpoint)
         print("Generated Headers:")
         print(headers)
-        
+
         # You can now use these headers with requests:
         # requests.get("https://api.elections.kalshi.com" + endpoint, headers=headers)
-        
+
     except Exception as e:
-        print(f"Error: {e}")
\ No newline at end of file
+        print(f"Error: {e}")
@@ -1,25 +1,35 @@
 import uuid
 import json
+import queue
+import threading
+import time
 import requests
 import os
-from .kalshi_auth import get_kalshi_auth_headers
+from concurrent.futures import Future, ThreadPoolExecutor
+# Ensure KALSHI_BASE_URL matches your environment (Production vs Demo)
+from .client import get_client, ORDER, PORTFOLIO
+from .ledger import get_ledger
 
-# Ensure this matches your environment (Production vs Demo)
-BASE_URL = "https://api.elections.kalshi.com" 
+ORDERS_PATH = "/trade-api/v2/portfolio/orders"
+BATCHED_PATH = "/trade-api/v2/portfolio/orders/batched"
+BATCH_WINDOW_S = float(os.environ.get("ORDER_BATCH_WINDOW_MS", "5")) / 1000
+MAX_BATCH = 20          # Kalshi's limit per batched-create request
+SEND_RETRIES = 1        # re-sends on connection errors / 5xx (same client_order_id)
+
+
+class OrderError(RuntimeError):
+    """An order the exchange rejected (or that could not be sent)."""
+
+    def __init__(self, message: str, payload: dict = None, error=None):
+        super().__init__(message)
+        self.payload = payload
+        self.error = error
+
+
+def build_order_payload(ticker: str, action: str, side: str, count: int, type: str = 'limit',
+                        price: int = None, client_order_id: str = None) -> dict:
+    """Validate an order intent and build the create-order payload."""
 
-def execute_order(ticker: str, action: str, side: str, count: int, type: str = 'limit', price: int = None):
-    """
-    Executes a trade order on Kalshi.
-    
-    Args:
-        ticker (str): The market ticker (e.g., "KXHIGHLOW-23DEC26-T4000").
-        action (str): "buy" or "sell".
-        side (str): "yes" or "no".
-        count (int): Number of contracts.
-        type (str): "limit" or "market". Default is "limit".
-        price (int): The price in cents (1-99). Required for limit orders.
-    """
-    
     # 1. Input Sanitization & Validation
     # Force lowercase to prevent logic errors (e.g., "Yes" vs "yes")
     action = action.lower()
@@ -30,13 +40,15 @@ def execute_order(ticker: str, action: str, side: str, count: int, type: str = '
         raise ValueError("Price (in cents) is strictly required for limit orders.")
 
     # 2. Construct the Base Payload
+    # client_order_id makes the intent idempotent: re-sending the same
+    # payload after a timeout cannot create a second order
     payload = {
         "ticker": ticker,
         "action": action,
         "side": side,
         "count": count,
         "type": type,
-        "client_order_id": str(uuid.uuid4())
+        "client_order_id": client_order_id or str(uuid.uuid4())
     }
 
     # 3. Handle Price Mapping (Crucial Step)
@@ -48,23 +60,44 @@ def execute_order(ticker: str, action: str, side: str, count: int, type: str = '
             payload["no_price"] = price
         else:
             raise ValueError(f"Invalid side: {side}. Must be 'yes' or 'no'.")
+    return payload
+
+
+def is_duplicate_reject(status: int, error) -> bool:
+    """True if the exchange refused an order because its client_order_id was already used."""
+    text = error if isinstance(error, str) else json.dumps(error)
+    return status == 409 or "order_already_exists" in text or "duplicate" in text.lower()
+
+
+def execute_order(ticker: str, action: str, side: str, count: int, type: str = 'limit', price: int = None,
+                  client_order_id: str = None):
+    """
+    Executes a trade order on Kalshi.
+
+    Args:
+        ticker (str): The market ticker (e.g., "KXHIGHLOW-23DEC26-T4000").
+        action (str): "buy" or "sell".
+        side (str): "yes" or "no".
+        count (int): Number of contracts.
+        type (str): "limit" or "market". Default is "limit".
+        price (int): The price in cents (1-99). Required for limit orders.
+        client_order_id (str): Idempotency key; generated if omitted.
 
-    # 4. Prepare Request
-    endpoint = "/trade-api/v2/portfolio/orders"
-    full_url = f"{BASE_URL}{endpoint}"
-    
-    # Generate headers (Assuming get_kalshi_auth_headers is defined in your file)
-    headers = get_kalshi_auth_headers("POST", endpoint)
+    Blocks until the exchange acknowledges. Use get_gateway().submit() to
+    queue an order without waiting.
+    """
+    payload = build_order_payload(ticker, action, side, count, type, price, client_order_id)
 
-    # 5. Execute Request with Debugging
+    # Execute Request with Debugging (signed + pooled via the shared client)
     try:
-        response = requests.post(full_url, json=payload, headers=headers)
+        response = get_client().post(ORDERS_PATH, kind=ORDER, json=payload)
         response.raise_for_status() # Raise error for 4xx/5xx
-        
+
         data = response.json()
         print(f"Order Placed Successfully: {data.get('order', {}).get('order_id')}")
+        get_ledger().record_order(data.get("order"))
         return data
-        
+
     except requests.exceptions.HTTPError as e:
         print(f"\n--- HTTP Error {e.response.status_code} ---")
         print(f"Error Details: {e.response.text}")
@@ -74,8 +107,287 @@ def execute_order(ticker: str, action: str, side: str, count: int, type: str = '
         print(f"System Error: {e}")
         raise
 
+
+class OrderGateway:
+    """
+    Non-blocking order submission.
+
+    submit() validates the intent, queues it and returns a Future at once.
+    A dispatcher thread collects the orders that arrive within
+    BATCH_WINDOW_S (up to MAX_BATCH) and sends them in one request to the
+    batched-create endpoint. If the account cannot use that endpoint, it
+    falls back to concurrent single POSTs. Each Future resolves to
+    {"order": {...}} like execute_order, or raises OrderError /
+    requests.RequestException. on_ack(result) / on_error(exc) are called
+    on completion.
+    """
+
+    def __init__(self, window_s: float = BATCH_WINDOW_S, max_batch: int = MAX_BATCH, workers: int = 4):
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="orders")
+        self._batched = True     # flips off if the batched endpoint is unavailable
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counts = {"submitted": 0, "acked": 0, "rejected": 0, "failed": 0,
+                        "batches": 0, "batched_orders": 0, "singles": 0, "resends": 0, "recovered": 0}
+
+    def submit(self, ticker: str, action: str, side: str, count: int, type: str = 'limit', price: int = None,
+               client_order_id: str = None, on_ack=None, on_error=None) -> Future:
+        payload = build_order_payload(ticker, action, side, count, type, price, client_order_id)
+        future = Future()
+
+        def notify(f):
+            exc = f.exception()
+            callback = on_error if exc is not None else on_ack
+            if callback is not None:
+                try:
+                    callback(exc if exc is not None else f.result())
+                except Exception as e:
+                    print(f"[orders] Callback error: {e}")
+
+        future.add_done_callback(notify)
+        self._ensure_started()
+        self._count("submitted")
+        self._queue.put((payload, future))
+        return future
+
+    def _count(self, field: str, n: int = 1):
+        with self._lock:
+            self._counts[field] += n
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._dispatch, name="order-gateway", daemon=True)
+                    self._thread.start()
+
+    def _dispatch(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if len(batch) > 1 and self._batched:
+                self._pool.submit(self._send_batch, batch)
+            else:
+                for item in batch:
+                    self._pool.submit(self._send_single, *item)
+
+    def _post(self, path: str, body: dict) -> requests.Response:
+        """POST with re-sends on transport errors and 5xx; safe because payloads carry client_order_id."""
+        for attempt in range(SEND_RETRIES + 1):
+            try:
+                response = get_client().post(path, kind=ORDER, json=body)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= SEND_RETRIES:
+                    raise
+            else:
+                if response.status_code < 500 or attempt >= SEND_RETRIES:
+                    return response
+            self._count("resends")
+
+    def _send_single(self, payload: dict, future: Future):
+        self._count("singles")
+        try:
+            response = self._post(ORDERS_PATH, payload)
+            if response.status_code >= 400:
+                if is_duplicate_reject(response.status_code, response.text):
+                    return self._recover(payload, future, response.text)
+                raise OrderError(f"Order rejected ({response.status_code}): {response.text}", payload,
+                                 response.text)
+            self._ack(payload, future, response.json().get("order"))
+        except Exception as e:
+            self._fail(payload, future, e)
+
+    def _recover(self, payload: dict, future: Future, error):
+        """
+        client_order_ids are fresh uuids, so a duplicate reject means an
+        earlier attempt (a resend after a lost response) did create the
+        order. Look it up and ack it, so the ledger and exits see it.
+        """
+        try:
+            response = get_client().get(ORDERS_PATH, kind=PORTFOLIO, params={"ticker": payload["ticker"]})
+            response.raise_for_status()
+            orders = response.json().get("orders") or []
+        except Exception as e:
+            return self._fail(payload, future, OrderError(
+                f"Duplicate client_order_id and the order lookup failed: {e}", payload, error))
+        order = next((o for o in orders if o.get("client_order_id") == payload["client_order_id"]), None)
+        if order is None:
+            return self._fail(payload, future, OrderError(
+                f"Duplicate client_order_id but no such order found: {error}", payload, error))
+        self._count("recovered")
+        self._ack(payload, future, order)
+
+    def _send_batch(self, batch: list):
+        payloads = [payload for payload, _ in batch]
+        try:
+            response = self._post(BATCHED_PATH, {"orders": payloads})
+        except Exception as e:
+            for payload, future in batch:
+                self._fail(payload, future, e)
+            return
+
+        if response.status_code in (403, 404, 405, 501):
+            print(f"[orders] Batched endpoint unavailable ({response.status_code}); sending orders singly")
+            self._batched = False
+            for item in batch:
+                self._pool.submit(self._send_single, *item)
+            return
+        if response.status_code >= 400:
+            # One bad order fails the whole request; give every order its own result
+            print(f"[orders] Batch rejected ({response.status_code}); sending {len(batch)} orders singly")
+            for item in batch:
+                self._pool.submit(self._send_single, *item)
+            return
+
+        self._count("batches")
+        self._count("batched_orders", len(batch))
+        results = response.json().get("orders") or []
+        by_id = {r.get("client_order_id") or (r.get("order") or {}).get("client_order_id"): r for r in results}
+        for i, (payload, future) in enumerate(batch):
+            result = by_id.get(payload["client_order_id"]) or (results[i] if i < len(results) else None)
+            if result is None:
+                self._fail(payload, future, OrderError("No result for order in batch response", payload))
+            elif result.get("error") and is_duplicate_reject(0, result["error"]):
+                self._pool.submit(self._recover, payload, future, result["error"])
+            elif result.get("error"):
+                self._fail(payload, future, OrderError(f"Order rejected: {result['error']}", payload,
+                                                       result["error"]))
+            else:
+                self._ack(payload, future, result.get("order"))
+
+    def _ack(self, payload: dict, future: Future, order: dict):
+        self._count("acked")
+        print(f"Order Placed Successfully: {(order or {}).get('order_id')}")
+        get_ledger().record_order(order)
+        future.set_result({"order": order})
+
+    def _fail(self, payload: dict, future: Future, exc: Exception):
+        self._count("rejected" if isinstance(exc, OrderError) else "failed")
+        print(f"[orders] {payload['action']} {payload['side']} {payload['ticker']} failed: {exc}")
+        future.set_exception(exc)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counts, "queued": self._queue.qsize(), "batched_endpoint": self._batched}
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> OrderGateway:
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = OrderGateway()
+    return _gateway
+
+
+def _bench(orders: int = 20):
+    """A burst of signals: blocking execute_order per signal vs gateway.submit()."""
+    import tempfile
+
+    from .mock_exchange import ensure_test_credentials, start_mock_exchange
+    from . import client as client_module, ledger as ledger_module
+
+    ensure_test_credentials()
+    server, base_url = start_mock_exchange(rtt_s=0.02)
+    client_module._client = client_module.KalshiClient(base_url)
+    client_module._client.warm(4)
+    ledger_module._ledger = ledger_module.Ledger(os.path.join(tempfile.mkdtemp(), "ledger.json"))
+
+    def intent(i):
+        return dict(ticker=f"KXBENCH-{i}", action="buy", side="yes", count=1, type="limit", price=40)
+
+    t0 = time.perf_counter()
+    for i in range(orders):
+        execute_order(**intent(i))
+    inline_s = time.perf_counter() - t0
+
+    gateway = OrderGateway()
+    t0 = time.perf_counter()
+    futures = [gateway.submit(**intent(i)) for i in range(orders)]
+    submit_s = time.perf_counter() - t0
+    for f in futures:
+        f.result()
+    gateway_s = time.perf_counter() - t0
+
+    print(f"\n{orders} orders in one cycle, 20ms simulated RTT")
+    print(f"execute_order inline  decision loop blocked {inline_s * 1000:7.1f}ms  all acked {inline_s * 1000:7.1f}ms")
+    print(f"gateway.submit        decision loop blocked {submit_s * 1000:7.1f}ms  all acked {gateway_s * 1000:7.1f}ms")
+    print(f"gateway stats: {gateway.stats()}")
+    server.shutdown()
+
+
+def _check():
+    """
+    Regression check for idempotent resends, duplicate-id recovery and batch splitting:
+        python -m Kalshi.kalshi_order_executor --check
+    """
+    import tempfile
+
+    from .mock_exchange import MockExchangeState, ensure_test_credentials, start_mock_exchange
+    from . import client as client_module, ledger as ledger_module
+
+    ensure_test_credentials()
+    state = MockExchangeState()
+    server, base_url = start_mock_exchange(state=state)
+    client_module._client = client_module.KalshiClient(base_url)
+    ledger_module._ledger = ledger_module.Ledger(os.path.join(tempfile.mkdtemp(), "ledger.json"))
+
+    def burst(gateway, tickers):
+        futures = [gateway.submit(t, "buy", "yes", 1, price=40) for t in tickers]
+        return [f.result(timeout=10)["order"]["ticker"] for f in futures]
+
+    try:
+        # Single order placed, response lost: the resend's duplicate reject becomes an ack
+        state.lose_responses = 1
+        single = OrderGateway(window_s=0)
+        assert burst(single, ["KXCHECK-S"]) == ["KXCHECK-S"]
+        assert single.stats()["recovered"] == 1
+
+        # Same for every order of a batch
+        state.lose_responses = 1
+        batched = OrderGateway(window_s=0.05)
+        assert burst(batched, ["KXCHECK-B0", "KXCHECK-B1"]) == ["KXCHECK-B0", "KXCHECK-B1"]
+        assert batched.stats()["recovered"] == 2
+
+        # A refused batch is split: each order gets its own result
+        state.reject_batches = 1
+        split = OrderGateway(window_s=0.05)
+        assert burst(split, ["KXCHECK-R0", "KXCHECK-R1"]) == ["KXCHECK-R0", "KXCHECK-R1"]
+        assert split.stats()["singles"] == 2
+
+        assert len(state.orders) == 5, "an order was created twice"
+        assert len(ledger_module.get_ledger().snapshot()["resting_orders"]) == 5
+    finally:
+        server.shutdown()
+    print("order gateway check passed")
+
+
 # --- Usage Example ---
 if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        _bench()
+        sys.exit()
+    if "--check" in sys.argv:
+        _check()
+        sys.exit()
+
     try:
         # Ensure you use a valid, active ticker. Tickers change daily/weekly.
         # Example: Buying 'Yes' at 50 cents
@@ -89,4 +401,4 @@ if __name__ == "__main__":
         )
         print(json.dumps(order_result, indent=2))
     except Exception:
-        pass
\ No newline at end of file
+        pass
@@ -2,13 +2,13 @@
 import asyncio
 import websockets
 import json
-from kalshi_auth import build_auth_headers
+from kalshi_auth import get_kalshi_auth_headers
 
 WS_URL  = "wss://api.elections.kalshi.com/trade-api/ws/v2"
 WS_PATH = "/trade-api/ws/v2"
 
 async def start_ticker_stream(tickers_to_watch: list[str]):
-    headers = build_auth_headers("GET", WS_PATH)
+    headers = get_kalshi_auth_headers("GET", WS_PATH)
 
     async with websockets.connect(WS_URL, additional_headers=headers) as ws:
         print(f"✅ Connected to PROD. Monitoring: {tickers_to_watch}")
@@ -0,0 +1,417 @@
+"""
+In-process ledger of Kalshi positions, cost basis and resting orders.
+
+Positions are built from our own activity instead of polling
+/portfolio/positions:
+
+  - every execute_order acknowledgement is recorded (resting orders)
+  - fills arrive on the WebSocket `fill` channel (shared with the
+    orderbook mirror), and /portfolio/fills is polled from the last seen
+    fill time to catch anything missed over a disconnect or restart;
+    fills are de-duplicated by trade_id
+  - each (ticker, side) keeps its contract count and total cost, so the
+    average price is a true VWAP cost basis; sells release cost at that
+    average and book realized P&L
+  - every RECONCILE_S the REST positions snapshot is compared, and any
+    count that disagrees is corrected (cost basis from market_exposure
+    when the ledger has none)
+
+State is written to LEDGER_PATH as JSON by a flusher thread, at most
+SAVE_DEBOUNCE_S after a change (a burst of fills costs one write, off the
+WebSocket thread) and once more at exit. So a restarted pipeline keeps
+its cost basis, and the API can serve /api/positions from the file
+without touching Kalshi.
+
+Usage:
+    from Kalshi.ledger import get_ledger
+
+    ledger = get_ledger()
+    ledger.start(get_orderbook_service())
+    ledger.holdings()   # → [{"ticker", "side", "count", "avg_price", "resting_sell"}, ...]
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from .client import get_client, PORTFOLIO
+
+LEDGER_PATH = os.environ.get("LEDGER_PATH", "ledger.json")
+FILL_POLL_S = float(os.environ.get("LEDGER_FILL_POLL_S", "30"))
+RECONCILE_S = float(os.environ.get("LEDGER_RECONCILE_S", "300"))
+FILL_OVERLAP_S = 60        # re-read this much history on each poll; trade_ids dedupe it
+MAX_TRADE_IDS = 10000
+SAVE_DEBOUNCE_S = 0.5      # changes within this long of each other share one file write
+
+
+def _fill_ts(fill: dict) -> float:
+    if fill.get("ts") is not None:
+        return float(fill["ts"])
+    created = fill.get("created_time")
+    if created:
+        try:
+            return datetime.fromisoformat(created.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+def _fill_price(fill: dict, side: str):
+    price = fill.get(f"{side}_price")
+    if price is None:
+        other = fill.get("no_price" if side == "yes" else "yes_price")
+        price = None if other is None else 100 - other
+    return price
+
+
+class Ledger:
+    def __init__(self, path: str = LEDGER_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._positions = {}    # (ticker, side) → {"count", "cost", "realized"} (cents)
+        self._orders = {}       # order_id → resting order
+        self._trade_ids = set()
+        self._trade_order = deque()
+        self._last_fill_ts = 0.0
+        self._last_reconcile = 0.0
+        self._listeners = []
+        self._thread = None
+        self._dirty = threading.Event()
+        self._flusher = None
+        self._counts = {"orders": 0, "fills": 0, "duplicate_fills": 0,
+                        "polled_fills": 0, "reconciles": 0, "corrections": 0}
+        self._load()
+
+    # -- events ------------------------------------------------------------
+
+    def record_order(self, order: dict):
+        """Record an order acknowledgement (the "order" object of a create response)."""
+        if not order or not order.get("order_id"):
+            return
+        with self._lock:
+            self._counts["orders"] += 1
+            remaining = order.get("remaining_count")
+            if order.get("status") == "resting" and remaining:
+                self._orders[order["order_id"]] = {
+                    "order_id": order["order_id"],
+                    "ticker": order.get("ticker"),
+                    "action": order.get("action"),
+                    "side": order.get("side"),
+                    "price": order.get("yes_price") if order.get("side") == "yes" else order.get("no_price"),
+                    "remaining_count": remaining,
+                    "created_time": order.get("created_time"),
+                }
+            else:
+                self._orders.pop(order["order_id"], None)
+        self._changed()
+
+    def apply_fill(self, fill: dict) -> bool:
+        """Apply one fill (WebSocket `fill` msg or REST /portfolio/fills item). False if already seen."""
+        trade_id = fill.get("trade_id")
+        ticker = fill.get("market_ticker") or fill.get("ticker")
+        side = fill.get("side")
+        action = fill.get("action")
+        count = int(fill.get("count") or 0)
+        price = _fill_price(fill, side)
+        if not ticker or side not in ("yes", "no") or count <= 0 or price is None:
+            return False
+
+        with self._lock:
+            if trade_id:
+                if trade_id in self._trade_ids:
+                    self._counts["duplicate_fills"] += 1
+                    return False
+                self._trade_ids.add(trade_id)
+                self._trade_order.append(trade_id)
+                if len(self._trade_order) > MAX_TRADE_IDS:
+                    self._trade_ids.discard(self._trade_order.popleft())
+
+            pos = self._positions.setdefault((ticker, side), {"count": 0, "cost": 0.0, "realized": 0.0})
+            if action == "buy":
+                pos["count"] += count
+                pos["cost"] += count * price
+            else:
+                closed = min(count, pos["count"])
+                avg = pos["cost"] / pos["count"] if pos["count"] else 0.0
+                pos["realized"] += closed * (price - avg)
+                pos["count"] -= closed
+                pos["cost"] = pos["cost"] - closed * avg if pos["count"] else 0.0
+
+            order = self._orders.get(fill.get("order_id"))
+            if order is not None:
+                order["remaining_count"] -= count
+                if order["remaining_count"] <= 0:
+                    del self._orders[order["order_id"]]
+
+            self._last_fill_ts = max(self._last_fill_ts, _fill_ts(fill))
+            self._counts["fills"] += 1
+        self._changed()
+        return True
+
+    # -- REST catch-up -----------------------------------------------------
+
+    def poll_fills(self) -> int:
+        """Apply fills since the last one seen. Returns how many were new."""
+        params = {"limit": 200}
+        if self._last_fill_ts:
+            params["min_ts"] = int(self._last_fill_ts) - FILL_OVERLAP_S
+        fills = []
+        while True:
+            response = get_client().get("/trade-api/v2/portfolio/fills", kind=PORTFOLIO, params=params)
+            response.raise_for_status()
+            data = response.json()
+            fills.extend(data.get("fills") or [])
+            cursor = data.get("cursor")
+            if not cursor:
+                break
+            params["cursor"] = cursor
+
+        new = sum(self.apply_fill(f) for f in sorted(fills, key=_fill_ts))
+        with self._lock:
+            self._counts["polled_fills"] += new
+        return new
+
+    def reconcile(self) -> int:
+        """Correct counts against the REST positions snapshot. Returns corrections made."""
+        params = {"count_filter": "position", "limit": 1000}
+        remote = {}
+        while True:
+            response = get_client().get("/trade-api/v2/portfolio/positions", kind=PORTFOLIO, params=params)
+            response.raise_for_status()
+            data = response.json()
+            for p in data.get("market_positions") or []:
+                position = p.get("position", 0)
+                if position:
+                    side = "yes" if position > 0 else "no"
+                    remote[(p.get("ticker"), side)] = (abs(position), p.get("market_exposure") or 0)
+            cursor = data.get("cursor")
+            if not cursor:
+                break
+            params["cursor"] = cursor
+
+        corrections = 0
+        with self._lock:
+            for key in set(remote) | {k for k, pos in self._positions.items() if pos["count"]}:
+                count, exposure = remote.get(key, (0, 0))
+                pos = self._positions.setdefault(key, {"count": 0, "cost": 0.0, "realized": 0.0})
+                if pos["count"] == count:
+                    continue
+                print(f"[ledger] Reconcile {key[0]} {key[1]}: ledger {pos['count']} → exchange {count}")
+                if count == 0:
+                    pos["cost"] = 0.0
+                elif pos["count"] and pos["cost"]:
+                    pos["cost"] = pos["cost"] / pos["count"] * count   # keep our VWAP
+                else:
+                    pos["cost"] = float(exposure)
+                pos["count"] = count
+                corrections += 1
+            self._counts["reconciles"] += 1
+            self._counts["corrections"] += corrections
+            self._last_reconcile = time.time()
+        self._changed()
+        return corrections
+
+    def start(self, books=None):
+        """Consume fills from the orderbook WebSocket and run the poll/reconcile loop."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="ledger", daemon=True)
+        if books is not None:
+            books.subscribe_channel("fill", self.apply_fill)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                if time.time() - self._last_reconcile >= RECONCILE_S:
+                    self.poll_fills()
+                    self.reconcile()
+                else:
+                    self.poll_fills()
+            except Exception as e:
+                print(f"[ledger] Sync error: {e}")
+            time.sleep(FILL_POLL_S)
+
+    # -- queries -----------------------------------------------------------
+
+    def holdings(self) -> list:
+        """Open positions with VWAP cost basis and contracts already offered for sale."""
+        with self._lock:
+            resting_sells = {}
+            for order in self._orders.values():
+                if order["action"] == "sell":
+                    key = (order["ticker"], order["side"])
+                    resting_sells[key] = resting_sells.get(key, 0) + order["remaining_count"]
+            return [
+                {
+                    "ticker": ticker,
+                    "side": side,
+                    "count": pos["count"],
+                    "avg_price": pos["cost"] / pos["count"],
+                    "resting_sell": resting_sells.get((ticker, side), 0),
+                }
+                for (ticker, side), pos in self._positions.items()
+                if pos["count"] > 0
+            ]
+
+    def add_listener(self, fn):
+        """fn() is called after every change to positions or orders."""
+        self._listeners.append(fn)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "positions": [
+                    {
+                        "ticker": ticker,
+                        "side": side,
+                        "count": pos["count"],
+                        "avg_price": round(pos["cost"] / pos["count"], 2) if pos["count"] else None,
+                        "cost": round(pos["cost"], 2),
+                        "realized_pnl": round(pos["realized"], 2),
+                    }
+                    for (ticker, side), pos in sorted(self._positions.items())
+                ],
+                "resting_orders": list(self._orders.values()),
+                "last_fill_ts": self._last_fill_ts,
+                "last_reconcile": self._last_reconcile,
+                "updated_at": time.time(),
+                "stats": dict(self._counts),
+            }
+
+    # -- persistence -------------------------------------------------------
+
+    def _changed(self):
+        self._dirty.set()
+        if self._flusher is None:
+            with self._save_lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, name="ledger-flush", daemon=True)
+                    self._flusher.start()
+                    atexit.register(self.flush)
+        for fn in list(self._listeners):
+            try:
+                fn()
+            except Exception as e:
+                print(f"[ledger] Listener error: {e}")
+
+    def _flush_loop(self):
+        while True:
+            self._dirty.wait()
+            time.sleep(SAVE_DEBOUNCE_S)
+            self.flush()
+
+    def flush(self):
+        """Write pending changes now."""
+        if self._dirty.is_set():
+            self._dirty.clear()     # before the snapshot: a change during the write re-arms it
+            self._save()
+
+    def _save(self):
+        state = self.snapshot()
+        with self._lock:
+            state["trade_ids"] = list(self._trade_order)
+        with self._save_lock:
+            tmp = f"{self.path}.tmp"
+            try:
+                with open(tmp, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"[ledger] Could not write {self.path}: {e}")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[ledger] Ignoring unreadable {self.path}: {e}")
+            return
+        for p in state.get("positions", []):
+            self._positions[(p["ticker"], p["side"])] = {
+                "count": p["count"], "cost": p["cost"], "realized": p.get("realized_pnl", 0.0),
+            }
+        self._orders = {o["order_id"]: o for o in state.get("resting_orders", [])}
+        self._trade_order = deque(state.get("trade_ids", []))
+        self._trade_ids = set(self._trade_order)
+        self._last_fill_ts = state.get("last_fill_ts", 0.0)
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Ledger:
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = Ledger()
+    return _ledger
+
+
+def _check():
+    """
+    Regression check for the cost-basis maths, fill dedupe, reconcile and persistence:
+        python -m Kalshi.ledger --check
+    """
+    import tempfile
+
+    from .mock_exchange import MockExchangeState, ensure_test_credentials, start_mock_exchange
+    from . import client as client_module
+
+    path = os.path.join(tempfile.mkdtemp(), "ledger.json")
+    ledger = Ledger(path)
+
+    def fill(trade_id, action, count, price):
+        return ledger.apply_fill({"trade_id": trade_id, "ticker": "KXCHECK-A", "side": "yes",
+                                  "action": action, "count": count, "yes_price": price})
+
+    assert fill("t1", "buy", 2, 40)
+    assert fill("t2", "buy", 2, 60)
+    assert not fill("t2", "buy", 2, 60), "duplicate trade_id applied twice"
+    assert fill("t3", "sell", 1, 70)
+    [pos] = ledger.snapshot()["positions"]
+    assert (pos["count"], pos["avg_price"], pos["realized_pnl"]) == (3, 50, 20), pos
+    assert ledger.snapshot()["stats"]["duplicate_fills"] == 1
+
+    # Exchange says 5 contracts (ours: keep VWAP) and a position the ledger never saw
+    ensure_test_credentials()
+    state = MockExchangeState()
+    state.positions = {
+        "KXCHECK-A": {"ticker": "KXCHECK-A", "position": 5, "market_exposure": 250},
+        "KXCHECK-B": {"ticker": "KXCHECK-B", "position": -2, "market_exposure": 90},
+    }
+    server, base_url = start_mock_exchange(state=state)
+    client_module._client = client_module.KalshiClient(base_url)
+    try:
+        assert ledger.reconcile() == 2
+    finally:
+        server.shutdown()
+    positions = {(p["ticker"], p["side"]): p for p in ledger.snapshot()["positions"]}
+    a, b = positions[("KXCHECK-A", "yes")], positions[("KXCHECK-B", "no")]
+    assert (a["count"], a["avg_price"], a["realized_pnl"]) == (5, 50, 20), a
+    assert (b["count"], b["avg_price"]) == (2, 45), b
+
+    # Persisted state survives a restart, including seen trade_ids
+    ledger.flush()
+    reloaded = Ledger(path)
+    assert reloaded.snapshot()["positions"] == ledger.snapshot()["positions"]
+    assert not reloaded.apply_fill({"trade_id": "t1", "ticker": "KXCHECK-A", "side": "yes",
+                                    "action": "buy", "count": 2, "yes_price": 40})
+    print("ledger check passed")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--check" in sys.argv:
+        _check()
@@ -1,35 +1,195 @@
 # market_utils.py
-import requests
-from .kalshi_order_executor import get_kalshi_auth_headers, BASE_URL
+"""
+Top-of-book quotes for the entry path (get_best_ask) and the exit path
+(sell_heartbeat.get_market_bid), answered by one QuoteService:
+
+  1. the live orderbook mirror, when the market is watched and in sync
+  2. a short-TTL cache (QUOTE_TTL_S, sub-second by default)
+  3. the REST markets endpoint: tickers missing from 1 and 2 are fetched
+     together in one bulk /markets?tickers=... call, and concurrent lookups
+     of a ticker already being fetched wait for that request instead of
+     sending their own (singleflight)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from .client import get_client, QUOTE
+from .orderbook import get_orderbook_service
+
+QUOTE_TTL_S = float(os.environ.get("QUOTE_TTL_S", "0.5"))
+MAX_BULK = 100               # tickers per /markets request
+INFLIGHT_WAIT_S = 5.0
+_PRUNE_AT = 2000             # cache entries before expired ones are dropped
+
+
+def _quote_from_book(book) -> dict:
+    return {
+        "yes_bid": book.best_bid("yes"),
+        "no_bid": book.best_bid("no"),
+        "yes_ask": book.best_ask("yes"),
+        "no_ask": book.best_ask("no"),
+    }
+
+
+def _quote_from_market(market: dict) -> dict:
+    # The markets endpoint reports 0 bid / 100 ask when a side is empty
+    def ask(value):
+        return value if value and value < 100 else None
+
+    return {
+        "yes_bid": market.get("yes_bid") or 0,
+        "no_bid": market.get("no_bid") or 0,
+        "yes_ask": ask(market.get("yes_ask")),
+        "no_ask": ask(market.get("no_ask")),
+    }
+
+
+class QuoteService:
+    def __init__(self, ttl_s: float = QUOTE_TTL_S, books=None):
+        self.ttl_s = ttl_s
+        self.books = books or get_orderbook_service()
+        self._lock = threading.Lock()
+        self._cache = {}         # ticker → (expires_at, quote)
+        self._inflight = {}      # ticker → Future[quote | None]
+        self._counts = {"mirror": 0, "cache": 0, "coalesced": 0, "fetched": 0, "requests": 0}
+
+    def quotes(self, tickers) -> dict:
+        """ticker → {"yes_bid", "no_bid", "yes_ask", "no_ask"} (asks None when no offer), or None."""
+        out, waiting, fetch = {}, {}, []
+        now = time.monotonic()
+        for ticker in dict.fromkeys(tickers):
+            book = self.books.book(ticker)
+            if book is not None:
+                out[ticker] = _quote_from_book(book)
+                self._counts["mirror"] += 1
+                continue
+            with self._lock:
+                cached = self._cache.get(ticker)
+                if cached is not None and cached[0] > now:
+                    out[ticker] = cached[1]
+                    self._counts["cache"] += 1
+                    continue
+                future = self._inflight.get(ticker)
+                if future is not None:
+                    waiting[ticker] = future
+                    self._counts["coalesced"] += 1
+                    continue
+                waiting[ticker] = self._inflight[ticker] = Future()
+                fetch.append(ticker)
+
+        if fetch:
+            self._fetch(fetch)
+        for ticker, future in waiting.items():
+            try:
+                out[ticker] = future.result(timeout=INFLIGHT_WAIT_S)
+            except Exception:
+                out[ticker] = None
+        return out
+
+    def quote(self, ticker: str):
+        return self.quotes([ticker]).get(ticker)
+
+    def _fetch(self, tickers: list):
+        results = {}
+        try:
+            for i in range(0, len(tickers), MAX_BULK):
+                chunk = tickers[i:i + MAX_BULK]
+                self._counts["requests"] += 1
+                response = get_client().get("/trade-api/v2/markets", kind=QUOTE,
+                                            params={"tickers": ",".join(chunk), "limit": len(chunk)})
+                response.raise_for_status()
+                for market in response.json().get("markets") or []:
+                    results[market.get("ticker")] = _quote_from_market(market)
+        except Exception as e:
+            print(f"[market] Error fetching quotes for {len(tickers)} ticker(s): {e}")
+
+        expires = time.monotonic() + self.ttl_s
+        with self._lock:
+            self._counts["fetched"] += len(results)
+            if len(self._cache) > _PRUNE_AT:
+                now = time.monotonic()
+                self._cache = {t: c for t, c in self._cache.items() if c[0] > now}
+            futures = []
+            for ticker in tickers:
+                if ticker in results:
+                    self._cache[ticker] = (expires, results[ticker])
+                futures.append((self._inflight.pop(ticker), results.get(ticker)))
+        for future, quote in futures:
+            future.set_result(quote)
+
+    def best_ask(self, ticker: str, side: str):
+        quote = self.quote(ticker)
+        return None if quote is None else quote[f"{side}_ask"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counts, "cached": len(self._cache), "inflight": len(self._inflight)}
+
+
+_quotes = None
+_quotes_lock = threading.Lock()
+
+
+def get_quote_service() -> QuoteService:
+    global _quotes
+    if _quotes is None:
+        with _quotes_lock:
+            if _quotes is None:
+                _quotes = QuoteService()
+    return _quotes
+
 
 def get_best_ask(ticker, side):
     """
     Fetches the lowest price sellers are willing to accept (Ask) for a specific side.
     Used for IMMEDIATE BUY execution.
+
+    Kalshi books only list bids: buying YES at p matches a NO bid at 100 - p,
+    so the best YES ask is 100 - the highest NO bid (and vice versa).
     """
-    endpoint = f"/trade-api/v2/markets/{ticker}/orderbook"
-    headers = get_kalshi_auth_headers("GET", endpoint)
-    url = f"{BASE_URL}{endpoint}"
-    
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            return None
-            
-        book = response.json().get("orderbook", {})
-        
-        # Select the correct book side
-        # If we want to BUY YES, we look at the YES Asks.
-        target_book = book.get(side, [])
-        
-        if not target_book:
-            return None
-            
-        # Asks are sorted low-to-high. The best price for us (buyer) is the lowest one.
-        # Structure: [[price, quantity], [price, quantity]]
-        best_ask = target_book[0][0] 
-        return best_ask
-
+        return get_quote_service().best_ask(ticker, side)
     except Exception as e:
         print(f"[market] Error fetching ask for {ticker}: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def _bench(lookups: int = 40, tickers: int = 8):
+    """A batch where several headlines share tickers: one orderbook GET per lookup vs QuoteService."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .mock_exchange import ensure_test_credentials, start_mock_exchange
+    from .orderbook import OrderbookService
+    from . import client as client_module
+
+    ensure_test_credentials()
+    server, base_url = start_mock_exchange(rtt_s=0.02)
+    for i in range(tickers):
+        server.state.set_book(f"KXBENCH-{i}", yes=[[30, 5]], no=[[60, 3]])
+    client_module._client = client_module.KalshiClient(base_url)
+    client_module._client.warm(4)
+    names = [f"KXBENCH-{i % tickers}" for i in range(lookups)]
+
+    def per_lookup(ticker):
+        client_module._client.get(f"/trade-api/v2/markets/{ticker}/orderbook", kind=QUOTE).json()
+
+    for label, run in (
+        ("orderbook GET per lookup", lambda: list(pool.map(per_lookup, names))),
+        ("QuoteService, concurrent", lambda: list(pool.map(service.quote, names))),
+        ("QuoteService, bulk", lambda: service.quotes(names)),
+    ):
+        service = QuoteService(books=OrderbookService())
+        before = server.requests
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            t0 = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - t0
+        print(f"{label:26s} {elapsed * 1000:7.1f}ms  {server.requests - before:3d} requests")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    _bench()
@@ -0,0 +1,360 @@
+"""
+Local stand-in for the Kalshi REST API, used by the Kalshi benchmarks.
+
+Serves the endpoints the bot uses from in-memory state:
+
+  GET  /trade-api/v2/exchange/status
+  GET  /trade-api/v2/markets   (tickers, status, min/max_close_ts, min_updated_ts, cursor)
+  GET  /trade-api/v2/events    /  /trade-api/v2/events/{event_ticker}
+  GET  /trade-api/v2/markets/{ticker}/orderbook
+  POST /trade-api/v2/portfolio/orders
+  POST /trade-api/v2/portfolio/orders/batched
+  GET  /trade-api/v2/portfolio/orders  (ticker)
+  GET  /trade-api/v2/portfolio/positions
+  GET  /trade-api/v2/portfolio/fills
+
+Network cost is simulated: every request waits one round trip (rtt_s), and
+each new connection waits handshake_rtts more round trips before its
+first response (TCP + TLS setup to the real exchange). With tls=True the
+server also does a real TLS handshake with a throwaway self-signed
+certificate.
+
+Usage:
+    from Kalshi.mock_exchange import start_mock_exchange
+
+    server, base_url = start_mock_exchange(rtt_s=0.02, handshake_rtts=2)
+    os.environ["KALSHI_BASE_URL"] = base_url   # before importing Kalshi.client
+"""
+
+import datetime
+import json
+import os
+import re
+import socket
+import ssl
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+_ORDERBOOK_RE = re.compile(r"^/trade-api/v2/markets/([^/]+)/orderbook$")
+_EVENT_RE = re.compile(r"^/trade-api/v2/events/([^/]+)$")
+
+
+def ensure_test_credentials():
+    """Put a throwaway RSA key in the env if no Kalshi credentials are set."""
+    if not os.getenv("KALSHI_PRIVATE_KEY"):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        os.environ["KALSHI_PRIVATE_KEY"] = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode("utf-8")
+    os.environ.setdefault("KALSHI_API_KEY", "mock")
+
+
+def _self_signed_context() -> ssl.SSLContext:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    tmp = tempfile.mkdtemp()
+    cert_path, key_path = os.path.join(tmp, "cert.pem"), os.path.join(tmp, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM,
+                                  serialization.PrivateFormat.TraditionalOpenSSL,
+                                  serialization.NoEncryption()))
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert_path, key_path)
+    return ctx
+
+
+class MockExchangeState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.books = {}       # ticker → {"yes": [[price, qty], ...], "no": [...]} (bids, ascending)
+        self.orders = {}      # order_id → order
+        self.positions = {}   # ticker → {"ticker", "position", "market_exposure"}
+        self.fills = []
+        self.meta = {}        # ticker → market metadata (for /markets listings)
+        self.events = {}      # event_ticker → {"event_ticker", "category"}
+        self.lose_responses = 0   # next N order POSTs are placed but answered with a 503
+        self.reject_batches = 0   # next N batched creates are refused whole with a 400
+
+    def set_book(self, ticker: str, yes=None, no=None):
+        with self.lock:
+            self.books[ticker] = {"yes": sorted(yes or []), "no": sorted(no or [])}
+
+    def add_market(self, ticker: str, title: str = None, close_time: float = None,
+                   status: str = "active", category: str = None):
+        """Add or update a listed market (bumps its updated time)."""
+        event_ticker = ticker.rsplit("-", 1)[0]
+        with self.lock:
+            meta = self.meta.setdefault(ticker, {"event_ticker": event_ticker})
+            meta.update({k: v for k, v in (("title", title), ("close_ts", close_time), ("status", status))
+                         if v is not None})
+            meta["updated_ts"] = time.time()
+            event = self.events.setdefault(event_ticker, {"event_ticker": event_ticker, "category": None})
+            if category:
+                event["category"] = category
+
+    def market(self, ticker: str) -> dict:
+        """Market summary with top of book, as /markets reports it (call with lock held)."""
+        book = self.books.get(ticker, {"yes": [], "no": []})
+        meta = self.meta.get(ticker, {})
+        yes_bid = max((p for p, _ in book["yes"]), default=0)
+        no_bid = max((p for p, _ in book["no"]), default=0)
+        close_ts = meta.get("close_ts")
+        return {"ticker": ticker, "status": meta.get("status", "active"),
+                "event_ticker": meta.get("event_ticker"), "title": meta.get("title", ticker),
+                "yes_sub_title": "Yes", "no_sub_title": "No",
+                "close_time": (datetime.datetime.fromtimestamp(close_ts, datetime.timezone.utc).isoformat()
+                               if close_ts else None),
+                "updated_time": (datetime.datetime.fromtimestamp(meta["updated_ts"], datetime.timezone.utc)
+                                 .isoformat() if "updated_ts" in meta else None),
+                "volume": 0, "liquidity": 0,
+                "yes_bid": yes_bid, "no_bid": no_bid,
+                "yes_ask": 100 - no_bid if no_bid else 100,
+                "no_ask": 100 - yes_bid if yes_bid else 100}
+
+    def fill(self, order_id: str, count: int = None) -> dict:
+        """Fill a resting order (fully by default) and update positions. Returns the fill."""
+        with self.lock:
+            order = self.orders[order_id]
+            count = min(count or order["remaining_count"], order["remaining_count"])
+            order["remaining_count"] -= count
+            if order["remaining_count"] == 0:
+                order["status"] = "executed"
+            yes_price = order["yes_price"] if order["side"] == "yes" else 100 - order["no_price"]
+            fill = {
+                "trade_id": str(uuid.uuid4()),
+                "order_id": order_id,
+                "ticker": order["ticker"],
+                "side": order["side"],
+                "action": order["action"],
+                "count": count,
+                "yes_price": yes_price,
+                "no_price": 100 - yes_price,
+                "is_taker": False,
+                "created_time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+            self.fills.append(fill)
+
+            price = yes_price if order["side"] == "yes" else 100 - yes_price
+            signed = count if order["side"] == "yes" else -count
+            if order["action"] == "sell":
+                signed, price = -signed, -price
+            pos = self.positions.setdefault(order["ticker"], {"ticker": order["ticker"], "position": 0,
+                                                              "market_exposure": 0})
+            pos["position"] += signed
+            pos["market_exposure"] = max(0, pos["market_exposure"] + price * count)
+            return fill
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without NODELAY, Nagle +
+        # delayed ACK would add ~40ms per keep-alive response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        opts = self.server.opts
+        time.sleep(opts["rtt_s"] * opts["handshake_rtts"])  # new connection
+
+    def _send(self, status: int, payload: dict, delay_s: float = 0.0):
+        body = json.dumps(payload).encode("utf-8")
+        time.sleep(self.server.opts["rtt_s"] + delay_s)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _page(self, keys: list, query: dict, name: str, render) -> dict:
+        """One cursor page of `keys` (cursor = offset), rendered with render(key)."""
+        start = int(query.get("cursor") or 0)
+        limit = min(int(query.get("limit", 100)), 1000)
+        page = keys[start:start + limit]
+        cursor = str(start + limit) if start + limit < len(keys) else ""
+        return {name: [render(k) for k in page], "cursor": cursor}
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        state = self.server.state
+        self.server.requests += 1
+
+        if url.path == "/trade-api/v2/exchange/status":
+            return self._send(200, {"exchange_active": True, "trading_active": True})
+
+        if url.path == "/trade-api/v2/markets":
+            tickers = [t for t in query.get("tickers", "").split(",") if t]
+            with state.lock:
+                if tickers:
+                    payload = {"markets": [state.market(t) for t in tickers
+                                           if t in state.books or t in state.meta], "cursor": ""}
+                else:
+                    listed = []
+                    for t in sorted(state.meta):
+                        meta = state.meta[t]
+                        close_ts = meta.get("close_ts") or 0
+                        if query.get("status") == "open" and meta.get("status", "active") != "active":
+                            continue
+                        if "min_close_ts" in query and close_ts < float(query["min_close_ts"]):
+                            continue
+                        if "max_close_ts" in query and close_ts > float(query["max_close_ts"]):
+                            continue
+                        if "min_updated_ts" in query and meta["updated_ts"] < float(query["min_updated_ts"]):
+                            continue
+                        listed.append(t)
+                    payload = self._page(listed, query, "markets", state.market)
+            # Listing pages cost server time per item; sleep outside the lock
+            return self._send(200, payload, delay_s=0 if tickers else
+                              self.server.opts["page_delay_s"] * len(payload["markets"]))
+
+        if url.path == "/trade-api/v2/events":
+            with state.lock:
+                payload = self._page(sorted(state.events), query, "events", state.events.get)
+            return self._send(200, payload, delay_s=self.server.opts["page_delay_s"] * len(payload["events"]))
+
+        match = _EVENT_RE.match(url.path)
+        if match:
+            with state.lock:
+                event = state.events.get(match.group(1))
+            if event is None:
+                return self._send(404, {"error": {"code": "not_found"}})
+            return self._send(200, {"event": event})
+
+        match = _ORDERBOOK_RE.match(url.path)
+        if match:
+            with state.lock:
+                book = state.books.get(match.group(1))
+            if book is None:
+                return self._send(404, {"error": {"code": "not_found"}})
+            return self._send(200, {"orderbook": book})
+
+        if url.path == "/trade-api/v2/portfolio/positions":
+            with state.lock:
+                positions = [dict(p) for p in state.positions.values()]
+            if query.get("count_filter") == "position":
+                positions = [p for p in positions if p["position"]]
+            return self._send(200, {"market_positions": positions, "cursor": ""})
+
+        if url.path == "/trade-api/v2/portfolio/orders":
+            with state.lock:
+                orders = [dict(o) for o in state.orders.values()
+                          if not query.get("ticker") or o["ticker"] == query["ticker"]]
+            return self._send(200, {"orders": orders[::-1], "cursor": ""})
+
+        if url.path == "/trade-api/v2/portfolio/fills":
+            min_ts = float(query.get("min_ts", 0))
+            with state.lock:
+                fills = [f for f in state.fills
+                         if datetime.datetime.fromisoformat(f["created_time"]).timestamp() >= min_ts]
+            return self._send(200, {"fills": fills[::-1], "cursor": ""})
+
+        self._send(404, {"error": {"code": "not_found", "path": url.path, "query": query}})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self._body()  # always drain the body, or the keep-alive stream desyncs
+        self.server.requests += 1
+
+        if url.path == "/trade-api/v2/portfolio/orders":
+            order = self._place(body)
+            if order is None:
+                return self._send(409, {"error": {"code": "order_already_exists"}})
+            if self._lose_response():
+                return self._send(503, {"error": {"code": "service_unavailable"}})
+            return self._send(201, {"order": order})
+
+        if url.path == "/trade-api/v2/portfolio/orders/batched":
+            state = self.server.state
+            with state.lock:
+                rejected, state.reject_batches = state.reject_batches > 0, max(0, state.reject_batches - 1)
+            if rejected:
+                return self._send(400, {"error": {"code": "invalid_parameters"}})
+            results = []
+            for payload in body.get("orders", []):
+                order = self._place(payload)
+                error = None if order is not None else {"code": "order_already_exists"}
+                results.append({"client_order_id": payload.get("client_order_id"), "order": order, "error": error})
+            if self._lose_response():
+                return self._send(503, {"error": {"code": "service_unavailable"}})
+            return self._send(201, {"orders": results})
+
+        self._send(404, {"error": {"code": "not_found", "path": url.path}})
+
+    def _lose_response(self) -> bool:
+        state = self.server.state
+        with state.lock:
+            if state.lose_responses > 0:
+                state.lose_responses -= 1
+                return True
+        return False
+
+    def _place(self, payload: dict) -> dict:
+        """The new order, or None if its client_order_id was already used (like the real exchange)."""
+        state = self.server.state
+        with state.lock:
+            for order in state.orders.values():
+                if payload.get("client_order_id") and order["client_order_id"] == payload["client_order_id"]:
+                    return None
+            order = {
+                "order_id": str(uuid.uuid4()),
+                "client_order_id": payload.get("client_order_id"),
+                "ticker": payload.get("ticker"),
+                "action": payload.get("action"),
+                "side": payload.get("side"),
+                "type": payload.get("type"),
+                "yes_price": payload.get("yes_price"),
+                "no_price": payload.get("no_price"),
+                "initial_count": payload.get("count"),
+                "remaining_count": payload.get("count"),
+                "status": "resting",
+                "created_time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+            state.orders[order["order_id"]] = order
+            return order
+
+
+def start_mock_exchange(port: int = 0, rtt_s: float = 0.0, handshake_rtts: int = 0,
+                        tls: bool = False, state: MockExchangeState = None, page_delay_s: float = 0.0):
+    """
+    Start the stand-in server in a daemon thread. Returns (server, base_url).
+    page_delay_s is server time per item in a listing page.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    server.state = state or MockExchangeState()
+    server.opts = {"rtt_s": rtt_s, "handshake_rtts": handshake_rtts, "page_delay_s": page_delay_s}
+    server.requests = 0
+    if tls:
+        server.socket = _self_signed_context().wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheme = "https" if tls else "http"
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,634 @@
+"""
+Live in-memory mirror of Kalshi orderbooks, fed by the WebSocket API.
+
+A background thread keeps one `orderbook_delta` subscription covering every
+watched market. Kalshi answers each (re)subscribe with an
+`orderbook_snapshot` per market, then streams `orderbook_delta` messages.
+Every message carries a per-subscription `seq`. If a seq number is skipped,
+the books are marked unsynced and the subscription is re-created, which
+brings fresh snapshots.
+
+Kalshi books hold only bids. The best YES ask is 100 - best NO bid (and
+the other way round). Each side is a 100-slot array of resting quantity
+per cent price. A cached best-bid index makes best bid/ask an O(1) lookup.
+
+Queries return None when a book is not synced (never snapshotted,
+resnapshotting after a gap, or the socket is down). Callers then fall
+back to REST, as market_utils.get_best_ask and
+sell_heartbeat.get_market_bid do.
+
+In sharded mode only the gateway process holds the WebSocket.
+publish_books() copies its top of book into a shared dict. Other
+processes install a SharedBooks reader as their orderbook service, and
+their watch() calls are forwarded to the gateway.
+
+Usage:
+    from Kalshi.orderbook import get_orderbook_service
+
+    books = get_orderbook_service()
+    books.start()
+    books.watch(["KXFEDCHAIRNOM-29-KW"])
+    books.best_ask("KXFEDCHAIRNOM-29-KW", "yes")   # → cents or None
+
+    python -m Kalshi.orderbook --bench
+    python -m Kalshi.orderbook --check
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+import websocket
+
+from .client import BASE_URL
+from .kalshi_auth import get_kalshi_auth_headers
+
+WS_PATH = "/trade-api/ws/v2"
+WS_URL = os.environ.get(
+    "KALSHI_WS_URL",
+    BASE_URL.replace("https://", "wss://").replace("http://", "ws://") + WS_PATH,
+)
+CHANNEL = "orderbook_delta"
+RECONNECT_MAX_S = 30.0
+WATCH_TTL_S = float(os.environ.get("ORDERBOOK_WATCH_TTL_S", "900"))  # unpinned markets
+SWEEP_INTERVAL_S = 60.0
+PUBLISH_SYNC_S = 1.0       # how often shared top of book drops markets that lost sync
+SIDES = ("yes", "no")
+_MISSING = object()
+
+
+class OrderBook:
+    """Resting bids for one market, per side, indexed by price in cents (1-99)."""
+
+    __slots__ = ("ticker", "levels", "best", "synced", "updated_at")
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.levels = {side: [0] * 100 for side in SIDES}
+        self.best = {side: 0 for side in SIDES}   # best bid price, 0 = empty
+        self.synced = False
+        self.updated_at = 0.0
+
+    def load(self, snapshot: dict):
+        for side in SIDES:
+            levels = [0] * 100
+            for price, qty in snapshot.get(side) or []:
+                if 0 < price < 100:
+                    levels[price] = qty
+            self.levels[side] = levels
+            self.best[side] = max((p for p in range(1, 100) if levels[p] > 0), default=0)
+        self.synced = True
+        self.updated_at = time.time()
+
+    def apply(self, side: str, price: int, delta: int):
+        levels = self.levels[side]
+        qty = max(0, levels[price] + delta)
+        levels[price] = qty
+        best = self.best[side]
+        if qty > 0 and price > best:
+            self.best[side] = price
+        elif qty == 0 and price == best:
+            while best > 0 and levels[best] == 0:
+                best -= 1
+            self.best[side] = best
+        self.updated_at = time.time()
+
+    def best_bid(self, side: str) -> int:
+        return self.best[side]
+
+    def best_ask(self, side: str):
+        """Cheapest price to buy `side`: 100 - best bid on the opposite side."""
+        other = self.best["no" if side == "yes" else "yes"]
+        return 100 - other if other else None
+
+    def depth(self, side: str, levels: int = 5) -> list:
+        """Top `levels` bids on `side` as [[price, qty], ...], best first."""
+        book = self.levels[side]
+        out = []
+        for price in range(self.best[side], 0, -1):
+            if book[price]:
+                out.append([price, book[price]])
+                if len(out) >= levels:
+                    break
+        return out
+
+
+class OrderbookService:
+    """Keeps OrderBooks for watched markets in sync over one WebSocket."""
+
+    def __init__(self, url: str = WS_URL):
+        self.url = url
+        self._lock = threading.RLock()
+        self._books = {}        # ticker → OrderBook
+        self._watched = {}      # ticker → last watch() time, or None if pinned
+        self._ws = None
+        self._connected = False
+        self._sid = None
+        self._seq = None
+        self._next_id = 1
+        self._pending = {}      # cmd id → "subscribe" | "update" | "unsubscribe"
+        self._sub_tickers = set()   # markets named in the last subscribe
+        self._listeners = []
+        self._channels = {}     # extra account-wide channel (e.g. "fill") → handler(msg)
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {"snapshots": 0, "deltas": 0, "gaps": 0, "reconnects": 0, "stale_reads": 0}
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self):
+        """Start the background connection thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="orderbook-ws", daemon=True)
+            self._thread.start()
+            threading.Thread(target=self._sweeper, name="orderbook-sweep", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                headers = get_kalshi_auth_headers("GET", WS_PATH)
+                self._ws = websocket.WebSocketApp(
+                    self.url,
+                    header=[f"{k}: {v}" for k, v in headers.items()],
+                    on_open=self._on_open,
+                    on_message=lambda ws, raw: self.handle_message(json.loads(raw)),
+                    on_error=lambda ws, e: print(f"[orderbook] WebSocket error: {e}"),
+                    on_close=self._on_close,
+                )
+                self._ws.run_forever(ping_interval=20, ping_timeout=10)
+            except Exception as e:
+                print(f"[orderbook] Connection failed: {e}")
+            self._on_close(None)
+            if self._stop.is_set():
+                break
+            if time.time() - started > 60:
+                backoff = 1.0
+            self._stats["reconnects"] += 1
+            time.sleep(backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX_S)
+
+    def _sweeper(self):
+        while not self._stop.wait(SWEEP_INTERVAL_S):
+            self._sweep()
+
+    def _on_open(self, ws):
+        print(f"[orderbook] Connected: {self.url}")
+        with self._lock:
+            self._connected = True
+            self._sid = None
+            self._seq = None
+            tickers = list(self._watched)
+            channels = list(self._channels)
+        if tickers:
+            self._subscribe(tickers)
+        for channel in channels:
+            self._send("subscribe", {"channels": [channel]}, "channel")
+
+    def _on_close(self, ws, *args):
+        with self._lock:
+            self._connected = False
+            self._sid = None
+            self._seq = None
+            self._pending.clear()
+            for book in self._books.values():
+                book.synced = False
+
+    # -- subscriptions -----------------------------------------------------
+
+    def _send(self, cmd: str, params: dict, kind: str):
+        with self._lock:
+            if not self._connected or self._ws is None:
+                return
+            cmd_id = self._next_id
+            self._next_id += 1
+            self._pending[cmd_id] = kind
+            ws = self._ws
+        try:
+            ws.send(json.dumps({"id": cmd_id, "cmd": cmd, "params": params}))
+        except websocket.WebSocketException as e:
+            print(f"[orderbook] Send failed ({cmd}): {e}")
+
+    def _subscribe(self, tickers: list):
+        with self._lock:
+            self._sub_tickers = set(tickers)
+        self._send("subscribe", {"channels": [CHANNEL], "market_tickers": tickers}, "subscribe")
+
+    def subscribe_channel(self, channel: str, handler):
+        """
+        Also subscribe to an account-wide channel (e.g. "fill") on this
+        connection. handler(msg) runs on the WebSocket thread for each
+        message of that type. Re-subscribed after every reconnect.
+        """
+        with self._lock:
+            self._channels[channel] = handler
+        self._send("subscribe", {"channels": [channel]}, "channel")
+
+    def watch(self, tickers, pin: bool = False):
+        """
+        Mirror these markets. Unpinned markets are dropped after WATCH_TTL_S
+        without another watch(); pinned ones stay until unwatch().
+        """
+        now = time.time()
+        added = []
+        with self._lock:
+            for ticker in tickers:
+                if not ticker:
+                    continue
+                if ticker not in self._watched:
+                    added.append(ticker)
+                    self._books.setdefault(ticker, OrderBook(ticker))
+                if pin or self._watched.get(ticker, 0) is None:
+                    self._watched[ticker] = None
+                else:
+                    self._watched[ticker] = now
+            sid = self._sid
+        if not added:
+            return
+        if sid is None:
+            self._resubscribe()
+        else:
+            self._send("update_subscription",
+                       {"sids": [sid], "market_tickers": added, "action": "add_markets"}, "update")
+
+    def unwatch(self, tickers):
+        with self._lock:
+            removed = [t for t in tickers if self._watched.pop(t, _MISSING) is not _MISSING]
+            for ticker in removed:
+                self._books.pop(ticker, None)
+            sid = self._sid
+        if removed and sid is not None:
+            self._send("update_subscription",
+                       {"sids": [sid], "market_tickers": removed, "action": "delete_markets"}, "update")
+
+    def _sweep(self):
+        cutoff = time.time() - WATCH_TTL_S
+        with self._lock:
+            expired = [t for t, seen in self._watched.items() if seen is not None and seen < cutoff]
+        if expired:
+            self.unwatch(expired)
+
+    def _resubscribe(self):
+        """Drop the current subscription and subscribe again → fresh snapshots."""
+        with self._lock:
+            sid, self._sid, self._seq = self._sid, None, None
+            for book in self._books.values():
+                book.synced = False
+            tickers = list(self._watched)
+            if "subscribe" in self._pending.values():
+                return   # a subscribe is already in flight
+        if sid is not None:
+            self._send("unsubscribe", {"sids": [sid]}, "unsubscribe")
+        if tickers:
+            self._subscribe(tickers)
+
+    # -- messages ----------------------------------------------------------
+
+    def handle_message(self, data: dict):
+        msg_type = data.get("type")
+        msg = data.get("msg") or {}
+
+        if msg_type == "subscribed":
+            with self._lock:
+                self._pending.pop(data.get("id"), None)
+                if msg.get("channel") != CHANNEL:
+                    return
+                self._sid = msg.get("sid", data.get("sid"))
+                self._seq = None
+                # Markets watched while the subscribe was in flight
+                missing = [t for t in self._watched if t not in self._sub_tickers]
+            if missing:
+                self._send("update_subscription",
+                           {"sids": [self._sid], "market_tickers": missing, "action": "add_markets"}, "update")
+            return
+        if msg_type in ("ok", "unsubscribed"):
+            with self._lock:
+                self._pending.pop(data.get("id"), None)
+            return
+        if msg_type == "error":
+            with self._lock:
+                self._pending.pop(data.get("id"), None)
+            print(f"[orderbook] Server error: {msg}")
+            return
+        handler = self._channels.get(msg_type)
+        if handler is not None:
+            try:
+                handler(msg)
+            except Exception as e:
+                print(f"[orderbook] {msg_type} handler error: {e}")
+            return
+        if msg_type not in ("orderbook_snapshot", "orderbook_delta"):
+            return
+
+        changed = None
+        with self._lock:
+            sid = data.get("sid")
+            if self._sid is None or sid != self._sid:
+                return   # stale message from a dropped subscription
+            seq = data.get("seq")
+            if seq is not None:
+                if self._seq is not None and seq != self._seq + 1:
+                    gap = True
+                else:
+                    gap = False
+                    self._seq = seq
+            else:
+                gap = False
+            if not gap:
+                book = self._books.get(msg.get("market_ticker"))
+                if book is not None:
+                    if msg_type == "orderbook_snapshot":
+                        book.load(msg)
+                        self._stats["snapshots"] += 1
+                        changed = book
+                    elif book.synced:
+                        book.apply(msg["side"], int(msg["price"]), int(msg["delta"]))
+                        self._stats["deltas"] += 1
+                        changed = book
+
+        if gap:
+            self._stats["gaps"] += 1
+            print(f"[orderbook] Sequence gap on sid {sid} (got {seq}); resnapshotting")
+            self._resubscribe()
+            return
+        if changed is not None:
+            for listener in list(self._listeners):
+                try:
+                    listener(changed)
+                except Exception as e:
+                    print(f"[orderbook] Listener error: {e}")
+
+    def add_listener(self, fn):
+        """fn(book) is called on the WebSocket thread after each snapshot/delta."""
+        self._listeners.append(fn)
+
+    # -- queries -----------------------------------------------------------
+
+    def book(self, ticker: str):
+        """The synced OrderBook for ticker, or None (caller should use REST)."""
+        book = self._books.get(ticker)
+        if book is None or not book.synced:
+            if ticker in self._watched:
+                self._stats["stale_reads"] += 1
+            return None
+        return book
+
+    def best_bid(self, ticker: str, side: str):
+        book = self.book(ticker)
+        return None if book is None else book.best_bid(side)
+
+    def best_ask(self, ticker: str, side: str):
+        """Cheapest price to buy `side`; None if not synced or no offers."""
+        book = self.book(ticker)
+        return None if book is None else book.best_ask(side)
+
+    def depth(self, ticker: str, side: str, levels: int = 5):
+        book = self.book(ticker)
+        return None if book is None else book.depth(side, levels)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "connected": self._connected,
+                "watched": len(self._watched),
+                "synced": sum(1 for b in self._books.values() if b.synced),
+            }
+
+
+class TopOfBook:
+    """Best bids of one market as published by the gateway; answers the same queries as OrderBook."""
+
+    __slots__ = ("ticker", "best")
+
+    def __init__(self, ticker: str, yes_bid: int, no_bid: int):
+        self.ticker = ticker
+        self.best = {"yes": yes_bid, "no": no_bid}
+
+    def best_bid(self, side: str) -> int:
+        return self.best[side]
+
+    def best_ask(self, side: str):
+        other = self.best["no" if side == "yes" else "yes"]
+        return 100 - other if other else None
+
+
+def publish_books(service: OrderbookService, shared, watch_q):
+    """
+    Gateway side of SharedBooks: keep `shared` (a multiprocessing Manager
+    dict, ticker → (yes_bid, no_bid)) in step with the synced books, and
+    watch the markets other processes ask for on watch_q.
+    """
+    published = {}
+
+    def on_book(book):
+        top = (book.best["yes"], book.best["no"])
+        if published.get(book.ticker) != top:
+            published[book.ticker] = top
+            shared[book.ticker] = top
+
+    def watch_loop():
+        while True:
+            service.watch(watch_q.get())
+
+    def sync_loop():
+        while True:
+            time.sleep(PUBLISH_SYNC_S)
+            for ticker in list(shared.keys()):
+                book = service._books.get(ticker)
+                if book is None or not book.synced:
+                    published.pop(ticker, None)
+                    shared.pop(ticker, None)
+
+    service.add_listener(on_book)
+    threading.Thread(target=watch_loop, name="orderbook-watch", daemon=True).start()
+    threading.Thread(target=sync_loop, name="orderbook-publish", daemon=True).start()
+
+
+class SharedBooks:
+    """
+    Orderbook service for worker processes without their own WebSocket.
+    Reads top of book published by the gateway (publish_books). Markets
+    not published there return None, so callers fall back to REST as usual.
+    """
+
+    def __init__(self, shared, watch_q):
+        self._shared = shared
+        self._watch_q = watch_q
+        self._stats = {"reads": 0, "misses": 0, "watch_requests": 0}
+
+    def start(self):
+        pass
+
+    def book(self, ticker: str):
+        self._stats["reads"] += 1
+        try:
+            top = self._shared.get(ticker)
+        except Exception:
+            top = None      # manager unavailable
+        if top is None:
+            self._stats["misses"] += 1
+            return None
+        return TopOfBook(ticker, *top)
+
+    def best_bid(self, ticker: str, side: str):
+        book = self.book(ticker)
+        return None if book is None else book.best_bid(side)
+
+    def best_ask(self, ticker: str, side: str):
+        book = self.book(ticker)
+        return None if book is None else book.best_ask(side)
+
+    def watch(self, tickers, pin: bool = False):
+        tickers = list(tickers)
+        if tickers:
+            try:
+                self._watch_q.put_nowait(tickers)
+                self._stats["watch_requests"] += 1
+            except queue.Full:
+                pass
+
+    def unwatch(self, tickers):
+        pass    # the gateway's WATCH_TTL_S expires them
+
+    def stats(self) -> dict:
+        return dict(self._stats)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_orderbook_service() -> OrderbookService:
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = OrderbookService()
+    return _service
+
+
+def _bench(n: int = 20000, rest_calls: int = 50):
+    """Best-ask latency: mirrored book vs a REST orderbook request (stand-in exchange)."""
+    import random
+
+    from .mock_exchange import ensure_test_credentials, start_mock_exchange
+
+    service = OrderbookService()
+    ticker = "KXBENCH-1"
+    yes = [[p, random.randint(1, 500)] for p in range(5, 45)]
+    no = [[p, random.randint(1, 500)] for p in range(5, 50)]
+    with service._lock:
+        service._watched[ticker] = None
+        service._books[ticker] = OrderBook(ticker)
+        service._sid = 1
+    service.handle_message({"type": "orderbook_snapshot", "sid": 1, "seq": 1,
+                            "msg": {"market_ticker": ticker, "yes": yes, "no": no}})
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        service.handle_message({"type": "orderbook_delta", "sid": 1, "seq": i + 2,
+                                "msg": {"market_ticker": ticker, "side": random.choice(SIDES),
+                                        "price": random.randint(1, 99),
+                                        "delta": random.randint(-50, 50)}})
+    apply_us = (time.perf_counter() - t0) / n * 1e6
+
+    t0 = time.perf_counter()
+    for _ in range(n):
+        service.best_ask(ticker, "yes")
+    query_us = (time.perf_counter() - t0) / n * 1e6
+
+    ensure_test_credentials()
+    server, base_url = start_mock_exchange(rtt_s=0.02)
+    server.state.set_book(ticker, yes=yes, no=no)
+    from .client import KalshiClient, QUOTE
+    client = KalshiClient(base_url)
+    client.get(f"/trade-api/v2/markets/{ticker}/orderbook", kind=QUOTE)  # open the connection
+    t0 = time.perf_counter()
+    for _ in range(rest_calls):
+        client.get(f"/trade-api/v2/markets/{ticker}/orderbook", kind=QUOTE).json()
+    rest_us = (time.perf_counter() - t0) / rest_calls * 1e6
+    server.shutdown()
+
+    print(f"delta apply       {apply_us:10.1f} µs")
+    print(f"mirror best_ask   {query_us:10.1f} µs")
+    print(f"REST orderbook    {rest_us:10.1f} µs  (20ms simulated RTT, warm connection)")
+
+
+def _check():
+    """
+    Regression check for delta maths and sequence-gap recovery (no network):
+        python -m Kalshi.orderbook --check
+    """
+    class FakeSocket:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, text):
+            self.sent.append(json.loads(text))
+
+    ws = FakeSocket()
+    service = OrderbookService()
+    ticker = "KXCHECK-1"
+    with service._lock:
+        service._ws, service._connected = ws, True
+        service._watched[ticker] = None
+        service._books[ticker] = OrderBook(ticker)
+    service._subscribe([ticker])
+    sub_id = ws.sent[-1]["id"]
+
+    def message(msg_type, sid, seq, **msg):
+        service.handle_message({"type": msg_type, "sid": sid, "seq": seq,
+                                "msg": {"market_ticker": ticker, **msg}})
+
+    service.handle_message({"id": sub_id, "type": "subscribed", "msg": {"channel": CHANNEL, "sid": 1}})
+    message("orderbook_snapshot", 1, 1, yes=[[40, 10], [42, 5]], no=[[55, 3]])
+    assert service.best_bid(ticker, "yes") == 42 and service.best_ask(ticker, "yes") == 45
+    message("orderbook_delta", 1, 2, side="yes", price=42, delta=-5)   # best level emptied
+    message("orderbook_delta", 1, 3, side="no", price=57, delta=4)     # new best NO bid
+    assert service.best_bid(ticker, "yes") == 40 and service.best_ask(ticker, "yes") == 43
+    assert service.best_ask(ticker, "no") == 60
+
+    # seq 5 skips 4: the book goes unsynced and the subscription is re-created
+    message("orderbook_delta", 1, 5, side="yes", price=41, delta=1)
+    assert service.best_ask(ticker, "yes") is None
+    assert [m["cmd"] for m in ws.sent[-2:]] == ["unsubscribe", "subscribe"], ws.sent
+    message("orderbook_delta", 1, 6, side="yes", price=41, delta=1)    # old sid: ignored
+    assert service.stats()["gaps"] == 1
+
+    service.handle_message({"id": ws.sent[-1]["id"], "type": "subscribed",
+                            "msg": {"channel": CHANNEL, "sid": 2}})
+    message("orderbook_snapshot", 2, 1, yes=[[41, 7]], no=[[50, 2]])
+    assert service.best_bid(ticker, "yes") == 41 and service.best_ask(ticker, "yes") == 50
+    assert service.book(ticker).levels["yes"][40] == 0, "pre-gap level survived the resnapshot"
+    print("orderbook check passed")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        _bench()
+        sys.exit()
+    if "--check" in sys.argv:
+        _check()
+        sys.exit()
+
+    books = get_orderbook_service()
+    books.start()
+    books.watch(sys.argv[1:] or ["KXFEDCHAIRNOM-29-KW"], pin=True)
+    while True:
+        time.sleep(5)
+        for ticker in list(books._watched):
+            print(f"[{ticker}] YES bid {books.best_bid(ticker, 'yes')} ask {books.best_ask(ticker, 'yes')} | {books.stats()}")
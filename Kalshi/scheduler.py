@@ -0,0 +1,203 @@
+"""
+Priority scheduler that every KalshiClient request passes through.
+
+Kalshi rate-limits reads and writes separately (per second, per account).
+A request must take one token from its pool's shared bucket (reads or
+writes) and one from its endpoint class's own bucket before it is sent.
+The class buckets cap how much of the read budget background work can
+use: portfolio and metadata scans can never starve quotes.
+
+Within a pool, waiters are served in strict priority order, then FIFO:
+
+    order  >  quote  >  portfolio = metadata
+
+A lower-priority request only goes ahead of a higher one when the higher
+one is held back by its own class bucket. Queue wait is recorded per
+class.
+
+Defaults match Kalshi's Basic tier (20 reads/s, 10 writes/s) and can be
+raised via KALSHI_READ_RPS / KALSHI_WRITE_RPS.
+
+    python -m Kalshi.scheduler --bench
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+ORDER, QUOTE, PORTFOLIO, METADATA = "order", "quote", "portfolio", "metadata"
+
+READ_RPS = float(os.environ.get("KALSHI_READ_RPS", "20"))
+WRITE_RPS = float(os.environ.get("KALSHI_WRITE_RPS", "10"))
+
+PRIORITY = {ORDER: 0, QUOTE: 1, PORTFOLIO: 2, METADATA: 2}
+CLASS_SHARE = {            # fraction of the pool's rate each class may use on its own
+    ORDER:     1.0,
+    QUOTE:     1.0,
+    PORTFOLIO: 0.25,
+    METADATA:  0.25,
+}
+MAX_WAIT_S = {             # give up (caller sees a timeout) after waiting this long
+    ORDER:     None,
+    QUOTE:     2.0,
+    PORTFOLIO: 10.0,
+    METADATA:  30.0,
+}
+WAIT_WINDOW = 500          # recent waits kept per class for percentiles
+
+
+def _pool(kind: str) -> str:
+    return "write" if kind == ORDER else "read"
+
+
+class _Bucket:
+    """Token bucket refilled at `rate` per second; not locked (the scheduler holds the lock)."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_s(self, now: float) -> float:
+        """Seconds until one token is available (0 if one is available now)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class KalshiScheduler:
+    def __init__(self, read_rps: float = READ_RPS, write_rps: float = WRITE_RPS,
+                 priority: dict = None):
+        self.priority = priority or PRIORITY
+        self._cond = threading.Condition()
+        self._pools = {"read": _Bucket(read_rps), "write": _Bucket(write_rps)}
+        self._classes = {
+            kind: _Bucket((write_rps if _pool(kind) == "write" else read_rps) * share)
+            for kind, share in CLASS_SHARE.items()
+        }
+        self._waiting = []              # heap of (priority, seq, kind)
+        self._seq = itertools.count()
+        self._waits = {}                # kind → deque of recent waits (s)
+        self._counts = {}               # kind → {"granted", "timeouts"}
+
+    def acquire(self, kind: str, timeout=-1) -> bool:
+        """
+        Block until `kind` may send one request. timeout=-1 uses the class's
+        MAX_WAIT_S (None = wait indefinitely). Returns False on timeout.
+        """
+        if timeout == -1:
+            timeout = MAX_WAIT_S.get(kind)
+        pool = _pool(kind)
+        entry = (self.priority.get(kind, max(self.priority.values())), next(self._seq), kind)
+        t0 = time.monotonic()
+        deadline = None if timeout is None else t0 + timeout
+
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    class_wait = self._classes[kind].wait_s(now) if kind in self._classes else 0.0
+                    pool_wait = self._pools[pool].wait_s(now)
+
+                    if class_wait <= 0 and pool_wait <= 0 and self._is_next(entry, pool, now):
+                        self._pools[pool].tokens -= 1
+                        if kind in self._classes:
+                            self._classes[kind].tokens -= 1
+                        self._record(kind, time.monotonic() - t0, granted=True)
+                        return True
+
+                    wait = max(class_wait, pool_wait) or 0.005
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._record(kind, time.monotonic() - t0, granted=False)
+                            return False
+                        wait = min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def _is_next(self, entry, pool: str, now: float) -> bool:
+        """True if no higher-priority (or earlier) waiter in this pool could go now."""
+        for other in sorted(self._waiting):
+            if other is entry:
+                return True
+            kind = other[2]
+            if _pool(kind) != pool:
+                continue
+            if kind in self._classes and self._classes[kind].wait_s(now) > 0:
+                continue   # held back by its own class cap; doesn't block us
+            return False
+        return True
+
+    def _record(self, kind: str, waited: float, granted: bool):
+        counts = self._counts.setdefault(kind, {"granted": 0, "timeouts": 0})
+        counts["granted" if granted else "timeouts"] += 1
+        self._waits.setdefault(kind, deque(maxlen=WAIT_WINDOW)).append(waited)
+
+    def stats(self) -> dict:
+        """Per class: requests granted, queue timeouts and recent queue wait (ms)."""
+        with self._cond:
+            out = {}
+            for kind, counts in self._counts.items():
+                waits = sorted(self._waits.get(kind, ()))
+                pct = lambda p: round(waits[min(len(waits) - 1, int(p / 100 * len(waits)))] * 1000, 1) if waits else 0.0
+                out[kind] = {**counts, "wait_ms_p50": pct(50), "wait_ms_p95": pct(95),
+                             "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0}
+            out["queued"] = len(self._waiting)
+            return out
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> KalshiScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = KalshiScheduler()
+    return _scheduler
+
+
+def _bench(seconds: float = 6.0):
+    """Quote wait under a portfolio/metadata read flood: strict priority vs one FIFO queue."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    fifo = {kind: 0 for kind in PRIORITY}
+    print(f"{READ_RPS:.0f} reads/s budget, 8 background readers flooding, 4 quotes/s\n")
+    for label, priority in (("FIFO", fifo), ("priority", PRIORITY)):
+        scheduler = KalshiScheduler(priority=priority)
+        if label == "FIFO":
+            scheduler._classes = {}          # one shared queue, no class caps
+        stop = time.monotonic() + seconds
+
+        def background(kind):
+            while time.monotonic() < stop:
+                scheduler.acquire(kind, timeout=None)
+
+        def quotes():
+            while time.monotonic() < stop:
+                scheduler.acquire(QUOTE, timeout=None)
+                time.sleep(0.25)
+
+        with ThreadPoolExecutor(max_workers=9) as pool:
+            for i in range(8):
+                pool.submit(background, PORTFOLIO if i % 2 else METADATA)
+            pool.submit(quotes)
+
+        q = scheduler.stats()[QUOTE]
+        print(f"{label:9s} quote wait p50 {q['wait_ms_p50']:6.1f}ms  p95 {q['wait_ms_p95']:6.1f}ms  "
+              f"max {q['wait_ms_max']:6.1f}ms  ({q['granted']} quotes)")
+
+
+if __name__ == "__main__":
+    _bench()
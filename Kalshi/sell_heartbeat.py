@@ -1,125 +1,233 @@
 import os
 import time
-import requests
 import json
 from datetime import datetime
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import runtime_config
 # Ensure these imports match your file structure
 # Note the dot (.) before kalshi_order_executor
-from .kalshi_order_executor import execute_order, get_kalshi_auth_headers, BASE_URL
+from .kalshi_order_executor import execute_order
+from .ledger import get_ledger
+from .market_utils import get_quote_service
+from .orderbook import get_orderbook_service
 
 # Configuration (overridable via env vars)
-HEARTBEAT_INTERVAL = 10  # Seconds
-PROFIT_TARGET_CENTS = int(os.environ.get("PROFIT_TARGET_CENTS", "7"))  # sell when bid >= avg + N cents
-
-def get_portfolio_data():
-    """Fetches the full portfolio JSON."""
-    endpoint = "/trade-api/v2/portfolio/positions"
-    headers = get_kalshi_auth_headers("GET", endpoint)
-    url = f"{BASE_URL}{endpoint}"
-    
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"Error fetching portfolio: {e}")
-        return {}
+HEARTBEAT_INTERVAL = 10  # Seconds between REST checks of held markets the mirror can't answer
+SELL_RETRY_S = 30        # don't re-send a sell for the same market within this window
+# Sell when bid >= avg + profit_target_cents: a live setting, see runtime_config.py
 
 def get_market_bid(ticker):
     """
-    Fetches the current Order Book for a ticker to find the best bid.
+    Best (yes_bid, no_bid) for a ticker, from the shared QuoteService
+    (orderbook mirror → short-TTL cache → coalesced REST).
     """
-    endpoint = f"/trade-api/v2/markets/{ticker}/orderbook"
-    headers = get_kalshi_auth_headers("GET", endpoint)
-    url = f"{BASE_URL}{endpoint}"
-    
-    try:
-        response = requests.get(url, headers=headers)
-        # Handle 404 or other errors gracefully
-        if response.status_code != 200:
-            return 0, 0
-            
-        book = response.json().get("orderbook", {})
-        
-        # Helper to find max bid [price, quantity]
-        def get_best_bid(bid_list):
-            if not bid_list: return 0
-            return max(bid_list, key=lambda x: x[0])[0]
-
-        yes_bid = get_best_bid(book.get("yes", []))
-        no_bid = get_best_bid(book.get("no", []))
-        
-        return yes_bid, no_bid
-    except Exception:
+    quote = get_quote_service().quote(ticker)
+    if quote is None:
         return 0, 0
+    return quote["yes_bid"], quote["no_bid"]
 
-def run_heartbeat():
-    print(f"--- Starting Heartbeat (Interval: {HEARTBEAT_INTERVAL}s) ---")
-    print(f"Target: Sell if Bid >= Avg Price + {PROFIT_TARGET_CENTS} cents\n")
+class ExitEngine:
+    """
+    Sells held positions as soon as the bid crosses avg price + profit_target_cents.
 
-    while True:
+    Positions and VWAP cost basis come from the ledger, which pushes every
+    change here. Held markets are pinned in the orderbook mirror, and the
+    exit rule runs on every book update for them. Markets are watched when
+    a position opens and dropped when it closes. The periodic scan only
+    REST-checks held markets whose book is not in sync.
+    """
+
+    def __init__(self, books=None, ledger=None, place_order=execute_order):
+        self.books = books or get_orderbook_service()
+        self.ledger = ledger or get_ledger()
+        self.place_order = place_order
+        self._lock = threading.Lock()
+        self._holdings = {}       # (ticker, side) → holding
+        self._selling = {}        # (ticker, side) → time the sell was sent
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="exit")
+        self._latency_ms = deque(maxlen=200)   # bid update → sell acknowledged
+        self._counts = {"ticks": 0, "triggers": 0, "sells": 0, "failures": 0, "rest_checks": 0}
+        self.books.add_listener(self.on_book)
+        self.ledger.add_listener(self.refresh)
+
+    def refresh(self):
+        """Ledger listener: pick up opened, closed and resized positions."""
+        self.set_positions(self.ledger.holdings())
+
+    def set_positions(self, holdings: list):
+        """holdings: [{"ticker", "side", "count", "avg_price", "resting_sell"}, ...]"""
+        held = {(h["ticker"], h["side"]): h for h in holdings}
+
+        with self._lock:
+            previous, self._holdings = self._holdings, held
+            # A changed or closed position means the sell went through (or
+            # partly did); allow the rule to fire again on what is left
+            for key in list(self._selling):
+                if key not in held or held[key]["count"] != previous.get(key, {}).get("count"):
+                    del self._selling[key]
+
+        opened_tickers = {t for t, _ in held} - {t for t, _ in previous}
+        closed_tickers = {t for t, _ in previous} - {t for t, _ in held}
+        if opened_tickers:
+            self.books.watch(opened_tickers, pin=True)
+        for key in held.keys() - previous.keys():
+            h = held[key]
+            print(f"  > Watching {h['ticker']}: Held {h['count']} {h['side']} @ ~{h['avg_price']:.1f}¢")
+            if h["avg_price"] == 0:
+                print(f"    [!] Warning: Could not determine avg price for {h['ticker']}. Skipping auto-sell.")
+        if closed_tickers:
+            self.books.unwatch(closed_tickers)
+            print(f"  > Closed: {', '.join(sorted(closed_tickers))}")
+
+        # Positions that opened after their book last ticked
+        for ticker in opened_tickers:
+            book = self.books.book(ticker)
+            if book is not None:
+                self.on_book(book)
+
+    def on_book(self, book):
+        """Orderbook listener (WebSocket thread): evaluate the exit rule for held markets."""
+        for side in ("yes", "no"):
+            h = self._holdings.get((book.ticker, side))
+            if h is not None:
+                self._counts["ticks"] += 1
+                self._check(h, book.best_bid(side), time.perf_counter())
+
+    def _check(self, h, current_bid, t_tick):
+        avg_price = h["avg_price"]
+        target = runtime_config.get("profit_target_cents")
+        if avg_price <= 0 or current_bid < avg_price + target:
+            return
+        count = h["count"] - h.get("resting_sell", 0)   # contracts not already offered
+        if count <= 0:
+            return
+        key = (h["ticker"], h["side"])
+        with self._lock:
+            sent = self._selling.get(key)
+            if sent is not None and time.time() - sent < SELL_RETRY_S:
+                return
+            self._selling[key] = time.time()
+        self._counts["triggers"] += 1
+        print(f"    $$$ TRIGGER: Selling {count} {h['side']} of {h['ticker']} "
+              f"(Bid {current_bid} >= {avg_price:.1f} + {target})")
+        self._pool.submit(self._sell, h, count, current_bid, t_tick)
+
+    def _sell(self, h, count, price, t_tick):
         try:
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Scanning Portfolio...")
-            data = get_portfolio_data()
-            
-            # 1. Extract Active Market Positions
-            market_positions = data.get("market_positions", [])
-            active_holdings = [p for p in market_positions if p.get("position", 0) > 0]
-
-            if not active_holdings:
-                print("  No active positions found.")
-
-            for p in active_holdings:
-                ticker = p.get("ticker")
-                count = p.get("position")
-                
-                # --- Average Price Logic ---
-                # Your JSON snippet lacks a direct 'avg_price' in market_positions.
-                # We try 'cost_basis' (standard) or fallback to 'total_traded/total_shares' if valid.
-                # If completely missing, we default to 0 to prevent accidental sells.
-                avg_price = 0
-                
-                if "fees_paid" in p:
-                    avg_price = p["fees_paid"]
-                
-                # --- Side Logic ---
-                # Your JSON implies side might be encoded in ticker or defaults to 'yes'
-                side = p.get("side", "yes")
-
-                # 2. Get Current Market Bid
-                yes_bid, no_bid = get_market_bid(ticker)
-                current_bid = yes_bid if side == 'yes' else no_bid
-                
-                print(f"  > {ticker}: Held {count} @ ~{avg_price:.1f}¢ | Current Bid: {current_bid}¢")
-
-                # 3. Check Sell Condition
-                # Only sell if we have a valid average price > 0
-                if avg_price > 0 and current_bid >= (avg_price + PROFIT_TARGET_CENTS):
-                    print(f"    $$$ TRIGGER: Selling {count} {side} of {ticker} (Bid {current_bid} >= {avg_price:.1f} + {PROFIT_TARGET_CENTS})")
-                    
-                    execute_order(
-                        ticker=ticker,
-                        action="sell",
-                        side=side,
-                        count=count,
-                        type="limit",
-                        price=current_bid 
-                    )
-                elif avg_price == 0:
-                    print(f"    [!] Warning: Could not determine avg price for {ticker}. Skipping auto-sell.")
+            self.place_order(
+                ticker=h["ticker"],
+                action="sell",
+                side=h["side"],
+                count=count,
+                type="limit",
+                price=price
+            )
+            self._counts["sells"] += 1
+            self._latency_ms.append((time.perf_counter() - t_tick) * 1000)
+        except Exception as e:
+            self._counts["failures"] += 1
+            with self._lock:
+                self._selling.pop((h["ticker"], h["side"]), None)
+            print(f"    [!] Sell failed for {h['ticker']}: {e}")
+
+    def check_unmirrored(self):
+        """REST fallback (one bulk quote request) for held markets whose mirrored book is not in sync."""
+        holdings = [h for h in list(self._holdings.values()) if self.books.book(h["ticker"]) is None]
+        if not holdings:
+            return
+        self._counts["rest_checks"] += len(holdings)
+        quotes = get_quote_service().quotes([h["ticker"] for h in holdings])
+        for h in holdings:
+            quote = quotes.get(h["ticker"])
+            if quote is not None:
+                self._check(h, quote[f"{h['side']}_bid"], time.perf_counter())
+
+    def scan(self):
+        self.refresh()
+        self.check_unmirrored()
 
+    def stats(self) -> dict:
+        latency = sorted(self._latency_ms)
+        return {
+            **self._counts,
+            "held": len(self._holdings),
+            "tick_to_sell_ms_p50": latency[len(latency) // 2] if latency else None,
+            "tick_to_sell_ms_max": latency[-1] if latency else None,
+        }
+
+
+def run_heartbeat(engine: ExitEngine = None):
+    print(f"--- Starting Exit Engine (exits on every bid update, REST fallback every {HEARTBEAT_INTERVAL}s) ---")
+    print(f"Target: Sell if Bid >= Avg Price + {runtime_config.get('profit_target_cents')} cents\n")
+
+    engine = engine or ExitEngine()
+    engine.books.start()
+    engine.ledger.start(engine.books)
+
+    while True:
+        try:
+            engine.scan()
+            if not engine.stats()["held"]:
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] No active positions found.")
         except Exception as e:
             print(f"Heartbeat Error: {e}")
 
         time.sleep(HEARTBEAT_INTERVAL)
 
 def start_background_heartbeat():
-    """Starts the heartbeat loop in a non-blocking daemon thread."""
+    """Starts the exit engine's fallback loop (and the mirror + ledger) in a daemon thread."""
     thread = threading.Thread(target=run_heartbeat, daemon=True)
     thread.start()
     return thread
 
+
+def _bench(trials: int = 50):
+    """Bid-crosses-target → sell acknowledged, against the stand-in exchange."""
+    from .mock_exchange import ensure_test_credentials, start_mock_exchange
+    import tempfile
+
+    from .ledger import Ledger
+    from .orderbook import OrderbookService
+    from . import client as client_module
+
+    ensure_test_credentials()
+    server, base_url = start_mock_exchange(rtt_s=0.02)
+    client_module._client = client_module.KalshiClient(base_url)
+    client_module._client.warm(1)
+
+    books = OrderbookService()
+    engine = ExitEngine(books=books, ledger=Ledger(path=os.path.join(tempfile.mkdtemp(), "ledger.json")))
+    books._sid = 1
+    seq = 0
+    for i in range(trials):
+        ticker = f"KXBENCH-{i}"
+        engine.set_positions([{"ticker": ticker, "side": "yes", "count": 1, "avg_price": 40}])
+        seq += 1
+        books.handle_message({"type": "orderbook_snapshot", "sid": 1, "seq": seq,
+                              "msg": {"market_ticker": ticker, "yes": [[40, 10]], "no": [[58, 10]]}})
+        seq += 1
+        books.handle_message({"type": "orderbook_delta", "sid": 1, "seq": seq,
+                              "msg": {"market_ticker": ticker, "side": "yes",
+                                      "price": 40 + runtime_config.get("profit_target_cents"),
+                                      "delta": 5}})
+        while engine._counts["sells"] + engine._counts["failures"] <= i:
+            time.sleep(0.001)
+        engine.set_positions([])
+
+    latency = sorted(engine._latency_ms)
+    print(f"{trials} exits, 20ms simulated RTT")
+    print(f"event-driven  p50 {latency[len(latency) // 2]:.1f}ms  max {latency[-1]:.1f}ms")
+    print(f"10s polling   mean ~{HEARTBEAT_INTERVAL / 2 * 1000:.0f}ms  max ~{HEARTBEAT_INTERVAL * 1000:.0f}ms "
+          f"(+ one orderbook request per held market per scan)")
+    server.shutdown()
+
+
 if __name__ == "__main__":
-    run_heartbeat()
+    import sys
 
+    if "--bench" in sys.argv:
+        _bench()
+        sys.exit()
+    run_heartbeat()
@@ -1,6 +1,9 @@
-import requests
+import sys
+import os
 import json
-from kalshi_order_executor import get_kalshi_auth_headers, BASE_URL
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from Kalshi.client import get_client, BASE_URL, PORTFOLIO
 
 def inspect_portfolio():
     """
@@ -10,14 +13,11 @@ def inspect_portfolio():
     endpoint = '/trade-api/v2/portfolio/positions'
     full_url = f"{BASE_URL}{endpoint}"
 
-    # 2. Get Headers
-    headers = get_kalshi_auth_headers("GET", endpoint)
-
-    # 3. Request & Print
+    # 2. Request (signed by the shared client) & Print
     try:
         print(f"Fetching data from: {full_url} ...\n")
-        
-        response = requests.get(full_url, headers=headers)
+
+        response = get_client().get(endpoint, kind=PORTFOLIO)
         
         # Check if the request was successful
         if response.status_code != 200:
@@ -26,7 +26,7 @@ def inspect_portfolio():
 
         data = response.json()
         
-        # 4. Pretty Print the JSON
+        # 3. Pretty Print the JSON
         print(json.dumps(data, indent=2))
 
     except Exception as e:
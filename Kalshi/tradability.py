@@ -0,0 +1,154 @@
+"""
+Tradability mask over the market index, applied inside match_batch.
+
+One bit per market in the embedding matrix (same order as market_ids in
+market_metadata.json) says whether a headline may be matched to it:
+
+  - the market is open and does not close within MASK_NEAR_CLOSE_S
+  - at least one side has an ask at or below max_buy_price (we do not know
+    yet which side the signal will pick)
+
+Status and close time come from the local catalog. Asks come from the
+orderbook mirror when the book is in sync. Otherwise they come from the
+catalog's top of book, which a background thread re-reads for every
+indexed market every MASK_REFRESH_S, in bulk /markets requests.
+Markets the catalog does not know are left tradable (fail open).
+
+The bits are packed little-endian into bytes (one byte per 8 markets) and
+sent to Modal with a short hash of market_ids. The matcher ignores a
+mask built for a different index.
+
+Usage:
+    from Kalshi.tradability import get_tradability_mask
+
+    mask = get_tradability_mask()
+    mask.start()
+    match_tickers(headlines)   # passes mask.packed() along
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import runtime_config
+from LLM.market_routing import METADATA_PATH
+from .catalog import get_catalog, OPEN_STATUSES
+from .orderbook import get_orderbook_service
+
+NEAR_CLOSE_S = float(os.environ.get("MASK_NEAR_CLOSE_S", "3600"))
+REFRESH_S = float(os.environ.get("MASK_REFRESH_S", "60"))
+
+
+def index_version(market_ids: list) -> str:
+    """Short hash identifying one ordering of the market index."""
+    return hashlib.sha256("\n".join(market_ids).encode("utf-8")).hexdigest()[:12]
+
+
+def pack_bits(bits: list) -> bytes:
+    out = bytearray((len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        if bit:
+            out[i >> 3] |= 1 << (i & 7)
+    return bytes(out)
+
+
+class TradabilityMask:
+    def __init__(self, path: str = METADATA_PATH, catalog=None, books=None):
+        self.catalog = catalog or get_catalog()
+        self.books = books or get_orderbook_service()
+        self.tickers = []
+        self.version = None
+        self._packed = None
+        self._tradable = 0
+        self._built_at = 0.0
+        self._thread = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.tickers = [meta["market_data"][m_id].get("ticker", m_id) for m_id in meta["market_ids"]]
+            self.version = index_version(meta["market_ids"])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[mask] Could not load market index ({e}); matching all markets")
+
+    def _tradable_market(self, market, now: float, max_price: int) -> bool:
+        if market is None:
+            return True
+        if market["status"] not in OPEN_STATUSES:
+            return False
+        if market["close_time"] is not None and market["close_time"] - now < NEAR_CLOSE_S:
+            return False
+
+        book = self.books.book(market["ticker"])
+        if book is not None:
+            asks = (book.best_ask("yes"), book.best_ask("no"))
+        else:
+            # /markets reports an ask of 100 (or nothing) when a side has no offers
+            asks = tuple(a if a and a < 100 else None for a in (market["yes_ask"], market["no_ask"]))
+        return any(a is not None and a <= max_price for a in asks)
+
+    def check(self, tickers) -> dict:
+        """ticker → tradable right now, from the catalog and the orderbook mirror (no network)."""
+        now = time.time()
+        markets = self.catalog.get_many(tickers)
+        max_price = runtime_config.get("max_buy_price")
+        return {t: self._tradable_market(markets.get(t), now, max_price) for t in tickers}
+
+    def rebuild(self):
+        """Recompute the bits from the catalog and the orderbook mirror (no network)."""
+        tradable = self.check(self.tickers)
+        bits = [tradable[t] for t in self.tickers]
+        now = time.time()
+        self._packed = pack_bits(bits)
+        self._tradable = sum(bits)
+        self._built_at = now
+
+    def refresh(self):
+        """Pull fresh top of book for every indexed market, then rebuild."""
+        self.catalog.refresh_quotes(self.tickers)
+        self.rebuild()
+
+    def start(self, interval_s: float = REFRESH_S, fetch: bool = True):
+        """
+        Refresh in the background. fetch=False only rebuilds from the shared
+        catalog file, for processes where another process does the fetching.
+        """
+        def loop():
+            while True:
+                try:
+                    if fetch:
+                        self.refresh()
+                        print(f"[mask] {self._tradable}/{len(self.tickers)} markets tradable")
+                    else:
+                        self.rebuild()
+                except Exception as e:
+                    print(f"[mask] Refresh error: {e}")
+                time.sleep(interval_s)
+
+        if self.tickers and self._thread is None:
+            self._thread = threading.Thread(target=loop, name="tradability-mask", daemon=True)
+            self._thread.start()
+
+    def packed(self):
+        """(version, packed bits) for match_batch, or None before the first build."""
+        if self._packed is None:
+            return None
+        return self.version, self._packed
+
+    def stats(self) -> dict:
+        return {"markets": len(self.tickers), "tradable": self._tradable,
+                "age_s": round(time.time() - self._built_at, 1) if self._built_at else None}
+
+
+_mask = None
+_mask_lock = threading.Lock()
+
+
+def get_tradability_mask() -> TradabilityMask:
+    global _mask
+    if _mask is None:
+        with _mask_lock:
+            if _mask is None:
+                _mask = TradabilityMask()
+    return _mask
@@ -0,0 +1,72 @@
+"""
+Benchmark for multi-pair LLM batching against the local mock server.
+
+For each batch size N, resolves N fresh (headline, market question) pairs
+once in single-pair mode (N sequential requests) and once as one batched
+request, and reports latency and tokens per pair.
+
+Usage:
+    python -m LLM.bench_batching
+    python -m LLM.bench_batching --sizes 1 5 10 25 --bad-item-rate 0.05
+"""
+
+import argparse
+import os
+import time
+
+# Benchmark traffic must not be throttled or answered from the real caches
+os.environ.setdefault("GROQ_API_KEY", "mock")
+os.environ["GROQ_RPM"] = "1000000"
+os.environ["GROQ_TPM"] = "100000000"
+os.environ["LLM_CACHE_PATH"] = ":memory:"
+
+from LLM.mock_server import start_mock_server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 25])
+    parser.add_argument("--bad-item-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(bad_item_rate=args.bad_item_rate)
+    os.environ["GROQ_BASE_URL"] = base_url
+
+    from LLM import llm_signal
+
+    def run(fn, pairs):
+        before = llm_signal.llm_stats()
+        t0 = time.perf_counter()
+        results = fn(pairs)
+        elapsed = time.perf_counter() - t0
+        after = llm_signal.llm_stats()
+        tokens = (after["prompt_tokens"] + after["completion_tokens"]
+                  - before["prompt_tokens"] - before["completion_tokens"])
+        errors = sum(r["source"] == "llm_error" for r in results)
+        return elapsed, tokens, after["requests"] - before["requests"], errors
+
+    llm_signal.get_llm_signal("Warm-up headline", "Warm-up question?")  # client + connection setup
+
+    print(f"{'N':>3s} | {'single ms/pair':>14s} {'tok/pair':>8s} {'reqs':>4s} | "
+          f"{'batched ms/pair':>15s} {'tok/pair':>8s} {'reqs':>4s} | {'latency':>7s} {'tokens':>7s}")
+    run_id = 0
+    for n in args.sizes:
+        run_id += 1
+        single_pairs = [(f"Run {run_id} single headline {i} about the election", f"Will candidate {i} win?")
+                        for i in range(n)]
+        batch_pairs = [(f"Run {run_id} batched headline {i} about the election", f"Will candidate {i} win?")
+                       for i in range(n)]
+
+        s_elapsed, s_tokens, s_reqs, _ = run(llm_signal._get_llm_signals_single, single_pairs)
+        b_elapsed, b_tokens, b_reqs, b_errors = run(llm_signal.get_llm_signals_batched, batch_pairs)
+
+        print(f"{n:3d} | {s_elapsed / n * 1000:14.1f} {s_tokens / n:8.1f} {s_reqs:4d} | "
+              f"{b_elapsed / n * 1000:15.1f} {b_tokens / n:8.1f} {b_reqs:4d} | "
+              f"{1 - b_elapsed / s_elapsed:7.0%} {1 - b_tokens / s_tokens:7.0%}"
+              + (f"  ({b_errors} errors)" if b_errors else ""))
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
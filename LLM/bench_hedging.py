@@ -0,0 +1,82 @@
+"""
+Tail-latency report for hedged LLM calls against the local mock server.
+
+A fraction of primary-model requests is made slow (--slow-rate, --slow-delay).
+The same workload then runs with hedging disabled and enabled, and the
+latency percentiles, hedge rate and winning path are reported for each.
+
+Usage:
+    python -m LLM.bench_hedging
+    python -m LLM.bench_hedging --calls 500 --slow-rate 0.02 --slow-delay 2.5
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Benchmark traffic must not be throttled or answered from the real caches
+os.environ.setdefault("GROQ_API_KEY", "mock")
+os.environ["GROQ_RPM"] = "1000000"
+os.environ["GROQ_TPM"] = "100000000"
+os.environ["GROQ_HEDGE_TPM"] = "100000000"
+os.environ["LLM_CACHE_PATH"] = ":memory:"
+
+from LLM.mock_server import start_mock_server
+
+
+def _pct(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--slow-rate", type=float, default=0.04)
+    parser.add_argument("--slow-delay", type=float, default=3.0)
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(slow_rate=args.slow_rate, slow_delay_s=args.slow_delay)
+    os.environ["GROQ_BASE_URL"] = base_url
+
+    from LLM import llm_signal
+    from LLM.hedging import HedgeStats, LatencyTracker
+
+    hedge_model = llm_signal.HEDGE_MODEL
+    llm_signal.get_llm_signal("Warm-up headline", "Warm-up question?")
+
+    print(f"{args.calls} calls, concurrency {args.concurrency}, "
+          f"{args.slow_rate:.0%} of primary requests +{args.slow_delay:.1f}s, "
+          f"budget {llm_signal.LATENCY_BUDGET_S:.1f}s\n")
+    print(f"{'mode':10s} {'p50':>7s} {'p90':>7s} {'p95':>7s} {'p99':>7s} {'max':>7s} "
+          f"{'hedged':>7s} {'threshold':>9s}  sources")
+
+    for mode, model in (("no hedge", ""), ("hedged", hedge_model)):
+        llm_signal.HEDGE_MODEL = model
+        llm_signal._latency = LatencyTracker()
+        llm_signal._hedge_stats = HedgeStats()
+
+        def call(i):
+            t0 = time.perf_counter()
+            result = llm_signal.get_llm_signal(f"{mode} headline {i} on the runoff", f"Will candidate {i} win?")
+            return time.perf_counter() - t0, result["source"]
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(call, range(args.calls)))
+
+        latencies = [r[0] for r in results]
+        sources = {}
+        for _, source in results:
+            sources[source] = sources.get(source, 0) + 1
+        stats = llm_signal.llm_stats()
+        print(f"{mode:10s} " + " ".join(f"{_pct(latencies, p) * 1000:5.0f}ms" for p in (50, 90, 95, 99))
+              + f" {max(latencies) * 1000:5.0f}ms {stats['hedging']['hedged']:7d} "
+              f"{stats['hedge_threshold_s'] * 1000:7.0f}ms  {sources}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Deadline-bounded, hedged calls for the LLM signal path.
+
+A headline's edge decays while we wait on Groq, so every call carries a
+latency budget. If the primary request has not answered by the adaptive
+p95 of recent primary latencies, a hedge request is started (normally a
+smaller, faster model). Whichever valid answer arrives first wins. The
+loser is cancelled if it has not started yet; otherwise it is abandoned,
+and its own request timeout (the remaining budget) frees the thread.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class LatencyTracker:
+    """Rolling window of successful primary latencies with a p95 estimate."""
+
+    def __init__(self, window: int = 200, default_s: float = 1.5, min_samples: int = 20,
+                 floor_s: float = 0.2):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.default_s = default_s
+        self.min_samples = min_samples
+        self.floor_s = floor_s
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self) -> float:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.default_s
+            ordered = sorted(self._samples)
+        return max(self.floor_s, ordered[int(0.95 * (len(ordered) - 1))])
+
+
+class HedgeStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.wins = {}
+        self.timeouts = 0
+
+    def count(self, field: str, label: str = None):
+        with self._lock:
+            if field == "win":
+                self.wins[label] = self.wins.get(label, 0) + 1
+            else:
+                setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "hedged": self.hedged,
+                    "timeouts": self.timeouts, "wins": dict(self.wins)}
+
+
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+def hedged_call(primary, hedge, tracker: LatencyTracker, budget_s: float, stats: HedgeStats = None):
+    """
+    Run primary(deadline), hedging with hedge(deadline) after tracker.p95().
+
+    primary / hedge are callables taking the absolute time.monotonic()
+    deadline and returning a *validated* result (raise on invalid output).
+    hedge may be None to disable hedging. Returns (result, "primary" | "hedge").
+    Raises TimeoutError when neither answers within budget_s, or the last
+    error when both fail.
+    """
+    t0 = time.monotonic()
+    deadline = t0 + budget_s
+    if stats:
+        stats.count("calls")
+
+    def timed_primary():
+        result = primary(deadline)
+        tracker.record(time.monotonic() - t0)  # recorded even if the hedge won
+        return result
+
+    futures = {_pool.submit(timed_primary): "primary"}
+    hedge_at = t0 + tracker.p95()
+    hedge_started = hedge is None
+    last_error = None
+
+    try:
+        while futures:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            timeout = deadline - now
+            if not hedge_started:
+                timeout = min(timeout, max(0.0, hedge_at - now))
+
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                label = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if stats:
+                    stats.count("win", label)
+                return result, label
+
+            # Hedge once the p95 threshold passes, or right away if the primary failed
+            if not hedge_started and (time.monotonic() >= hedge_at or not futures):
+                hedge_started = True
+                if stats:
+                    stats.count("hedged")
+                futures[_pool.submit(hedge, deadline)] = "hedge"
+    finally:
+        for future in futures:
+            future.cancel()
+
+    if last_error is not None and not futures:
+        raise last_error
+    if stats:
+        stats.count("timeouts")
+    raise TimeoutError(f"no valid LLM answer within {budget_s:.1f}s budget")
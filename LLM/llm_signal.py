@@ -9,6 +9,9 @@ Routing logic:
   - Financial/macro markets (Fed, rates, earnings, etc.) → return FinBERT signal directly
   - Political, sports, and all other topics               → call LLM for direction
 
+Routes are precomputed per ticker when the market index is built (see
+LLM/market_routing.py); the keyword check only runs for unknown markets.
+
 Usage:
     from LLM.llm_signal import resolve_signal
 
@@ -16,25 +19,41 @@ Usage:
         headline="Trump indicted on 4 counts",
         market_question="Will Trump win the 2024 Republican primary?",
         finbert_signal=-1,
+        ticker="KXGOPPRIMARY-24-DJT",   # optional; enables the O(1) route lookup
     )
     # → {"signal": 1, "reasoning": "...", "source": "llm"}
 
+    # Many rows at once — concurrent, rate-limited, results in input order.
+    # With LLM_BATCH_SIZE > 1, up to that many pairs share one Groq request.
+    results = resolve_signals([
+        {"headline": ..., "market_question": ..., "finbert_signal": ...},
+        ...
+    ])
+
 Requires: GROQ_API_KEY environment variable
 """
 
 import os
 import json
 import re
-
-_FINANCIAL_KEYWORDS = {
-    "fed", "federal reserve", "interest rate", "rates", "rate hike", "rate cut",
-    "gdp", "inflation", "cpi", "pce", "employment", "unemployment", "jobs",
-    "nonfarm", "payroll", "earnings", "revenue", "profit", "eps", "guidance",
-    "stock", "equities", "s&p", "nasdaq", "dow", "yield", "bond", "treasury",
-    "oil", "crude", "energy", "gas", "dollar", "usd", "eur", "forex", "currency",
-    "housing", "mortgage", "retail sales", "consumer", "pmi", "manufacturing",
-    "ipo", "merger", "acquisition", "dividend", "buyback", "quarterly",
-}
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from LLM.rate_limit import GroqRateLimiter, estimate_tokens
+from LLM.verdict_cache import VerdictCache
+from LLM.market_routing import FINBERT, get_route, is_financial_text
+from LLM.hedging import HedgeStats, LatencyTracker, hedged_call
+
+MODEL = "llama-3.3-70b-versatile"
+HEDGE_MODEL = os.environ.get("LLM_HEDGE_MODEL", "llama-3.1-8b-instant")  # "" disables hedging
+LATENCY_BUDGET_S = float(os.environ.get("LLM_LATENCY_BUDGET_S", "4.0"))
+MAX_TOKENS = 150
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+BATCH_SIZE = int(os.environ.get("LLM_BATCH_SIZE", "10"))  # pairs per request; 1 = single-pair mode
+BATCH_TOKENS_PER_PAIR = 60
 
 _SYSTEM_PROMPT = """\
 You are a prediction market analyst. Your job is to determine whether a news headline \
@@ -50,7 +69,36 @@ Respond ONLY with valid JSON in this exact format (no other text):
 {"signal": <1, -1, or 0>, "reasoning": "<one sentence explanation>"}
 """
 
+_BATCH_SYSTEM_PROMPT = """\
+You are a prediction market analyst. For each numbered pair below, determine whether the \
+news headline makes its market question more likely to resolve YES (+1), less likely (-1), \
+or has no clear impact (0). Judge every pair independently.
+
+Important: do NOT just score the sentiment of the headline. Think about how the news \
+actually affects the probability of the market resolving YES. Counterintuitive effects \
+matter — for example, a negative headline about a controversial political figure can \
+*increase* their chances in a primary because it rallies their base.
+
+Respond ONLY with a valid JSON array containing exactly one object per pair, in order \
+(no other text):
+[{"id": <pair number>, "signal": <1, -1, or 0>, "reasoning": "<one sentence explanation>"}, ...]
+"""
+
+# Bumps automatically whenever either prompt's text changes, invalidating cached
+# verdicts (single-pair and batched answers share the cache)
+PROMPT_VERSION = hashlib.sha256((_SYSTEM_PROMPT + _BATCH_SYSTEM_PROMPT).encode("utf-8")).hexdigest()[:12]
+
 _client = None
+_cache = None
+_limiters = {
+    MODEL: GroqRateLimiter(),
+    HEDGE_MODEL: GroqRateLimiter(tpm=int(os.environ.get("GROQ_HEDGE_TPM", "6000"))),
+}
+_latency = LatencyTracker()
+_hedge_stats = HedgeStats()
+_executor = None
+_usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+_usage_lock = threading.Lock()
 
 
 def _get_client():
@@ -64,13 +112,99 @@ def _get_client():
     return _client
 
 
-def is_financial_market(market_question: str) -> bool:
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = VerdictCache(model=MODEL, prompt_version=PROMPT_VERSION)
+    return _cache
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="llm")
+    return _executor
+
+
+def _chat(system_prompt: str, user_prompt: str, max_tokens: int, model: str = MODEL,
+          deadline: float = None) -> str:
+    """One rate-limited chat completion at temperature 0. Returns the raw text."""
+    client = _get_client()
+    limiter = _limiters.get(model) or _limiters.setdefault(model, GroqRateLimiter())
+    estimate = estimate_tokens(system_prompt, user_prompt, max_tokens=max_tokens)
+    timeout = None if deadline is None else max(0.01, deadline - time.monotonic())
+    if not limiter.acquire(estimate, timeout=timeout):
+        raise TimeoutError(f"Groq rate limit wait for {model} exceeded the latency budget")
+
+    extra = {} if deadline is None else {"timeout": max(0.01, deadline - time.monotonic())}
+    with metrics.external("groq", model):
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=0,
+            max_tokens=max_tokens,
+            **extra,
+        )
+    usage = getattr(response, "usage", None)
+    limiter.reconcile(estimate, getattr(usage, "total_tokens", 0))
+    with _usage_lock:
+        _usage["requests"] += 1
+        _usage["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        _usage["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+    return response.choices[0].message.content.strip()
+
+
+def _ask(system_prompt: str, user_prompt: str, max_tokens: int, parse):
     """
-    Fast keyword-based check to determine if a market is financial/macro in nature.
-    No API call — runs in microseconds.
+    Deadline-bounded chat call, hedged to HEDGE_MODEL after the adaptive p95.
+    parse(raw) must return a valid result or raise. Returns (result, source)
+    where source is "llm" (primary answered) or "llm_hedge".
     """
-    q_lower = market_question.lower()
-    return any(kw in q_lower for kw in _FINANCIAL_KEYWORDS)
+    def attempt(model):
+        return lambda deadline: parse(_chat(system_prompt, user_prompt, max_tokens, model, deadline))
+
+    result, label = hedged_call(
+        attempt(MODEL),
+        attempt(HEDGE_MODEL) if HEDGE_MODEL else None,
+        _latency,
+        LATENCY_BUDGET_S,
+        _hedge_stats,
+    )
+    return result, ("llm" if label == "primary" else "llm_hedge")
+
+
+def is_financial_market(market_question: str, ticker: str = None) -> bool:
+    """
+    Determine if a market is financial/macro in nature.
+
+    Known tickers are a dict lookup in the precomputed routing table. Unknown
+    markets fall back to the word-boundary keyword scan of the question.
+    """
+    route = get_route(ticker) if ticker else None
+    if route is not None:
+        return route == FINBERT
+    return is_financial_text(market_question)
+
+
+def _parse_single(raw: str) -> dict:
+    """Parse a single-pair response into {'signal', 'reasoning'}."""
+    # Parse JSON — try direct parse first, then regex fallback
+    try:
+        parsed = json.loads(raw)
+    except json.JSONDecodeError:
+        match = re.search(r'\{[^}]+\}', raw)
+        if match:
+            parsed = json.loads(match.group())
+        else:
+            raise ValueError(f"No JSON found in response: {raw!r}")
+
+    signal = int(parsed.get("signal", 0))
+    if signal not in (-1, 0, 1):
+        signal = 0
+    return {"signal": signal, "reasoning": parsed.get("reasoning", "")}
 
 
 def get_llm_signal(headline: str, market_question: str) -> dict:
@@ -82,8 +216,20 @@ def get_llm_signal(headline: str, market_question: str) -> dict:
         {"signal": int, "reasoning": str, "source": "llm"}
         signal: +1 (YES more likely), -1 (NO more likely), 0 (unclear)
 
-    Falls back to signal=0 if the API call fails or response cannot be parsed.
+    The call is bounded by LLM_LATENCY_BUDGET_S and hedged to LLM_HEDGE_MODEL
+    when the primary is slower than its recent p95 (source "llm_hedge").
+    Answers from the verdict cache when the pair was seen before (source
+    "llm_cache" / "llm_semantic_cache"). Falls back to signal=0 if the API
+    call fails or response cannot be parsed.
     """
+    cached = _get_cache().get(headline, market_question)
+    if cached is not None:
+        return cached
+    return _get_llm_signal_uncached(headline, market_question)
+
+
+def _get_llm_signal_uncached(headline: str, market_question: str) -> dict:
+    """get_llm_signal without the cache lookup (for callers that already missed); caches the answer."""
     user_prompt = (
         f'Headline: "{headline}"\n'
         f'Market question: "{market_question}"\n\n'
@@ -91,43 +237,105 @@ def get_llm_signal(headline: str, market_question: str) -> dict:
     )
 
     try:
-        client = _get_client()
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": _SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0,
-            max_tokens=150,
-        )
-        raw = response.choices[0].message.content.strip()
+        parsed, source = _ask(_SYSTEM_PROMPT, user_prompt, MAX_TOKENS, _parse_single)
+        result = {**parsed, "source": source}
+        if source == "llm":
+            _get_cache().put(headline, market_question, result)
+        return result
+
+    except Exception as e:
+        return {"signal": 0, "reasoning": f"LLM error: {e}", "source": "llm_error"}
 
-        # Parse JSON — try direct parse first, then regex fallback
+
+def _parse_batch(raw: str, n: int) -> list:
+    """
+    Parse a batched response into a list of n verdicts, with None for every
+    item that is missing or invalid.
+    """
+    try:
+        parsed = json.loads(raw)
+    except json.JSONDecodeError:
+        match = re.search(r'\[.*\]', raw, re.DOTALL)
+        parsed = json.loads(match.group()) if match else []
+    if isinstance(parsed, dict):
+        parsed = next((v for v in parsed.values() if isinstance(v, list)), [parsed])
+
+    verdicts = [None] * n
+    for pos, item in enumerate(parsed if isinstance(parsed, list) else []):
+        if not isinstance(item, dict):
+            continue
         try:
-            parsed = json.loads(raw)
-        except json.JSONDecodeError:
-            match = re.search(r'\{[^}]+\}', raw)
-            if match:
-                parsed = json.loads(match.group())
-            else:
-                raise ValueError(f"No JSON found in response: {raw!r}")
-
-        signal = int(parsed.get("signal", 0))
-        if signal not in (-1, 0, 1):
-            signal = 0
+            idx = int(item.get("id", pos + 1)) - 1
+            signal = int(item["signal"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not 0 <= idx < n or signal not in (-1, 0, 1) or not isinstance(item.get("reasoning"), str):
+            continue
+        verdicts[idx] = {"signal": signal, "reasoning": item["reasoning"], "source": "llm"}
+    return verdicts
+
+
+def _ask_batch(pairs: list[tuple]) -> list:
+    """One batched request for pairs [(headline, market_question), ...]."""
+    lines = []
+    for i, (headline, market_question) in enumerate(pairs, start=1):
+        lines.append(f'{i}. Headline: "{headline}"\n   Market question: "{market_question}"')
+    user_prompt = (
+        "\n".join(lines)
+        + f"\n\nReturn a JSON array of {len(pairs)} objects, one per pair."
+    )
+    def parse(raw):
+        verdicts = _parse_batch(raw, len(pairs))
+        if not any(verdicts):
+            raise ValueError(f"No valid items in batched response: {raw[:200]!r}")
+        return verdicts
 
-        return {
-            "signal": signal,
-            "reasoning": parsed.get("reasoning", ""),
-            "source": "llm",
-        }
+    try:
+        verdicts, source = _ask(_BATCH_SYSTEM_PROMPT, user_prompt,
+                                20 + BATCH_TOKENS_PER_PAIR * len(pairs), parse)
+        return [v and {**v, "source": source} for v in verdicts]
+    except Exception:
+        return [None] * len(pairs)
 
-    except Exception as e:
-        return {"signal": 0, "reasoning": f"LLM error: {e}", "source": "llm_error"}
+
+def get_llm_signals_batched(pairs: list[tuple]) -> list[dict]:
+    """
+    Resolve [(headline, market_question), ...] with numbered pairs sharing
+    one prompt, so the system prompt and request overhead are paid once per
+    request instead of once per pair.
+
+    Cached pairs are answered locally. Items that come back missing or
+    invalid are re-asked once as a smaller batch; a single remaining pair
+    goes straight to single-pair mode. Anything still failing
+    falls back to a single-pair request (with get_llm_signal's llm_error
+    semantics), without a second cache lookup.
+    Results are in input order.
+    """
+    cache = _get_cache()
+    results = [cache.get(h, q) for h, q in pairs]
+    todo = [i for i, r in enumerate(results) if r is None]
+
+    for attempt in range(2):
+        if len(todo) < 2:
+            break  # a lone pair is cheaper in single-pair mode
+        verdicts = _ask_batch([pairs[i] for i in todo])
+        for i, verdict in zip(todo, verdicts):
+            if verdict is not None:
+                results[i] = verdict
+                if verdict["source"] == "llm":
+                    cache.put(*pairs[i], verdict)
+        todo = [i for i in todo if results[i] is None]
+
+    for i in todo:
+        results[i] = _get_llm_signal_uncached(*pairs[i])
+    return results
+
+
+def _get_llm_signals_single(pairs: list[tuple]) -> list[dict]:
+    return [get_llm_signal(headline, market_question) for headline, market_question in pairs]
 
 
-def resolve_signal(headline: str, market_question: str, finbert_signal: int) -> dict:
+def resolve_signal(headline: str, market_question: str, finbert_signal: int, ticker: str = None) -> dict:
     """
     Main entry point. Routes to the appropriate signal source based on market type.
 
@@ -138,10 +346,11 @@ def resolve_signal(headline: str, market_question: str, finbert_signal: int) ->
         {
             "signal":    int,   # +1 / 0 / -1
             "reasoning": str,
-            "source":    str,   # "finbert" or "llm" or "llm_error"
+            "source":    str,   # "finbert", "llm", "llm_hedge", "llm_cache",
+                                #  "llm_semantic_cache" or "llm_error"
         }
     """
-    if is_financial_market(market_question):
+    if is_financial_market(market_question, ticker):
         label = {1: "positive", -1: "negative", 0: "neutral"}.get(finbert_signal, "neutral")
         return {
             "signal": finbert_signal,
@@ -152,12 +361,62 @@ def resolve_signal(headline: str, market_question: str, finbert_signal: int) ->
     return get_llm_signal(headline, market_question)
 
 
+def resolve_signals(batch: list[dict]) -> list[dict]:
+    """
+    Resolve many rows at once. Each item has the resolve_signal keyword
+    arguments (headline, market_question, finbert_signal, optional ticker).
+
+    Financial markets are answered inline; the rest are grouped into batched
+    prompts of LLM_BATCH_SIZE pairs (or sent one by one when it is 1). Requests
+    run concurrently (up to LLM_MAX_CONCURRENCY) behind the Groq rate-limit
+    buckets. Results come back in input order, with the same llm_error
+    fallback as get_llm_signal.
+    """
+    results = [None] * len(batch)
+    pending = {}
+
+    llm_rows = []
+    for i, item in enumerate(batch):
+        if is_financial_market(item["market_question"], item.get("ticker")):
+            results[i] = resolve_signal(**item)
+        else:
+            llm_rows.append(i)
+
+    size = max(1, BATCH_SIZE)
+    resolve_chunk = get_llm_signals_batched if size > 1 else _get_llm_signals_single
+    for start in range(0, len(llm_rows), size):
+        chunk = tuple(llm_rows[start:start + size])
+        pairs = [(batch[i]["headline"], batch[i]["market_question"]) for i in chunk]
+        pending[chunk] = _get_executor().submit(resolve_chunk, pairs)
+
+    for chunk, future in pending.items():
+        try:
+            chunk_results = future.result()
+        except Exception as e:
+            chunk_results = [{"signal": 0, "reasoning": f"LLM error: {e}", "source": "llm_error"}] * len(chunk)
+        for i, result in zip(chunk, chunk_results):
+            results[i] = result
+
+    return results
+
+
+def llm_stats() -> dict:
+    """Token usage, cache counters, rate-limit waits and hedging counters."""
+    with _usage_lock:
+        usage = dict(_usage)
+    return {
+        **usage,
+        "rate_limit_wait_s": round(sum(l.waited_s for l in _limiters.values()), 3),
+        "hedge_threshold_s": round(_latency.p95(), 3),
+        "hedging": _hedge_stats.snapshot(),
+        "cache": _get_cache().stats(),
+    }
+
+
 # ---------------------------------------------------------------------------
 # Quick test / demo
 # ---------------------------------------------------------------------------
 if __name__ == "__main__":
-    import time
-
     test_cases = [
         # Political — LLM should handle
         (
@@ -0,0 +1,179 @@
+"""
+Per-market signal routing, worked out once per market instead of once per call.
+
+resolve_signal needs to know whether a market is financial/macro (use the
+FinBERT signal directly) or anything else (ask the LLM). That answer only
+depends on the market, so it is computed when the market index is built
+and stored in market_metadata.json as a compact routing column: a string
+aligned with market_ids, "F" = finbert, "L" = llm.
+
+Each market is classified from, in order:
+  1. Kalshi category metadata (Economics / Financials / Companies → finbert)
+  2. known macro series prefixes (KXFED, KXCPI, ...)
+  3. a word-boundary Aho-Corasick scan of the title + outcomes for the
+     financial keywords. Word boundaries keep "gas" out of "Las Vegas" and
+     "dow" out of "shadow"; a trailing plural "s" is allowed.
+
+Usage:
+    from LLM.market_routing import get_route
+
+    get_route("KXFED-26MAR-T4.25")   # → "finbert", "llm", or None if unknown
+"""
+
+import json
+import os
+from collections import deque
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METADATA_PATH = os.environ.get(
+    "MARKET_METADATA_PATH", os.path.join(ROOT, "News", "model", "market_metadata.json")
+)
+
+FINBERT, LLM = "finbert", "llm"
+_CODES = {FINBERT: "F", LLM: "L"}
+_ROUTES = {"F": FINBERT, "L": LLM}
+
+FINANCIAL_KEYWORDS = {
+    "fed", "federal reserve", "interest rate", "rate hike", "rate cut",
+    "gdp", "inflation", "cpi", "pce", "employment", "unemployment", "jobs",
+    "nonfarm", "payroll", "earnings", "revenue", "profit", "eps", "guidance",
+    "stock", "equities", "s&p", "nasdaq", "dow", "yield", "bond", "treasury",
+    "oil", "crude", "energy", "gas", "dollar", "usd", "eur", "forex", "currency",
+    "housing", "mortgage", "retail sales", "consumer", "pmi", "manufacturing",
+    "ipo", "merger", "acquisition", "dividend", "buyback", "quarterly",
+}
+
+FINANCIAL_CATEGORIES = {"economics", "financials", "companies"}
+
+FINANCIAL_SERIES_PREFIXES = (
+    "KXFED", "KXCPI", "KXGDP", "KXPAYROLLS", "KXU3", "KXINX", "KXNASDAQ100",
+    "KXWTI", "KXAAAGAS", "KXTNOTE", "KXPCE", "KXJOBLESS", "KXMORTGAGE",
+)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lowercase keywords with word-boundary checks."""
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # keyword lengths ending at each state
+
+        for kw in keywords:
+            state = 0
+            for ch in kw.lower():
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(len(kw))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    @staticmethod
+    def _boundary(text: str, start: int, end: int) -> bool:
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        if end < len(text) and text[end] == "s":
+            end += 1  # allow a plural: "rate hikes", "stocks"
+        return end >= len(text) or not text[end].isalnum()
+
+    def matches(self, text: str) -> bool:
+        """True if any keyword occurs in text as a whole word."""
+        text = text.lower()
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length in self._out[state]:
+                if self._boundary(text, i + 1 - length, i + 1):
+                    return True
+        return False
+
+
+_automaton = KeywordAutomaton(FINANCIAL_KEYWORDS)
+
+
+def is_financial_text(text: str) -> bool:
+    return _automaton.matches(text)
+
+
+def classify_market(ticker: str, title: str, category: str = None, outcomes=None) -> str:
+    """Route for one market: "finbert" or "llm"."""
+    if category:
+        return FINBERT if category.strip().lower() in FINANCIAL_CATEGORIES else LLM
+    if ticker and ticker.upper().startswith(FINANCIAL_SERIES_PREFIXES):
+        return FINBERT
+    text = " ".join([title or "", *(outcomes or [])])
+    return FINBERT if is_financial_text(text) else LLM
+
+
+def build_routing_column(market_ids: list[str], market_data: dict) -> str:
+    """Compact routing column aligned with market_ids ("F"/"L" per market)."""
+    codes = []
+    for m_id in market_ids:
+        m = market_data[m_id]
+        route = classify_market(m.get("ticker", m_id), m.get("title", ""),
+                                m.get("category"), m.get("outcomes"))
+        codes.append(_CODES[route])
+    return "".join(codes)
+
+
+# --- Ticker → route table ------------------------------------------------------
+
+_table = None
+
+
+def load_routing_table(path: str = METADATA_PATH) -> dict:
+    """
+    Build the ticker → route dict from the market index. Uses the stored
+    routing column when present, otherwise classifies every market once here.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[routing] Could not load market index ({e}); using keyword fallback")
+        return {}
+
+    market_ids = meta["market_ids"]
+    market_data = meta["market_data"]
+    column = meta.get("routing")
+    if not column or len(column) != len(market_ids):
+        column = build_routing_column(market_ids, market_data)
+
+    return {
+        market_data[m_id].get("ticker", m_id): _ROUTES[code]
+        for m_id, code in zip(market_ids, column)
+    }
+
+
+def get_route(ticker: str):
+    """O(1) route lookup by ticker. Returns None for markets not in the index."""
+    global _table
+    if _table is None:
+        _table = load_routing_table()
+    return _table.get(ticker)
+
+
+if __name__ == "__main__":
+    table = load_routing_table()
+    n_fin = sum(route == FINBERT for route in table.values())
+    print(f"{len(table)} markets: {n_fin} finbert, {len(table) - n_fin} llm")
+    for text in ["Will gas prices top $4?", "Who will win the Las Vegas Grand Prix?",
+                 "Will the Fed announce rate hikes?", "Will Shadow win best picture?"]:
+        print(f"  {is_financial_text(text)!s:5s}  {text}")
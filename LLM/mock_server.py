@@ -0,0 +1,127 @@
+"""
+Local stand-in for Groq's OpenAI-compatible chat completions endpoint.
+
+Used by the LLM benchmarks so batching and hedging can be measured without
+an API key or rate limits. Latency is modelled as a fixed per-request
+overhead (queueing + time to first token), a prefill cost per prompt token
+and a decode cost per completion token, scaled per model.
+
+Both prompt shapes from llm_signal.py are understood: a single
+'Headline: / Market question:' pair returns one JSON object, and numbered
+pairs return a JSON array. Verdicts are derived from a hash of the headline,
+so they are stable across runs.
+
+Usage:
+    from LLM.mock_server import start_mock_server
+
+    server, base_url = start_mock_server(slow_rate=0.05, slow_delay_s=3.0)
+    os.environ["GROQ_BASE_URL"] = base_url
+    ...
+    server.shutdown()
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OVERHEAD_S = 0.20            # request overhead + time to first token
+PREFILL_S_PER_TOKEN = 0.0001
+DECODE_S_PER_TOKEN = 0.004
+MODEL_SPEED = {"llama-3.3-70b-versatile": 1.0, "llama-3.1-8b-instant": 0.3}
+
+_PAIR_RE = re.compile(r'(\d+)\. Headline: "(.*)"\n\s+Market question: "(.*)"')
+_SINGLE_RE = re.compile(r'Headline: "(.*)"\nMarket question: "(.*)"')
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _verdict(headline: str) -> dict:
+    signal = int(hashlib.md5(headline.encode("utf-8")).hexdigest(), 16) % 3 - 1
+    return {"signal": signal, "reasoning": f"Mock verdict for: {headline[:40]}"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        opts = self.server.opts
+        model = body.get("model", "")
+        system = body["messages"][0]["content"]
+        user = body["messages"][-1]["content"]
+
+        pairs = _PAIR_RE.findall(user)
+        if pairs:
+            items = []
+            for idx, headline, _ in pairs:
+                item = {"id": int(idx), **_verdict(headline)}
+                if random.random() < opts["bad_item_rate"]:
+                    item["signal"] = 7
+                items.append(item)
+            content = json.dumps(items)
+        else:
+            match = _SINGLE_RE.search(user)
+            content = json.dumps(_verdict(match.group(1) if match else user))
+
+        prompt_tokens = _tokens(system) + _tokens(user)
+        completion_tokens = _tokens(content)
+        delay = (OVERHEAD_S + PREFILL_S_PER_TOKEN * prompt_tokens
+                 + DECODE_S_PER_TOKEN * completion_tokens) * MODEL_SPEED.get(model, 1.0)
+        if random.random() < opts["slow_rate"] and model in opts["slow_models"]:
+            delay += opts["slow_delay_s"]
+        time.sleep(delay)
+
+        payload = json.dumps({
+            "id": "mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }).encode("utf-8")
+
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (e.g. a cancelled hedge)
+
+
+def start_mock_server(port: int = 0, slow_rate: float = 0.0, slow_delay_s: float = 0.0,
+                      slow_models=("llama-3.3-70b-versatile",), bad_item_rate: float = 0.0):
+    """
+    Start the mock server in a daemon thread. Returns (server, base_url).
+
+    Args:
+        slow_rate:     fraction of requests that get slow_delay_s added (tail injection).
+        slow_models:   models the tail injection applies to.
+        bad_item_rate: fraction of batched items returned with an invalid signal.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    server.opts = {
+        "slow_rate": slow_rate,
+        "slow_delay_s": slow_delay_s,
+        "slow_models": set(slow_models),
+        "bad_item_rate": bad_item_rate,
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,94 @@
+"""
+Client-side token buckets that keep Groq calls under the account's
+per-minute limits, so batches never fall into 429 backoff.
+
+Groq enforces both requests-per-minute and tokens-per-minute. A request must
+take one permit from the request bucket and its estimated token count from
+the token bucket before it is sent; once the response reports actual usage,
+the difference is refunded (or charged) to the token bucket.
+
+Defaults match the llama-3.3-70b-versatile free tier and can be raised for
+paid tiers via GROQ_RPM / GROQ_TPM.
+"""
+
+import os
+import threading
+import time
+
+GROQ_RPM = int(os.environ.get("GROQ_RPM", "30"))
+GROQ_TPM = int(os.environ.get("GROQ_TPM", "12000"))
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `per_minute` / 60 per second."""
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0, timeout: float = None) -> bool:
+        """Block until `amount` tokens are available. Returns False on timeout."""
+        amount = min(amount, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return True
+                wait = (amount - self.tokens) / self.rate
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    def adjust(self, delta: float):
+        """Refund (delta > 0) or charge (delta < 0) tokens after the fact."""
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + delta)
+            self._cond.notify_all()
+
+
+class GroqRateLimiter:
+    """Request + token buckets for one Groq account."""
+
+    def __init__(self, rpm: int = GROQ_RPM, tpm: int = GROQ_TPM):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.waited_s = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, estimated_tokens: int, timeout: float = None) -> bool:
+        """Take one request permit and the estimated tokens. Returns False on timeout."""
+        t0 = time.monotonic()
+        try:
+            if not self.requests.acquire(1, timeout=timeout):
+                return False
+            remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - t0))
+            if not self.tokens.acquire(estimated_tokens, timeout=remaining):
+                self.requests.adjust(1)
+                return False
+            return True
+        finally:
+            with self._lock:
+                self.waited_s += time.monotonic() - t0
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int):
+        if actual_tokens:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
+
+
+def estimate_tokens(*texts: str, max_tokens: int = 0) -> int:
+    """Rough prompt size (~4 chars per token) plus the completion budget."""
+    return sum(len(t) for t in texts) // 4 + max_tokens
@@ -0,0 +1,201 @@
+"""
+Durable cache of LLM verdicts for (headline, market question) pairs.
+
+get_llm_signal runs at temperature=0, so the same headline against the same
+market question under the same model and prompt always gets the same
+answer. Restarts, syndicated duplicates and popular markets would otherwise
+pay a Groq round trip every time.
+
+Entries live in SQLite, keyed by sha256(model, prompt version, normalized
+market question, normalized headline). They expire after LLM_CACHE_TTL_S
+and the table is capped at LLM_CACHE_MAX_ENTRIES (least recently used
+rows are evicted first).
+
+Optional semantic tier (LLM_SEMANTIC_CACHE=1): when there is no exact hit,
+the headline is embedded with all-MiniLM-L6-v2 and compared against cached
+headlines for the same market. A verdict is reused when cosine similarity
+is at least LLM_SEMANTIC_THRESHOLD. Requires sentence-transformers locally.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+CACHE_PATH = os.environ.get("LLM_CACHE_PATH", "llm_cache.sqlite")
+TTL_S = int(os.environ.get("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "50000"))
+SEMANTIC = os.environ.get("LLM_SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_THRESHOLD = float(os.environ.get("LLM_SEMANTIC_THRESHOLD", "0.97"))
+EMBED_MODEL = "all-MiniLM-L6-v2"
+
+_WS_RE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _WS_RE.sub(" ", text or "").strip().casefold()
+
+
+def _sha(*parts: str) -> str:
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+class VerdictCache:
+    """SQLite-backed verdict cache with TTL, LRU size cap and optional semantic reuse."""
+
+    def __init__(self, model: str, prompt_version: str, path: str = CACHE_PATH,
+                 ttl_s: int = TTL_S, max_entries: int = MAX_ENTRIES,
+                 semantic: bool = SEMANTIC, threshold: float = SEMANTIC_THRESHOLD):
+        self.model = model
+        self.prompt_version = prompt_version
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.semantic = semantic
+        self.threshold = threshold
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_verdicts ("
+            " key TEXT PRIMARY KEY, market_key TEXT NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL,"
+            " verdict TEXT NOT NULL, embedding BLOB)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_verdicts_market ON llm_verdicts (market_key)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_verdicts_used ON llm_verdicts (last_used)")
+        self._db.commit()
+
+        self._embedder = None
+        self._embedder_lock = threading.Lock()   # one model load, without holding up DB access
+        self._embeddings = OrderedDict()  # headline key → vector, reused by put()
+        self._puts = 0
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    # --- Keys / embeddings ----------------------------------------------------
+
+    def _market_key(self, market_question: str) -> str:
+        return _sha(self.model, self.prompt_version, _normalize(market_question))
+
+    def _key(self, headline: str, market_question: str) -> str:
+        return _sha(self._market_key(market_question), _normalize(headline))
+
+    def _get_embedder(self):
+        if self._embedder is None:
+            with self._embedder_lock:
+                if self._embedder is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._embedder = SentenceTransformer(EMBED_MODEL)
+        return self._embedder
+
+    def _embed(self, headline: str):
+        norm = _normalize(headline)
+        with self._lock:
+            vec = self._embeddings.get(norm)
+        if vec is not None:
+            return vec
+        # Only the encode runs unlocked; resolver threads call this concurrently
+        vec = array("f", [float(x) for x in self._get_embedder().encode(headline)])
+        with self._lock:
+            self._embeddings[norm] = vec
+            while len(self._embeddings) > 256:
+                self._embeddings.popitem(last=False)
+        return vec
+
+    # --- Public API -------------------------------------------------------------
+
+    def get(self, headline: str, market_question: str):
+        """Return the cached verdict dict, or None. Semantic hits are marked in 'source'."""
+        key = self._key(headline, market_question)
+        cutoff = time.time() - self.ttl_s
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT verdict FROM llm_verdicts WHERE key = ? AND created >= ?", (key, cutoff)
+            ).fetchone()
+            if row:
+                self._db.execute("UPDATE llm_verdicts SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+                self.hits += 1
+                return {**json.loads(row[0]), "source": "llm_cache"}
+
+            if not self.semantic:
+                self.misses += 1
+                return None
+
+            candidates = self._db.execute(
+                "SELECT key, verdict, embedding FROM llm_verdicts"
+                " WHERE market_key = ? AND created >= ? AND embedding IS NOT NULL",
+                (self._market_key(market_question), cutoff),
+            ).fetchall()
+
+        best, best_sim = None, 0.0
+        if candidates:
+            vec = self._embed(headline)
+            for cand_key, verdict, blob in candidates:
+                sim = _cosine(vec, array("f", blob))
+                if sim > best_sim:
+                    best, best_sim = (cand_key, verdict), sim
+
+        with self._lock:
+            if best is not None and best_sim >= self.threshold:
+                self._db.execute("UPDATE llm_verdicts SET last_used = ? WHERE key = ?", (time.time(), best[0]))
+                self._db.commit()
+                self.semantic_hits += 1
+                return {**json.loads(best[1]), "source": "llm_semantic_cache"}
+            self.misses += 1
+            return None
+
+    def put(self, headline: str, market_question: str, verdict: dict):
+        """Store a successful verdict ({'signal', 'reasoning'})."""
+        blob = self._embed(headline).tobytes() if self.semantic else None
+        now = time.time()
+        payload = json.dumps({"signal": verdict["signal"], "reasoning": verdict.get("reasoning", "")})
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_verdicts"
+                " (key, market_key, created, last_used, verdict, embedding) VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(headline, market_question), self._market_key(market_question),
+                 now, now, payload, blob),
+            )
+            self._puts += 1
+            if self._puts % 100 == 0:
+                self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float):
+        self._db.execute("DELETE FROM llm_verdicts WHERE created < ?", (now - self.ttl_s,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM llm_verdicts").fetchone()
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM llm_verdicts WHERE key IN"
+                " (SELECT key FROM llm_verdicts ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "lookups":       lookups,
+                "hits":          self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses":        self.misses,
+                "hit_rate":      round((self.hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -1,15 +1,44 @@
+import sys
+import time
+
 import modal
 
 app = modal.App("finnews-sentiment")
-image = modal.Image.debian_slim().pip_install("transformers", "torch")
+
+MODEL_NAME = "ProsusAI/finbert"
+MODEL_DIR = "/models/finbert"        # baked into the image at build time
+
+
+def download_model(path: str = MODEL_DIR):
+    from huggingface_hub import snapshot_download
+    snapshot_download(MODEL_NAME, local_dir=path, ignore_patterns=["*.h5", "*.msgpack"])
+
+
+image = (
+    modal.Image.debian_slim()
+    .pip_install("transformers", "torch", "huggingface_hub")
+    .run_function(download_model)
+    .env({"HF_HUB_OFFLINE": "1"})
+)
+
+
+def load_model(path: str = MODEL_DIR):
+    """CPU model + tokenizer; pipeline() puts them on the GPU."""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    return AutoModelForSequenceClassification.from_pretrained(path), AutoTokenizer.from_pretrained(path)
 
 
-@app.cls(gpu="A10G", image=image, min_containers=1)
+@app.cls(gpu="A10G", image=image, min_containers=1, enable_memory_snapshot=True)
 class SentimentScorer:
-    @modal.enter()
+    @modal.enter(snap=True)
     def load_model(self):
+        # Captured in the memory snapshot that new containers start from
+        self.model, self.tokenizer = load_model()
+
+    @modal.enter(snap=False)
+    def to_device(self):
         from transformers import pipeline
-        self.pipe = pipeline("text-classification", model="ProsusAI/finbert")
+        self.pipe = pipeline("text-classification", model=self.model, tokenizer=self.tokenizer, device=0)
 
     @modal.method()
     def score(self, text: str) -> dict:
@@ -25,6 +54,28 @@ class SentimentScorer:
         return {"label": label, "score": r["score"], "signal": signal}
 
 
+def _bench(device: int = -1):
+    """
+    Times a new container's startup work, locally:
+        python NLP/modaltest.py --bench [cuda]
+    """
+    import tempfile
+    from transformers import pipeline
+
+    def timed(label, fn):
+        t0 = time.perf_counter()
+        result = fn()
+        print(f"{label:34s} {(time.perf_counter() - t0) * 1000:8.0f} ms")
+        return result
+
+    with tempfile.TemporaryDirectory() as baked:
+        timed("hub download (old enter, uncached)", lambda: download_model(baked))
+        model, tokenizer = timed("load model from baked dir", lambda: load_model(baked))
+        pipe = timed("build pipeline on device", lambda: pipeline(
+            "text-classification", model=model, tokenizer=tokenizer, device=device))
+        timed("first score", lambda: pipe(["Fed holds rates steady"]))
+
+
 @app.local_entrypoint()
 def main():
     import time
@@ -48,3 +99,7 @@ def main():
         print(f"[{signal_str:8s} {r['score']:.3f}]  {headline}")
 
     print(f"\nDone: {len(headlines)} articles in {elapsed:.2f}s ({elapsed/len(headlines):.3f}s/article)")
+
+
+if __name__ == "__main__" and "--bench" in sys.argv:
+    _bench(0 if "cuda" in sys.argv else -1)
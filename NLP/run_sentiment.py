@@ -1,5 +1,5 @@
 """
-Running script for NLP/sentiment.py — measures end-to-end latency of score_and_write.
+Running script for NLP/sentiment.py — measures end-to-end latency of score_articles.
 
 Usage:
     python NLP/run_sentiment.py
@@ -15,7 +15,7 @@ import os
 # Allow running from project root or NLP/ directory
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from NLP.sentiment import score_and_write
+from NLP.sentiment import score_articles, write_decisions, cache_stats
 
 
 def clear_processed(csv_path: str, n_processed: int):
@@ -89,15 +89,16 @@ def main():
 
         for i, batch in enumerate(batches):
             batch_start = time.perf_counter()
-            results = score_and_write(batch)
+            results = score_articles(batch)
+            write_decisions(results)
             elapsed = time.perf_counter() - batch_start
 
             print(f"Batch {i + 1}/{len(batches)} — {len(batch)} articles in {elapsed:.2f}s "
                   f"({elapsed / len(batch):.3f}s/article)")
             for r in results:
-                signal_str = {1: "POSITIVE", -1: "NEGATIVE", 0: "NEUTRAL"}[r["signal"]]
+                signal_str = {1: "POSITIVE", -1: "NEGATIVE", 0: "NEUTRAL"}[r["finbert_signal"]]
                 ticker = r.get("ticker", "N/A")
-                print(f"  [{ticker:10s} | {signal_str:8s} {r['score']:.3f}]  {r['headline'][:80]}")
+                print(f"  [{ticker:10s} | {signal_str:8s} {r['finbert_score']:.3f}]  {r['headline'][:80]}")
             print()
 
         total = time.perf_counter() - total_start
@@ -106,6 +107,11 @@ def main():
               f"({total / total_articles:.3f}s/article)")
         print(f"Results written to: sentiment_output.csv")
 
+        stats = cache_stats()
+        print(f"Cache: hit rate {stats['hit_rate']:.1%} "
+              f"({stats['hits']}/{stats['lookups']} headlines), "
+              f"GPU calls {stats['gpu_calls']} made / {stats['gpu_calls_saved']} saved")
+
         clear_processed(args.csv, total_articles)
 
 
@@ -1,8 +1,12 @@
 import modal
 import csv
 import os
+import threading
 from datetime import datetime
 
+import metrics
+from NLP.sentiment_cache import get_cache, normalize_headline
+
 CSV_PATH = "sentiment_output.csv"
 CSV_COLUMNS = [
     "timestamp", "source", "headline", "content_header", "link",
@@ -13,6 +17,8 @@ CSV_COLUMNS = [
 ]
 
 _scorer = None
+_csv_lock = threading.Lock()  # pipeline workers append concurrently
+_decision_sink = None         # sharded mode: rows go to the one process that writes the CSV
 
 
 def _get_scorer():
@@ -23,14 +29,57 @@ def _get_scorer():
     return _scorer
 
 
+def warm():
+    """Look up the deployed class now instead of on the first batch."""
+    global _scorer
+    if _scorer is None:
+        Cls = modal.Cls.from_name("finnews-sentiment", "SentimentScorer")
+        Cls.hydrate()
+        _scorer = Cls()
+
+
 def score_headline(text: str) -> dict:
     """Score a single headline. Returns {'label', 'score', 'signal'}."""
-    return _get_scorer().score.remote(text)
+    return score_headlines([text])[0]
 
 
 def score_headlines(texts: list[str]) -> list[dict]:
-    """Batch score headlines in a single GPU call. Returns list of {'label', 'score', 'signal'}."""
-    return _get_scorer().score_batch.remote(texts)
+    """
+    Batch score headlines. Returns list of {'label', 'score', 'signal'}.
+
+    Results come from the sentiment cache where possible; only the distinct
+    misses are sent to the GPU, in a single call.
+    """
+    if not texts:
+        return []
+
+    cache = get_cache()
+    results = cache.get_many(texts)
+
+    # Syndicated duplicates within one batch are scored once
+    misses = {}
+    for text, result in zip(texts, results):
+        if result is None:
+            misses.setdefault(normalize_headline(text), text)
+
+    cache.record_call(needed_gpu=bool(misses))
+    if misses:
+        miss_texts = list(misses.values())
+        with metrics.external("modal", "score_batch"):
+            scored = _get_scorer().score_batch.remote(miss_texts)
+        cache.put_many(miss_texts, scored)
+        by_norm = dict(zip(misses, scored))
+        results = [
+            r if r is not None else by_norm[normalize_headline(t)]
+            for t, r in zip(texts, results)
+        ]
+
+    return results
+
+
+def cache_stats() -> dict:
+    """Hit-rate and GPU-calls-saved counters for the FinBERT cache."""
+    return get_cache().stats()
 
 
 def score_articles(articles: list[dict]) -> list[dict]:
@@ -67,6 +116,12 @@ def score_articles(articles: list[dict]) -> list[dict]:
     return enriched
 
 
+def set_decision_sink(fn):
+    """Hand decision rows to fn(rows) instead of appending them here (worker processes)."""
+    global _decision_sink
+    _decision_sink = fn
+
+
 def write_decisions(rows: list[dict]):
     """
     Append complete decision rows (all 16 fields) to sentiment_output.csv.
@@ -74,9 +129,13 @@ def write_decisions(rows: list[dict]):
     """
     if not rows:
         return
-    write_header = not os.path.exists(CSV_PATH) or os.path.getsize(CSV_PATH) == 0
-    with open(CSV_PATH, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction="ignore")
-        if write_header:
-            writer.writeheader()
-        writer.writerows(rows)
+    if _decision_sink is not None:
+        _decision_sink([{k: row.get(k) for k in CSV_COLUMNS} for row in rows])
+        return
+    with _csv_lock:
+        write_header = not os.path.exists(CSV_PATH) or os.path.getsize(CSV_PATH) == 0
+        with open(CSV_PATH, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
@@ -0,0 +1,161 @@
+"""
+Content-addressed cache for FinBERT results.
+
+FinBERT output for a given text and model version never changes, so every
+headline only needs to reach the GPU once. Entries are keyed by
+sha256(model id + normalized headline) and live in two tiers:
+
+  - an in-memory LRU (hot headlines within one process)
+  - an on-disk SQLite table (survives restarts of main.py / run_sentiment.py)
+
+Usage:
+    from NLP.sentiment_cache import get_cache
+
+    cache = get_cache()
+    hits = cache.get_many(texts)        # list aligned with texts, None = miss
+    cache.put_many(miss_texts, results)
+    cache.stats()                       # hit rate, GPU calls saved, ...
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+MODEL_ID = "ProsusAI/finbert"
+CACHE_PATH = os.environ.get("SENTIMENT_CACHE_PATH", "sentiment_cache.sqlite")
+LRU_SIZE = int(os.environ.get("SENTIMENT_CACHE_LRU", "4096"))
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_headline(text: str) -> str:
+    """Collapse whitespace and lowercase (FinBERT's tokenizer is uncased)."""
+    return _WS_RE.sub(" ", text or "").strip().lower()
+
+
+def cache_key(text: str, model_id: str = MODEL_ID) -> str:
+    payload = f"{model_id}\x00{normalize_headline(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """Two-tier (LRU + SQLite) cache of {'label', 'score', 'signal'} results."""
+
+    def __init__(self, path: str = CACHE_PATH, lru_size: int = LRU_SIZE, model_id: str = MODEL_ID):
+        self.model_id = model_id
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS finbert_cache ("
+            " key TEXT PRIMARY KEY, model_id TEXT NOT NULL, result TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.gpu_calls = 0
+        self.gpu_calls_saved = 0
+
+    # --- LRU tier -----------------------------------------------------------
+
+    def _lru_get(self, key):
+        result = self._lru.get(key)
+        if result is not None:
+            self._lru.move_to_end(key)
+        return result
+
+    def _lru_put(self, key, result):
+        self._lru[key] = result
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    # --- Public API -----------------------------------------------------------
+
+    def get_many(self, texts: list[str]) -> list:
+        """Return cached results aligned with texts (None for each miss)."""
+        keys = [cache_key(t, self.model_id) for t in texts]
+        results = [None] * len(texts)
+
+        with self._lock:
+            disk_lookup = {}
+            for i, key in enumerate(keys):
+                hit = self._lru_get(key)
+                if hit is not None:
+                    results[i] = hit
+                    self.memory_hits += 1
+                else:
+                    disk_lookup.setdefault(key, []).append(i)
+
+            if disk_lookup:
+                placeholders = ",".join("?" * len(disk_lookup))
+                rows = self._db.execute(
+                    f"SELECT key, result FROM finbert_cache WHERE key IN ({placeholders})",
+                    list(disk_lookup),
+                ).fetchall()
+                for key, raw in rows:
+                    result = json.loads(raw)
+                    self._lru_put(key, result)
+                    for i in disk_lookup.pop(key):
+                        results[i] = result
+                        self.disk_hits += 1
+
+            self.misses += sum(len(idx) for idx in disk_lookup.values())
+
+        return results
+
+    def put_many(self, texts: list[str], results: list[dict]):
+        """Store freshly scored results in both tiers."""
+        rows = []
+        with self._lock:
+            for text, result in zip(texts, results):
+                key = cache_key(text, self.model_id)
+                self._lru_put(key, result)
+                rows.append((key, self.model_id, json.dumps(result)))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO finbert_cache (key, model_id, result) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+
+    def record_call(self, needed_gpu: bool):
+        """Count one scoring request: either a real GPU call or one the cache absorbed."""
+        with self._lock:
+            if needed_gpu:
+                self.gpu_calls += 1
+            else:
+                self.gpu_calls_saved += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "lookups":         lookups,
+                "hits":            hits,
+                "memory_hits":     self.memory_hits,
+                "disk_hits":       self.disk_hits,
+                "misses":          self.misses,
+                "hit_rate":        round(hits / lookups, 4) if lookups else 0.0,
+                "gpu_calls":       self.gpu_calls,
+                "gpu_calls_saved": self.gpu_calls_saved,
+                "texts_saved":     hits,
+                "lru_entries":     len(self._lru),
+            }
+
+
+_cache = None
+
+
+def get_cache() -> SentimentCache:
+    global _cache
+    if _cache is None:
+        _cache = SentimentCache()
+    return _cache
@@ -1,3 +1,8 @@
+import hashlib
+import os
+import sys
+import time
+
 import modal
 
 app = modal.App("finnews-ticker")
@@ -5,36 +10,93 @@ app = modal.App("finnews-ticker")
 volume = modal.Volume.from_name("market-index", create_if_missing=True)
 VOLUME_PATH = "/market_index"
 
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+MODEL_DIR = "/models/all-MiniLM-L6-v2"      # baked into the image at build time
+
+
+def download_model(path: str = MODEL_DIR):
+    from huggingface_hub import snapshot_download
+    snapshot_download(MODEL_NAME, local_dir=path, ignore_patterns=["onnx/*", "openvino/*", "*.h5", "*.ot", "*.msgpack"])
+
+
 image = (
     modal.Image.debian_slim()
-    .pip_install("sentence-transformers", "torch", "numpy")
+    .pip_install("sentence-transformers", "torch", "numpy", "huggingface_hub")
+    .run_function(download_model)
+    .env({"HF_HUB_OFFLINE": "1"})
 )
 
 
-@app.cls(gpu="T4", image=image, volumes={VOLUME_PATH: volume}, min_containers=1)
+def load_model(path: str = MODEL_DIR, device: str = "cpu"):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(path, device=device)
+
+
+def load_index(root: str = VOLUME_PATH, device: str = "cpu"):
+    """Returns (embeddings tensor, metadata dict) from market_embeddings.pt / market_metadata.json."""
+    import json
+    import torch
+
+    embeddings = torch.load(f"{root}/market_embeddings.pt", map_location=device, weights_only=True)
+    with open(f"{root}/market_metadata.json", "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    return embeddings, meta
+
+
+def index_stamp(root: str = VOLUME_PATH) -> tuple:
+    """Changes whenever upload_index replaces the files on the volume."""
+    stamp = []
+    for name in ("market_embeddings.pt", "market_metadata.json"):
+        st = os.stat(f"{root}/{name}")
+        stamp.append((st.st_size, st.st_mtime_ns))
+    return tuple(stamp)
+
+
+@app.cls(gpu="T4", image=image, volumes={VOLUME_PATH: volume}, min_containers=1,
+         enable_memory_snapshot=True)
 class TickerMatcher:
-    @modal.enter()
+    @modal.enter(snap=True)
     def load(self):
-        import torch
-        import json
-        from sentence_transformers import SentenceTransformer
-
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
-        self.market_embeddings = torch.load(
-            f"{VOLUME_PATH}/market_embeddings.pt", map_location="cuda"
-        )
-        with open(f"{VOLUME_PATH}/market_metadata.json", "r", encoding="utf-8") as f:
-            meta = json.load(f)
+        """
+        Runs once per deploy; new containers restore the memory snapshot
+        taken after it. Weights come from the image, so there is no hub
+        download. Snapshots hold CPU memory only, so everything loads on CPU.
+        """
+        self.model = load_model(device="cpu")
+        self._load_index()
+
+    @modal.enter(snap=False)
+    def to_device(self):
+        # The snapshot keeps the index from deploy time; reload it if upload_index has run since
+        if index_stamp() != self._index_stamp:
+            self._load_index()
+        self.model.to("cuda")
+        self.market_embeddings = self.market_embeddings.to("cuda")
+
+    def _load_index(self):
+        self._index_stamp = index_stamp()
+        self.market_embeddings, meta = load_index(device="cpu")
         self.market_ids = meta["market_ids"]
         self.market_data = meta["market_data"]
+        self.index_version = hashlib.sha256("\n".join(self.market_ids).encode("utf-8")).hexdigest()[:12]
 
     @modal.method()
-    def match_batch(self, titles: list[str]) -> list[dict]:
+    def match_batch(self, titles: list[str], mask: bytes = None, index_version: str = None) -> list[dict]:
+        """
+        mask: one bit per market (little-endian within each byte, market_ids
+        order) from Kalshi.tradability; cleared bits can't be matched. Ignored
+        if index_version doesn't match the index loaded here.
+        """
+        import numpy as np
         import torch
         from sentence_transformers import util
 
         headline_embeddings = self.model.encode(titles, convert_to_tensor=True)
         cos_sims = util.cos_sim(headline_embeddings, self.market_embeddings)
+        if mask is not None and index_version == self.index_version:
+            bits = np.unpackbits(np.frombuffer(mask, dtype=np.uint8), bitorder="little")[:len(self.market_ids)]
+            blocked = torch.from_numpy(bits == 0).to(cos_sims.device)
+            cos_sims = cos_sims.masked_fill(blocked, -1.0)
         best_matches = torch.max(cos_sims, dim=1)
 
         results = []
@@ -61,9 +123,26 @@ def _get_matcher():
     return _matcher
 
 
+def warm():
+    """Look up the deployed class now instead of on the first headline."""
+    global _matcher
+    if _matcher is None:
+        Cls = modal.Cls.from_name("finnews-ticker", "TickerMatcher")
+        Cls.hydrate()
+        _matcher = Cls()
+
+
 def match_tickers(titles: list[str]) -> list[dict]:
     """Batch-match headlines to Kalshi tickers via Modal GPU. Returns list of {ticker, market_title, confidence}."""
-    return _get_matcher().match_batch.remote(titles)
+    import metrics
+    from Kalshi.tradability import get_tradability_mask
+
+    packed = get_tradability_mask().packed()
+    with metrics.external("modal", "match_batch"):
+        if packed is None:
+            return _get_matcher().match_batch.remote(titles)
+        version, mask = packed
+        return _get_matcher().match_batch.remote(titles, mask=mask, index_version=version)
 
 
 # --- ONE-TIME SETUP ---
@@ -77,3 +156,33 @@ def upload_index():
         batch.put_file("News/model/market_embeddings.pt", "/market_embeddings.pt")
         batch.put_file("News/model/market_metadata.json", "/market_metadata.json")
     print("Market index uploaded to Modal volume 'market-index'.")
+
+
+# --- COLD-START BENCHMARK ---
+
+def _bench(device: str = "cpu"):
+    """
+    Times what a new container does before it can serve, locally:
+        python NLP/ticker_modal.py --bench [cuda]
+    Compares the old path (model fetched from the hub) with loading from a
+    baked directory, plus the index load and the move to the device.
+    """
+    import tempfile
+
+    def timed(label, fn):
+        t0 = time.perf_counter()
+        result = fn()
+        print(f"{label:34s} {(time.perf_counter() - t0) * 1000:8.0f} ms")
+        return result
+
+    with tempfile.TemporaryDirectory() as baked:
+        timed("hub download (old enter, uncached)", lambda: download_model(baked))
+        model = timed("load model from baked dir", lambda: load_model(baked, device="cpu"))
+        embeddings, _ = timed("load index", lambda: load_index("News/model", device="cpu"))
+        if device != "cpu":
+            timed(f"move to {device}", lambda: (model.to(device), embeddings.to(device)))
+        timed("first encode", lambda: model.encode(["Fed holds rates steady"], convert_to_tensor=True))
+
+
+if __name__ == "__main__" and "--bench" in sys.argv:
+    _bench("cuda" if "cuda" in sys.argv else "cpu")
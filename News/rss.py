@@ -1,5 +1,4 @@
 import feedparser
-import pandas as pd
 import time
 import os
 import re
@@ -66,6 +65,11 @@ NEWS_FEEDS = {
 }
 
 STATE_FILE = "seen_links.txt"
+SEEN_RETENTION_S = 3 * 86400   # older links can't pass poll_news' 2-day cutoff again
+
+# Per-feed HTTP validators (ETag / Last-Modified) for conditional GETs
+_validators = {}
+_seen_since = {}               # link → first time a snapshot saw it
 
 def load_seen_links():
     if os.path.exists(STATE_FILE):
@@ -73,6 +77,33 @@ def load_seen_links():
             return set(line.strip() for line in f)
     return set()
 
+def dump_feed_state(seen_links):
+    """
+    Snapshot part: recent seen links, STATE_FILE offset and feed validators.
+    Only the payload is pruned; the live seen set is left to the poller.
+    """
+    # Offset first: a link the poller adds meanwhile is then past it and re-read on restore
+    offset = os.path.getsize(STATE_FILE) if os.path.exists(STATE_FILE) else 0
+    now = time.time()
+    for link in list(seen_links):
+        _seen_since.setdefault(link, now)
+    recent = {l: t for l, t in list(_seen_since.items()) if now - t <= SEEN_RETENTION_S}
+    return {"links": recent, "offset": offset, "validators": dict(_validators)}
+
+def load_feed_state(state):
+    """
+    Seen set from a snapshot: its links plus whatever was appended to
+    STATE_FILE after it was taken (no full re-read of the file).
+    """
+    _seen_since.update(state.get("links", {}))
+    _validators.update(state.get("validators", {}))
+    seen = set(_seen_since)
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE, "r") as f:
+            f.seek(min(state.get("offset", 0), os.path.getsize(STATE_FILE)))
+            seen.update(line.strip() for line in f if line.strip())
+    return seen
+
 def save_new_link(link):
     with open(STATE_FILE, "a") as f:
         f.write(link + "\n")
@@ -80,13 +111,19 @@ def save_new_link(link):
 def clean_html(text):
     return re.sub(r'<.*?>', '', text) if text else ""
 
-def poll_news(seen_links):
+def poll_news(seen_links, feeds=None):
+    """Poll `feeds` (name → URL; default all NEWS_FEEDS) for articles not in seen_links."""
     new_articles = []
     now = datetime.now(EST)
     cutoff = now - timedelta(days=2)
 
-    for source_name, url in NEWS_FEEDS.items():
-        feed = feedparser.parse(url)
+    for source_name, url in (NEWS_FEEDS if feeds is None else feeds).items():
+        cached = _validators.get(source_name, {})
+        feed = feedparser.parse(url, etag=cached.get("etag"), modified=cached.get("modified"))
+        if getattr(feed, "status", None) == 304:
+            continue   # unchanged since the last poll
+        if feed.get("etag") or feed.get("modified"):
+            _validators[source_name] = {"etag": feed.get("etag"), "modified": feed.get("modified")}
         
         for entry in feed.entries:
             link = getattr(entry, 'link', None)
@@ -118,6 +155,8 @@ def poll_news(seen_links):
             except Exception:
                 continue
 
+    import pandas as pd   # deferred: main.py warms it in the background at startup
+
     if new_articles:
         df_updates = pd.DataFrame(new_articles).sort_values(by='timestamp', ascending=False).reset_index(drop=True)
         # REMOVE the to_csv line here if you want the Unified Runner to handle the writing
@@ -1,53 +1,42 @@
-import pmxt
-import json
+import sys
 import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import json
 import torch
-from datetime import datetime, timezone
 from sentence_transformers import SentenceTransformer, util
 
+from Kalshi.catalog import get_catalog
+from LLM.market_routing import build_routing_column
+
 EMBEDDINGS_FILE = "News/model/market_embeddings.pt"
 METADATA_FILE = "News/model/market_metadata.json"
 
 model = SentenceTransformer('all-MiniLM-L6-v2')
 
-def is_open(m):
-    status = getattr(m, 'status', None)
-    if status is not None:
-        return str(status).lower() == 'open'
-    resolution_date = getattr(m, 'resolution_date', None)
-    if resolution_date is not None:
-        return resolution_date > datetime.now(timezone.utc)
-    return True
-
 def build_and_save_index():
-    print("Fetching open markets...")
-    kalshi = pmxt.Kalshi()
-
-    try:
-        markets = kalshi.fetch_markets(status='active', limit=2000)
-    except TypeError:
-        markets = kalshi.fetch_markets(limit=1000)
-
-    open_markets = [m for m in markets if is_open(m)]
-    print(f"Found {len(open_markets)} open markets (out of {len(markets)} total)")
+    # Open markets come from the local catalog; sync pulls only what changed
+    # since the last run (everything, paged, on the first run)
+    catalog = get_catalog()
+    print("Syncing market catalog...")
+    print(f"  {catalog.sync()}")
+    open_markets = catalog.open_markets()
+    print(f"Found {len(open_markets)} open markets in the catalog")
 
     market_data = {}
     for m in open_markets:
-        try:
-            outcome_labels = " | ".join(o.label for o in m.outcomes if o.label)
-            combined_text = f"{m.title} — {outcome_labels}" if outcome_labels else m.title
-
-            # Use dedicated ticker field if available, fall back to market_id
-            ticker = getattr(m, 'ticker', None) or m.market_id
-
-            market_data[m.market_id] = {
-                "title": m.title,
-                "ticker": ticker,
-                "combined_text": combined_text,
-                "outcomes": [o.label for o in m.outcomes if o.label]
-            }
-        except AttributeError:
-            pass
+        if not m["title"]:
+            continue
+        outcome_labels = " | ".join(m["outcomes"])
+        combined_text = f"{m['title']} — {outcome_labels}" if outcome_labels else m["title"]
+
+        market_data[m["ticker"]] = {
+            "title": m["title"],
+            "ticker": m["ticker"],
+            "combined_text": combined_text,
+            "outcomes": m["outcomes"],
+            "category": m["category"],
+        }
 
     market_ids = list(market_data.keys())
     market_combined_texts = [market_data[mid]["combined_text"] for mid in market_ids]
@@ -56,8 +45,11 @@ def build_and_save_index():
     market_embeddings = model.encode(market_combined_texts, convert_to_tensor=True)
 
     torch.save(market_embeddings, EMBEDDINGS_FILE)
+    # Signal routing is decided once per market here, not on every resolve_signal call
+    routing = build_routing_column(market_ids, market_data)
+
     with open(METADATA_FILE, "w") as f:
-        json.dump({"market_ids": market_ids, "market_data": market_data}, f)
+        json.dump({"market_ids": market_ids, "market_data": market_data, "routing": routing}, f)
 
     print(f"Saved {len(market_ids)} open markets to disk.")
     return market_ids, market_data, market_embeddings
@@ -2,12 +2,14 @@
 Flask API wrapper around the HackIllinois 2026 trading pipeline.
 Endpoints:
   GET  /api/trades      - returns recent trades from sentiment_output.csv
+  GET  /api/positions   - positions, cost basis and resting orders from the Kalshi ledger
   GET  /api/news/stream - SSE stream of new rows from sentiment_output.csv
   POST /api/config      - sets API keys for Groq and Kalshi
   POST /api/start       - launches python main.py as a subprocess
   POST /api/pause       - terminates the main.py subprocess
   GET  /api/status      - returns {running, configured}
   GET  /api/logs        - SSE stream of main.py stdout/stderr
+  GET  /api/metrics     - Prometheus metrics from the running pipeline process(es)
 """
 
 import os
@@ -23,11 +25,15 @@ from flask_cors import CORS
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, ROOT)
 
+import metrics
+import runtime_config
+
 app = Flask(__name__)
 CORS(app)
 
 CSV_PATH = os.path.join(ROOT, "sentiment_output.csv")
 MAIN_PY  = os.path.join(ROOT, "main.py")
+LEDGER_PATH = os.path.join(ROOT, os.environ.get("LEDGER_PATH", "ledger.json"))
 
 # --- Subprocess + log state ---
 _proc = None
@@ -65,6 +71,21 @@ def get_trades():
     return jsonify(rows[-20:][::-1])
 
 
+@app.route("/api/positions", methods=["GET"])
+def get_positions():
+    """Return the ledger the pipeline maintains (written on every order/fill)."""
+    if not os.path.exists(LEDGER_PATH):
+        return jsonify({"positions": [], "resting_orders": []})
+    try:
+        with open(LEDGER_PATH) as f:
+            state = json.load(f)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    state.pop("trade_ids", None)
+    state["positions"] = [p for p in state.get("positions", []) if p.get("count")]
+    return jsonify(state)
+
+
 @app.route("/api/news/stream", methods=["GET"])
 def stream_news():
     """SSE stream of new rows from sentiment_output.csv."""
@@ -159,19 +180,15 @@ def pause_pipeline():
 
 @app.route("/api/thresholds", methods=["POST"])
 def set_thresholds():
-    """Set MAX_BUY_PRICE and PROFIT_TARGET_CENTS env vars (inherited by next subprocess start)."""
+    """Update the live thresholds (runtime_config.json); a running main.py picks them up within a second."""
     data = request.get_json() or {}
-    max_buy = data.get("max_buy_price")
-    profit  = data.get("profit_target_cents")
-    if max_buy is not None:
-        os.environ["MAX_BUY_PRICE"] = str(int(max_buy))
-    if profit is not None:
-        os.environ["PROFIT_TARGET_CENTS"] = str(int(profit))
-    return jsonify({
-        "status": "ok",
-        "max_buy_price": int(os.environ.get("MAX_BUY_PRICE", "60")),
-        "profit_target_cents": int(os.environ.get("PROFIT_TARGET_CENTS", "7")),
-    })
+    try:
+        config = runtime_config.update(**{k: data.get(k) for k in runtime_config.FIELDS if k in data})
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except OSError as e:
+        return jsonify({"error": f"Could not save thresholds: {e}"}), 500
+    return jsonify({"status": "ok", **config})
 
 
 @app.route("/api/status", methods=["GET"])
@@ -180,11 +197,16 @@ def get_status():
     return jsonify({
         "running": running,
         "configured": _configured,
-        "max_buy_price": int(os.environ.get("MAX_BUY_PRICE", "60")),
-        "profit_target_cents": int(os.environ.get("PROFIT_TARGET_CENTS", "7")),
+        **runtime_config.current(),
     })
 
 
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics():
+    """Stage latency histograms, queue depths and external-call errors, in Prometheus text format."""
+    return Response(metrics.render(metrics.read_all()), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/api/logs", methods=["GET"])
 def stream_logs():
     """Server-Sent Events stream of main.py output."""
@@ -3,161 +3,467 @@ Main orchestration loop for the HackIllinois 2026 Kalshi trading algorithm.
 Integrated with Order Execution and Portfolio Heartbeat.
 """
 
-import time
+import asyncio
+import math
 import sys
 import os
-import threading
+import time
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import metrics
+import startup
+
 # --- Existing Imports ---
-from News.rss import poll_news, load_seen_links
-from NLP.ticker_modal import match_tickers
-from NLP.sentiment import score_articles, write_decisions
-from LLM.llm_signal import resolve_signal
+# Modal (NLP.*) and pandas load lazily; startup.warm_up() pre-imports them in the background
+from News.rss import poll_news, load_seen_links, dump_feed_state, load_feed_state
+from LLM.llm_signal import resolve_signals, is_financial_market
 
 # --- New Trading Imports ---
 # main.py
 from Kalshi.sell_heartbeat import start_background_heartbeat
-from Kalshi.kalshi_order_executor import execute_order
-from Kalshi.market_utils import get_best_ask
+from Kalshi.kalshi_order_executor import get_gateway
+from Kalshi.market_utils import get_best_ask, get_quote_service
+from Kalshi.orderbook import get_orderbook_service
+from Kalshi.catalog import get_catalog
+from Kalshi.tradability import get_tradability_mask
+
+from pipeline import Chain, Pipeline, Step, Window
+import runtime_config
+from snapshot import Snapshotter
 
 # --------------------------------------------------------------------------
 # Configuration (overridable via env vars)
 # --------------------------------------------------------------------------
 POLL_INTERVAL_S = 10          # seconds between news polls
-MIN_FINBERT_SCORE = 0.70      # minimum FinBERT confidence to act on
-MIN_TICKER_CONFIDENCE = 0.40  # minimum ticker match confidence to act on
-TRADE_QUANTITY = 1            # Number of contracts to buy per signal
-EXECUTION_PRICE = int(os.environ.get("MAX_BUY_PRICE", "60"))  # max cents willing to pay
+TRADE_QUANTITY = 1            # Number of contracts to buy per supporting headline
+MAX_ORDER_QUANTITY = int(os.environ.get("MAX_ORDER_QUANTITY", "3"))  # cap on one aggregated order
+AGGREGATE_WINDOW_S = float(os.environ.get("AGGREGATE_WINDOW_S", "1.0"))  # merge same-market signals this long
+MIN_VOTE_MARGIN = 0.5         # financial markets: |net FinBERT vote| / total weight needed to trade
+MAX_MERGED_HEADLINES = 3      # headlines shown to the LLM for one market
+RECENT_ORDER_S = float(os.environ.get("RECENT_ORDER_S", "300"))  # no repeat buy on a market within this window
+# MIN_FINBERT_SCORE, MIN_TICKER_CONFIDENCE and MAX_BUY_PRICE (max cents willing to pay)
+# are live settings: see runtime_config.py (changed via /api/thresholds without a restart)
+
+# Freshness priority: newest, best-sourced, best-matched, most liquid first
+ARTICLE_MAX_AGE_S = float(os.environ.get("ARTICLE_MAX_AGE_S", "1800"))  # older articles are shed unprocessed
+FRESHNESS_HALF_LIFE_S = 600   # priority halves for every 10 minutes of article age
+SOURCE_WEIGHTS = {            # feeds not listed weigh 1.0
+    "Bloomberg Markets": 1.3, "CNBC Macro": 1.2, "CNBC Business": 1.2, "MarketWatch": 1.1,
+    "Politico": 1.1, "The Hill Politics": 1.1, "Yahoo Sports": 0.9, "The Verge": 0.8,
+}
+INGEST_BATCH = 32             # articles per batch entering the pipeline
+
+# Per-stage concurrency (workers) — see pipeline.py
+MATCH_WORKERS   = 1
+SCORE_WORKERS   = 1
+AGGREGATE_WORKERS = 4         # batches whose aggregation windows can be open at once
+RESOLVE_WORKERS = 2           # batches in flight; LLM fan-out is inside resolve_signals
+PRICE_WORKERS   = 4
+EXECUTE_WORKERS = 2
+STAGE_QUEUE_SIZE = 32         # max batches/rows waiting in front of each stage
+
+# --------------------------------------------------------------------------
+# Pipeline stages
+# --------------------------------------------------------------------------
+def make_source(seen: set, chain: Chain, stages: list, feeds: dict = None):
+    """Returns the ingest callable: one RSS poll (of `feeds`, default all) → list of article rows."""
+    def ingest() -> list[dict]:
+        df = poll_news(seen, feeds)
+        if df.empty:
+            return []
+        startup.mark("first_article")
+        drops = {"stale": sum(s.shed for s in stages), **chain.drops()}
+        drops = " ".join(f"{name}={n}" for name, n in drops.items() if n)
+        wait = max((s.stats()["queue_wait_p95_s"] for s in stages), default=0.0)
+        print(f"[news] {len(df)} new article(s) | queue wait p95 {wait:.1f}s"
+              + (f" | dropped so far: {drops}" if drops else ""))
+        # Normalize column names
+        df = df.rename(columns={"title": "headline", "content": "content_header"})
+        rows = df.to_dict("records")
+        for row in rows:
+            metrics.start_trace(row, published=row.get("timestamp"))
+        return rows
+    return ingest
+
+
+def match_step(articles: list[dict]) -> list[dict]:
+    """Match each headline to a Kalshi market."""
+    from NLP.ticker_modal import match_tickers
+
+    headlines = [a["headline"] for a in articles]
+    ticker_matches = match_tickers(headlines)
+
+    for article, match in zip(articles, ticker_matches):
+        article["ticker"] = match["ticker"]
+        article["market_title"] = match["market_title"]
+        article["confidence"] = match["confidence"]
+        metrics.stamp(article, "matched")
+    return articles
+
+
+def confident(row: dict) -> bool:
+    return row["confidence"] >= runtime_config.get("min_ticker_confidence")
+
+
+def tradable_step(rows: list[dict]) -> list[dict]:
+    """Drop markets the local catalog knows are closed, about to close or priced out; note volume."""
+    tickers = [row["ticker"] for row in rows]
+    tradable = get_tradability_mask().check(tickers)
+    markets = get_catalog().get_many(tickers)
+    out = []
+    for row in rows:
+        if tradable[row["ticker"]]:
+            market = markets.get(row["ticker"])
+            out.append({**row, "volume": (market or {}).get("volume") or 0})
+    return out
+
+
+def not_recent(row: dict) -> bool:
+    """Skip markets we already sent a buy for within RECENT_ORDER_S."""
+    return time.monotonic() - _recent_orders.get(row["ticker"], float("-inf")) >= RECENT_ORDER_S
+
+
+def affordable_step(rows: list[dict]) -> list[dict]:
+    """Drop markets where neither side asks at or below our max price (one bulk quote lookup)."""
+    tickers = {row["ticker"] for row in rows}
+    max_price = runtime_config.get("max_buy_price")
+    # Start mirroring the surviving markets so later price checks skip REST
+    get_orderbook_service().watch(tickers)
+    quotes = get_quote_service().quotes(tickers)
+
+    out = []
+    for row in rows:
+        quote = quotes.get(row["ticker"])
+        asks = () if quote is None else (quote["yes_ask"], quote["no_ask"])
+        if asks and all(a is not None and a > max_price for a in asks):
+            continue
+        out.append(row)
+    return out
+
+
+def score_step(articles: list[dict]) -> list[dict]:
+    """Score with FinBERT."""
+    from NLP.sentiment import score_articles
+
+    scored = score_articles(articles)
+    for article in articles:
+        metrics.stamp(article, "scored")
+    return [{**article, **row} for article, row in zip(articles, scored)]
+
+
+def strong_signal(row: dict) -> bool:
+    return row["finbert_score"] >= runtime_config.get("min_finbert_score") and row["finbert_signal"] != 0
+
+
+def merge_signals(rows: list[dict]):
+    """
+    One row per market from every headline matched to it in the window.
+
+    Each headline votes its FinBERT direction, weighted by match confidence ×
+    FinBERT score. Financial markets trade on that vote (resolve_signals
+    passes it through); a split vote is a conflict and is dropped. Other
+    markets get one LLM call that sees the strongest headlines together.
+    Size grows with the headlines backing the decision: for LLM markets,
+    resolve_step counts only the headlines the LLM saw that agree with its
+    verdict.
+    """
+    rows = sorted(rows, key=lambda r: r["ticker_confidence"] * r["finbert_score"], reverse=True)
+    best = rows[0]
+    if len(rows) == 1:
+        return {**best, "quantity": TRADE_QUANTITY, "headline_count": 1}
+
+    weights = [r["ticker_confidence"] * r["finbert_score"] for r in rows]
+    net = sum(w * r["finbert_signal"] for w, r in zip(weights, rows))
+    vote = (net > 0) - (net < 0)
+
+    if is_financial_market(best["market_title"], best["ticker"]):
+        if abs(net) < MIN_VOTE_MARGIN * sum(weights):
+            print(f"[aggregate] {best['ticker']}: {len(rows)} headlines disagree, skipping")
+            return None
+        supporters = sum(1 for r in rows if r["finbert_signal"] == vote)
+        merged = {"headline": best["headline"]}
+    else:
+        shown = rows[:MAX_MERGED_HEADLINES]
+        supporters = 1    # resized by resolve_step once the LLM verdict is known
+        merged = {"headline":        " | ".join(r["headline"] for r in shown),
+                  "headline_signals": [r["finbert_signal"] for r in shown]}
+
+    print(f"[aggregate] {best['ticker']}: merged {len(rows)} headlines")
+    return {
+        **best,
+        **merged,
+        "finbert_signal": vote,
+        "quantity":       min(MAX_ORDER_QUANTITY, TRADE_QUANTITY * supporters),
+        "headline_count": len(rows),
+    }
+
+
+def resolve_step(rows: list[dict]) -> list[dict]:
+    """LLM signals for the whole batch → write CSV. Passes on rows with a non-zero final signal."""
+    from NLP.sentiment import write_decisions
+
+    directions = resolve_signals([
+        {
+            "headline":        row["headline"],
+            "market_question": row["market_title"],
+            "finbert_signal":  row["finbert_signal"],
+            "ticker":          row["ticker"],
+        }
+        for row in rows
+    ])
+
+    # Write to CSV (Monitoring Log)
+    decisions = []
+    for row, direction in zip(rows, directions):
+        metrics.stamp(row, "llm")
+        final_signal = direction["signal"]
+        side = "yes" if final_signal == 1 else ("no" if final_signal == -1 else "SKIP")
+        if "headline_signals" in row:
+            agreeing = sum(1 for s in row["headline_signals"] if s == final_signal)
+            row = {**row, "quantity": min(MAX_ORDER_QUANTITY, TRADE_QUANTITY * max(1, agreeing))}
+        decisions.append({
+            **row,
+            "llm_signal":     direction["signal"],
+            "llm_source":     direction["source"],
+            "llm_reasoning":  direction["reasoning"],
+            "final_signal":   final_signal,
+            "final_decision": side.upper(),
+            "side":           side,
+        })
+    write_decisions(decisions)
+
+    out = []
+    for row in decisions:
+        print(f"\n[decision] {row['final_decision']} | {row['ticker']} (conf: {row['ticker_confidence']:.2f})")
+        print(f"  Reason: {row['llm_reasoning']}")
+
+        if row["final_signal"] != 0:
+            print(f"  >>> SIGNAL DETECTED: Initiating Buy for {row['final_decision']}...")
+            out.append(row)
+
+    # One bulk quote request for the whole batch; the per-row price checks
+    # downstream then read the quote cache
+    if out:
+        get_quote_service().quotes([row["ticker"] for row in out])
+    return out
+
+
+def price_step(rows: list[dict]) -> list[dict]:
+    """Check the current ask for the chosen side against our max buy price."""
+    max_price = runtime_config.get("max_buy_price")
+    out = []
+    for row in rows:
+        best_ask = get_best_ask(row["ticker"], row["side"])
+        metrics.stamp(row, "quoted")
+        if best_ask is not None and best_ask > max_price:
+            print(f"  >>> SKIPPING {row['ticker']}: Ask ({best_ask}¢) > Max Buy Price ({max_price}¢).")
+            continue
+        out.append({**row, "best_ask": best_ask})
+    return out
+
+
+def execute_step(rows: list[dict]) -> list[dict]:
+    """Queue the limit buy orders; acknowledgements are reported from the gateway."""
+    gateway = get_gateway()
+    price = runtime_config.get("max_buy_price")
+    out = []
+    for row in rows:
+        print(f"  >>> Placing limit buy {row['quantity']}x {row['side'].upper()} {row['ticker']} "
+              f"at {price}¢ (ask={row['best_ask']}¢) [trace {row.get('trace_id')}]")
+
+        def on_ack(result, row=row):
+            metrics.stamp(row, "acked")
+            print(f"  >>> ORDER SENT! ID: {result.get('order', {}).get('order_id')} "
+                  f"[trace {row.get('trace_id')}: {metrics.trace_summary(row)}]")
+
+        metrics.stamp(row, "sent")
+        try:
+            gateway.submit(
+                ticker=row["ticker"],
+                action="buy",
+                side=row["side"],
+                count=row["quantity"],
+                type="limit",
+                price=price,
+                on_ack=on_ack,
+                on_error=lambda exc: print(f"  >>> EXECUTION FAILED: {exc}"),
+            )
+            _recent_orders[row["ticker"]] = time.monotonic()
+            out.append(row)
+            if "first_trade" not in startup.metrics()["milestones_s"]:
+                print(f"[startup] Time to first trade: {startup.mark('first_trade'):.2f}s")
+        except Exception as exc:
+            print(f"  >>> EXECUTION FAILED: {exc}")
+    return out
+
+
+_recent_orders = {}   # ticker → monotonic time of our last buy
+
+
+def dump_recent_orders() -> dict:
+    """Snapshot part: recent buys as wall-clock times (monotonic clocks don't survive a restart)."""
+    offset = time.time() - time.monotonic()
+    return {ticker: t + offset for ticker, t in _recent_orders.items()
+            if time.monotonic() - t < RECENT_ORDER_S}
+
+
+def load_recent_orders(part: dict):
+    offset = time.time() - time.monotonic()
+    _recent_orders.update({ticker: t - offset for ticker, t in part.items()})
+
+
+def article_age_s(row: dict) -> float:
+    return time.time() - row.get("timestamp", time.time())
+
+
+def is_stale(row: dict) -> bool:
+    """Past the staleness budget: the market has had time to price the story in."""
+    return article_age_s(row) > ARTICLE_MAX_AGE_S
+
+
+def priority(row: dict) -> float:
+    """
+    Freshness × source weight × match confidence × market volume. Fields a
+    row doesn't have yet (before matching) count as 1, so rows waiting at
+    the same stage compare fairly.
+    """
+    score = 0.5 ** (max(0.0, article_age_s(row)) / FRESHNESS_HALF_LIFE_S)
+    score *= SOURCE_WEIGHTS.get(row.get("source"), 1.0)
+    score *= row.get("confidence", 1.0)
+    if "volume" in row:
+        score *= 0.5 + 0.5 * min(1.0, math.log10(1 + row["volume"]) / 6)
+    return score
+
+
+MATCHED_FIELDS = ("headline", "ticker", "market_title", "confidence")
+
+
+def match_steps() -> list[Step]:
+    """Headline → market, and the confidence cut-off."""
+    return [
+        Step("ticker",     match_step,      cost=10,  needs=("headline",),
+             provides=("ticker", "market_title", "confidence"),
+             workers=MATCH_WORKERS, queue_size=STAGE_QUEUE_SIZE),
+        Step("confidence", confident,       cost=0,   needs=("confidence",), filter=True),
+    ]
+
+
+def decision_steps(execute=execute_step) -> list[Step]:
+    """Matched row → order. `execute` is the final step (sharded mode forwards to the gateway process)."""
+    return [
+        Step("tradable",   tradable_step,   cost=0.1, needs=("ticker",)),
+        Step("recent",     not_recent,      cost=0,   needs=("ticker",), filter=True),
+        Step("affordable", affordable_step, cost=1,   needs=("ticker",)),
+        Step("nlp",        score_step,      cost=30,  needs=("headline", "ticker"),
+             provides=("finbert_score", "finbert_signal", "ticker_confidence"),
+             workers=SCORE_WORKERS, queue_size=STAGE_QUEUE_SIZE),
+        Step("finbert",    strong_signal,   cost=0,   needs=("finbert_score",), filter=True),
+        Step("aggregate",  Window(lambda row: row["ticker"], merge_signals, AGGREGATE_WINDOW_S),
+             cost=1,   needs=("finbert_signal", "ticker_confidence"), provides=("quantity",),
+             workers=AGGREGATE_WORKERS, queue_size=STAGE_QUEUE_SIZE),
+        Step("llm",        resolve_step,    cost=400, needs=("quantity", "market_title"),
+             provides=("side",), workers=RESOLVE_WORKERS, queue_size=STAGE_QUEUE_SIZE, explode=True),
+        Step("market",     price_step,      cost=1,   needs=("side",), provides=("best_ask",),
+             workers=PRICE_WORKERS, queue_size=STAGE_QUEUE_SIZE),
+        Step("order",      execute,         cost=20,  needs=("side", "best_ask", "quantity"),
+             workers=EXECUTE_WORKERS, queue_size=STAGE_QUEUE_SIZE),
+    ]
+
+
+def build_chain() -> Chain:
+    """
+    The decision chain. Steps are declared in no particular order: Chain
+    runs the cheapest step whose inputs exist first. Costs are rough ms per row.
+    """
+    return Chain(match_steps() + decision_steps(), given=("headline",))
+
+
+def build_pipeline(seen: set, chain: Chain) -> Pipeline:
+    stages = chain.stages()
+    return Pipeline(make_source(seen, chain, stages), stages,
+                    priority=priority, shed=is_stale, ingest_batch=INGEST_BATCH)
+
+
+def start_metrics(process: str, pipeline: Pipeline = None, chain: Chain = None, gateway: bool = False):
+    """Export queue depths, shed/drop counts, Kalshi request errors and startup times to /api/metrics."""
+    from Kalshi.client import get_client
+
+    def collect():
+        for name, at in startup.metrics()["milestones_s"].items():
+            yield "finnews_startup_milestone_seconds", {"milestone": name}, at
+        for kind, counts in get_client().stats().items():
+            labels = {"service": "kalshi", "op": kind}
+            yield "finnews_external_requests_total", labels, counts["requests"]
+            yield "finnews_external_errors_total", labels, counts["errors"]
+            yield "finnews_external_retries_total", labels, counts["retries"]
+        if pipeline is not None:
+            for name, stage in pipeline.stats()["stages"].items():
+                yield "finnews_queue_depth", {"stage": name}, stage["queue_depth"]
+                yield "finnews_stage_rows_total", {"stage": name}, stage["rows_in"]
+                yield "finnews_stage_shed_total", {"stage": name}, stage["shed"]
+                yield "finnews_stage_errors_total", {"stage": name}, stage["errors"]
+        if chain is not None:
+            for name, dropped in chain.drops().items():
+                yield "finnews_step_dropped_total", {"step": name}, dropped
+        if gateway:
+            stats = get_gateway().stats()
+            yield "finnews_order_queue_depth", {}, stats["queued"]
+            for field in ("submitted", "acked", "rejected", "failed"):
+                yield "finnews_orders_total", {"result": field}, stats[field]
+
+    metrics.register(collect)
+    metrics.start(process)
+
 
 # --------------------------------------------------------------------------
 # Main loop
 # --------------------------------------------------------------------------
-def main():
-    print("Starting HackIllinois 2026 trading loop...")
-    
+def start_services():
+    """Exit engine, ledger, orderbook mirror, catalog sync and mask refresh (one process only)."""
     # 1. Mount the Heartbeat (Runs in background thread)
     print("[system] Mounting Portfolio Heartbeat...")
     start_background_heartbeat()
-    
-    seen = load_seen_links()
 
-    while True:
-        # --- 1. Fetch new headlines ---
-        try:
-            df = poll_news(seen)
-        except Exception as e:
-            print(f"[news] Error polling feeds: {e}")
-            time.sleep(POLL_INTERVAL_S)
-            continue
+    print("[system] Starting orderbook mirror...")
+    get_orderbook_service().start()
 
-        if df.empty:
-            # Heartbeat is still running in background while we wait
-            time.sleep(POLL_INTERVAL_S)
-            continue
+    print("[system] Starting market catalog sync...")
+    get_catalog().start()
 
-        print(f"[news] {len(df)} new article(s)")
+    print("[system] Starting tradability mask refresh...")
+    get_tradability_mask().start()
 
-        # Normalize column names
-        df = df.rename(columns={"title": "headline", "content": "content_header"})
-        articles = df.to_dict("records")
 
-        # --- 2. Match each headline to a Kalshi market ---
-        try:
-            headlines = [a["headline"] for a in articles]
-            ticker_matches = match_tickers(headlines)
-        except Exception as e:
-            print(f"[ticker] Error matching tickers: {e}")
-            time.sleep(POLL_INTERVAL_S)
-            continue
+def main():
+    if "--sharded" in sys.argv:
+        from supervisor import run
+        return run()
 
-        for article, match in zip(articles, ticker_matches):
-            article["ticker"] = match["ticker"]
-            article["market_title"] = match["market_title"]
-            article["confidence"] = match["confidence"]
+    print("Starting HackIllinois 2026 trading loop...")
+    startup.warm_up()
 
-        # --- 3. Score with FinBERT ---
-        try:
-            scored = score_articles(articles)
-        except Exception as e:
-            print(f"[nlp]  Error scoring articles: {e}")
-            time.sleep(POLL_INTERVAL_S)
-            continue
+    # Warm start: seen links + feed validators, recent buys, rows still in the pipeline
+    snap, restored = Snapshotter(), {}
+    snap.register("feeds", lambda: dump_feed_state(seen),
+                  lambda part: restored.update(seen=load_feed_state(part)))
+    snap.register("recent_orders", dump_recent_orders, load_recent_orders)
+    snap.register("pipeline", lambda: pipeline.unfinished(),
+                  lambda part: restored.update(pipeline=part))
+    snap.restore()
 
-        # --- 4, 5, 6. LLM signal → Write CSV → EXECUTE TRADE ---
-        for row in scored:
-            headline      = row["headline"]
-            finbert_signal = row["finbert_signal"]
-            finbert_score  = row["finbert_score"]
-            ticker         = row["ticker"]
-            market_title   = row["market_title"]
-            ticker_confidence = row["ticker_confidence"]
-
-            # Filter weak signals
-            if finbert_score < MIN_FINBERT_SCORE: continue
-            if finbert_signal == 0: continue
-            if ticker_confidence < MIN_TICKER_CONFIDENCE: continue
-
-            # Resolve Direction
-            direction = resolve_signal(
-                headline=headline,
-                market_question=market_title,
-                finbert_signal=finbert_signal,
-            )
+    start_services()
+
+    seen = restored.get("seen") or load_seen_links()
+
+    # 2. Poll → match → cheap filters → score → resolve → price → execute, each stage concurrent
+    chain = build_chain()
+    pipeline = build_pipeline(seen, chain)
+    pipeline.preload(restored.get("pipeline", {}))
+    snap.start()
+    start_metrics("main", pipeline, chain, gateway=True)
+    asyncio.run(pipeline.run(POLL_INTERVAL_S))
 
-            final_signal = direction["signal"]
-            side = "yes" if final_signal == 1 else ("no" if final_signal == -1 else "SKIP")
-            
-            # Write to CSV (Monitoring Log)
-            write_decisions([{
-                **row,
-                "llm_signal":     direction["signal"],
-                "llm_source":     direction["source"],
-                "llm_reasoning":  direction["reasoning"],
-                "final_signal":   final_signal,
-                "final_decision": side.upper(),
-            }])
-
-            # Print Decision
-            print(f"\n[decision] {side.upper()} | {ticker} (conf: {ticker_confidence:.2f})")
-            print(f"  Reason: {direction['reasoning']}")
-
-            # --- EXECUTION LOGIC ---
-            if final_signal != 0:
-                print(f"  >>> SIGNAL DETECTED: Initiating Buy for {side.upper()}...")
-
-                side_real = "yes" if final_signal == 1 else "no"
-                execution_price = EXECUTION_PRICE
-
-                # A. Check current market ask against our max buy price
-                best_ask = get_best_ask(ticker, side_real)
-                if best_ask is not None and best_ask > EXECUTION_PRICE:
-                    print(f"  >>> SKIPPING: Ask ({best_ask}¢) > Max Buy Price ({EXECUTION_PRICE}¢).")
-                    continue
-
-                if execution_price:
-                    print(f"  >>> Placing limit buy at {execution_price}¢ (ask={best_ask}¢)")
-                    
-                    try:
-                        # B. Place the Order
-                        order_response = execute_order(
-                            ticker=ticker,
-                            action="buy",
-                            side=side,
-                            count=TRADE_QUANTITY,
-                            type="limit",
-                            price=execution_price
-                        )
-                        print(f"  >>> ORDER SENT! ID: {order_response.get('order', {}).get('order_id')}")
-                        
-                    except Exception as exc:
-                        print(f"  >>> EXECUTION FAILED: {exc}")
-                else:
-                    print(f"  >>> SKIPPING: No liquidity (Ask price not found).")
-            
-        # Loop delay
-        time.sleep(POLL_INTERVAL_S)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,309 @@
+"""
+Per-article tracing and Prometheus metrics.
+
+Every ingested article gets a trace_id. Its row also carries timestamps,
+one per point on the way to an order:
+
+    published   the feed's publish time
+    fetched     the RSS poll that found it
+    matched     ticker match done
+    scored      FinBERT done
+    llm         signal resolved
+    quoted      ask checked
+    sent        order handed to the gateway
+    acked       exchange acknowledged the order
+
+stamp(row, stage) records a stage and observes the time since the
+previous one in finnews_stage_seconds{stage=...}. At "acked" it also
+observes publish→ack and fetch→ack. Rows copied with {**row} share one
+trace, and the trace travels with the row across processes.
+
+Histograms are log-bucketed (HDR-style): SUB_BUCKETS buckets per
+doubling from HIST_MIN_S up, so every quantile is within ~9% at any scale
+and memory stays fixed. external() counts and times calls to Modal, Groq
+and others. register(collect) adds gauges and counters that are read at
+write time: queue depths, shed and drop counts, Kalshi request errors.
+
+Every METRICS_INTERVAL_S, each process writes its state to
+METRICS_DIR/<process>.json (atomically). /api/metrics in api/index.py
+reads all fresh files and serves them in Prometheus text format, with a
+process label. So a separate API process can read them, and so can the
+sharded workers.
+
+Usage:
+    import metrics
+
+    metrics.start_trace(row, published=row["timestamp"])
+    metrics.stamp(row, "matched")
+    with metrics.external("groq", "llama-3.1-8b-instant"):
+        ...
+    metrics.start("main")
+"""
+
+import glob
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+METRICS_DIR = os.environ.get("METRICS_DIR", os.path.join(ROOT, "metrics_state"))
+METRICS_INTERVAL_S = float(os.environ.get("METRICS_INTERVAL_S", "5"))
+METRICS_STALE_S = 60          # files not rewritten this long belong to a stopped process
+
+HIST_MIN_S = 1e-4             # first bucket: ≤ 0.1 ms
+SUB_BUCKETS = 8               # buckets per doubling (≤ 9% relative error)
+HIST_DOUBLINGS = 26           # top bucket ≈ 1.9 h; beyond that is +Inf
+_MAX_INDEX = SUB_BUCKETS * HIST_DOUBLINGS
+
+STAGES = ("published", "fetched", "matched", "scored", "llm", "quoted", "sent", "acked")
+
+_HELP = {
+    "finnews_stage_seconds":          "Time from an article's previous trace stage to this one",
+    "finnews_publish_to_ack_seconds": "Article publish time to order acknowledgement",
+    "finnews_fetch_to_ack_seconds":   "RSS fetch to order acknowledgement",
+    "finnews_external_call_seconds":  "Latency of calls to external services",
+    "finnews_external_requests_total": "Calls to external services",
+    "finnews_external_errors_total":  "Failed calls to external services",
+}
+
+
+class Histogram:
+    """Log-bucketed histogram: bucket i ≤ HIST_MIN_S · 2^(i / SUB_BUCKETS)."""
+
+    def __init__(self):
+        self.counts = {}        # bucket index → count (sparse)
+        self.sum = 0.0
+        self.count = 0
+
+    @staticmethod
+    def upper(index: int) -> float:
+        return math.inf if index > _MAX_INDEX else HIST_MIN_S * 2 ** (index / SUB_BUCKETS)
+
+    def observe(self, seconds: float):
+        if seconds <= HIST_MIN_S:
+            index = 0
+        else:
+            index = min(_MAX_INDEX + 1, math.ceil(math.log2(seconds / HIST_MIN_S) * SUB_BUCKETS))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.sum += max(0.0, seconds)
+        self.count += 1
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct-th percentile."""
+        if not self.count:
+            return 0.0
+        rank, seen = pct / 100 * self.count, 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return self.upper(index)
+        return self.upper(max(self.counts))
+
+    def dump(self) -> dict:
+        return {"counts": dict(self.counts), "sum": self.sum, "count": self.count}
+
+
+_lock = threading.Lock()
+_histograms = {}       # (name, labels) → Histogram
+_counters = {}         # (name, labels) → float
+_collectors = []
+_thread = None
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name: str, seconds: float, **labels):
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = Histogram()
+        hist.observe(seconds)
+
+
+def inc(name: str, n: float = 1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+
+def percentile(name: str, pct: float, **labels) -> float:
+    with _lock:
+        hist = _histograms.get(_key(name, labels))
+        return hist.percentile(pct) if hist else 0.0
+
+
+@contextmanager
+def external(service: str, op: str = ""):
+    """Count, time and (on exception) count as failed one call to an external service."""
+    t0 = time.perf_counter()
+    inc("finnews_external_requests_total", service=service, op=op)
+    try:
+        yield
+    except BaseException:
+        inc("finnews_external_errors_total", service=service, op=op)
+        raise
+    finally:
+        observe("finnews_external_call_seconds", time.perf_counter() - t0, service=service, op=op)
+
+
+def register(collect):
+    """collect() → iterable of (name, labels, value); names ending in _total are counters, others gauges."""
+    with _lock:
+        _collectors.append(collect)
+
+
+# --------------------------------------------------------------------------
+# Tracing
+# --------------------------------------------------------------------------
+def start_trace(row: dict, published: float = None):
+    """Give a freshly fetched article its trace id; published is its epoch publish time, if known."""
+    now = time.time()
+    row["trace_id"] = uuid.uuid4().hex[:16]
+    row["_trace"] = {"fetched": now}
+    if published:
+        row["_trace"]["published"] = float(published)
+        observe("finnews_stage_seconds", max(0.0, now - published), stage="fetched")
+
+
+def stamp(row: dict, stage: str):
+    trace = row.get("_trace")
+    if trace is None or stage in trace:
+        return
+    now = time.time()
+    observe("finnews_stage_seconds", max(0.0, now - max(trace.values())), stage=stage)
+    trace[stage] = now
+    if stage == "acked":
+        if "published" in trace:
+            observe("finnews_publish_to_ack_seconds", max(0.0, now - trace["published"]))
+        observe("finnews_fetch_to_ack_seconds", now - trace["fetched"])
+
+
+def trace_summary(row: dict) -> str:
+    """'fetched+0.0s matched+0.4s ...' relative to fetch, for logs."""
+    trace = row.get("_trace") or {}
+    t0 = trace.get("fetched", 0.0)
+    return " ".join(f"{stage}{trace[stage] - t0:+.1f}s" for stage in STAGES if stage in trace)
+
+
+# --------------------------------------------------------------------------
+# Per-process state file
+# --------------------------------------------------------------------------
+def dump() -> dict:
+    with _lock:
+        hists = [(k, h.dump()) for k, h in _histograms.items()]
+        counters = list(_counters.items())
+        collectors = list(_collectors)
+
+    series = {"histograms": [], "counters": [], "gauges": []}
+    for (name, labels), hist in hists:
+        series["histograms"].append({"name": name, "labels": dict(labels), **hist})
+    for (name, labels), value in counters:
+        series["counters"].append({"name": name, "labels": dict(labels), "value": value})
+    for collect in collectors:
+        try:
+            for name, labels, value in collect():
+                kind = "counters" if name.endswith("_total") else "gauges"
+                series[kind].append({"name": name, "labels": labels, "value": value})
+        except Exception as e:
+            print(f"[metrics] Collector error: {e}")
+    return {"written_at": time.time(), **series}
+
+
+def write(process: str):
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"{process}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dump(), f)
+    os.replace(tmp, path)
+
+
+def start(process: str, interval_s: float = METRICS_INTERVAL_S):
+    """Write this process's metrics file every interval_s in the background."""
+    global _thread
+
+    def loop():
+        while True:
+            try:
+                write(process)
+            except Exception as e:
+                print(f"[metrics] Write error: {e}")
+            time.sleep(interval_s)
+
+    if _thread is None:
+        _thread = threading.Thread(target=loop, name="metrics", daemon=True)
+        _thread.start()
+
+
+# --------------------------------------------------------------------------
+# Prometheus exposition (api/index.py)
+# --------------------------------------------------------------------------
+def read_all(stale_s: float = METRICS_STALE_S) -> dict:
+    """process name → state, from every metrics file written within stale_s."""
+    states = {}
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        try:
+            if time.time() - os.stat(path).st_mtime > stale_s:
+                continue
+            with open(path, encoding="utf-8") as f:
+                states[os.path.basename(path)[:-len(".json")]] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return states
+
+
+def _labels(labels: dict, **extra) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(states: dict) -> str:
+    """Prometheus text format for the states from read_all(), one process label per file."""
+    families = {}   # name → (type, [lines])
+
+    def family(name, kind):
+        return families.setdefault(name, (kind, []))[1]
+
+    for process, state in sorted(states.items()):
+        for s in state.get("histograms", []):
+            lines = family(s["name"], "histogram")
+            counts = {int(i): n for i, n in s["counts"].items()}
+            # Expose one bucket per doubling; each is the exact cumulative count at that bound
+            for index in range(0, _MAX_INDEX + 1, SUB_BUCKETS):
+                cumulative = sum(n for i, n in counts.items() if i <= index)
+                le = f"{Histogram.upper(index):.6g}"
+                lines.append(f"{s['name']}_bucket{_labels(s['labels'], process=process, le=le)} {cumulative}")
+            lines.append(f"{s['name']}_bucket{_labels(s['labels'], process=process, le='+Inf')} {s['count']}")
+            lines.append(f"{s['name']}_sum{_labels(s['labels'], process=process)} {_number(s['sum'])}")
+            lines.append(f"{s['name']}_count{_labels(s['labels'], process=process)} {s['count']}")
+        for kind, key in (("counter", "counters"), ("gauge", "gauges")):
+            for s in state.get(key, []):
+                family(s["name"], kind).append(
+                    f"{s['name']}{_labels(s['labels'], process=process)} {_number(s['value'])}")
+        family("finnews_metrics_written_timestamp_seconds", "gauge").append(
+            f"finnews_metrics_written_timestamp_seconds{_labels({}, process=process)} {state.get('written_at', 0)}")
+
+    out = []
+    for name, (kind, lines) in sorted(families.items()):
+        if name in _HELP:
+            out.append(f"# HELP {name} {_HELP[name]}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(lines)
+    return "\n".join(out) + "\n"
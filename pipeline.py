@@ -0,0 +1,511 @@
+"""
+Staged asyncio pipeline used by main.py.
+
+Batches of article rows flow through bounded queues between stages:
+
+    ingest → match → score → resolve → price → execute
+
+Every stage has its own pool of workers, so a slow LLM round trip or order
+POST only occupies one worker of that stage while the stages in front of it
+keep going. The ingest loop keeps polling on its own schedule; once a
+stage's queue is full, the stage in front of it waits (backpressure)
+instead of piling up unbounded work.
+
+With a priority function, every stage queue serves the highest-priority
+batch first instead of the oldest, and ingested rows are sorted and split
+into batches of ingest_batch so a backlog drains freshest-first. With a
+shed predicate, rows are checked again whenever a worker takes them off a
+queue, and stale ones are dropped before the stage spends anything on them.
+
+Stage functions are ordinary blocking callables `fn(rows) -> rows` and run
+in worker threads. Returning fewer rows filters, returning more fans out.
+
+The stages can also be derived from a Chain: a flat list of Steps
+(per-row predicates and batch enrichers), each with a rough cost and the
+row fields it needs and provides. The chain runs the cheapest step whose
+inputs are available first, so cheap checks drop rows before expensive
+inference ever sees them. Steps that declare workers start a new Stage.
+The cheap steps that follow one run inside that step's stage. Each step
+counts the rows it drops.
+
+Benchmark against stubbed backends:
+    python pipeline.py
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+LATENCY_WINDOW = 2000  # completed rows kept for latency percentiles
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+class Stage:
+    """
+    One pipeline stage.
+
+    Args:
+        name:       label used in logs and stats.
+        fn:         blocking callable taking a list of rows and returning a list of rows.
+        workers:    number of batches this stage processes concurrently.
+        queue_size: capacity of the stage's input queue (in batches).
+        explode:    pass each output row downstream as its own batch, so
+                    per-row stages behind this one can work on them in parallel.
+    """
+
+    def __init__(self, name: str, fn, workers: int = 1, queue_size: int = 16, explode: bool = False):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size
+        self.explode = explode
+
+        self.queue = None
+        self.batches = 0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.errors = 0
+        self.shed = 0
+        self.busy_s = 0.0
+        self._waits = deque(maxlen=LATENCY_WINDOW)   # seconds batches spent queued
+        self._pending = {}                           # seq → rows queued in front of this stage
+        self._inflight = {}                          # seq → rows a worker is processing
+
+    def stats(self) -> dict:
+        waits = list(self._waits)
+        out = {
+            "workers":          self.workers,
+            "queue_depth":      self.queue.qsize() if self.queue is not None else 0,
+            "batches":          self.batches,
+            "rows_in":          self.rows_in,
+            "rows_out":         self.rows_out,
+            "errors":           self.errors,
+            "shed":             self.shed,
+            "busy_s":           round(self.busy_s, 3),
+            "queue_wait_p50_s": round(_percentile(waits, 50), 3),
+            "queue_wait_p95_s": round(_percentile(waits, 95), 3),
+        }
+        if isinstance(self.fn, _Segment):
+            out["steps"] = self.fn.stats()
+        return out
+
+
+class Step:
+    """
+    One link of a decision Chain.
+
+    Args:
+        name:     label used in logs and drop counts.
+        fn:       per-row predicate `fn(row) -> bool` when filter=True, else a
+                  batch callable `fn(rows) -> rows` that enriches (and may drop) rows.
+        cost:     rough cost per row in ms; among runnable steps the cheapest goes first.
+        needs:    row fields that must be present before this step can run.
+        provides: row fields this step adds.
+        filter:   fn is a per-row predicate.
+        workers:  set on steps doing slow I/O or inference; the step then
+                  starts its own pipeline Stage with this many workers.
+        queue_size, explode: passed to that Stage.
+    """
+
+    def __init__(self, name: str, fn, cost: float, needs=(), provides=(), filter: bool = False,
+                 workers: int = None, queue_size: int = 16, explode: bool = False):
+        self.name = name
+        self.fn = fn
+        self.cost = cost
+        self.needs = tuple(needs)
+        self.provides = tuple(provides)
+        self.filter = filter
+        self.workers = workers
+        self.queue_size = queue_size
+        self.explode = explode
+
+        self._lock = threading.Lock()
+        self.rows_in = 0
+        self.dropped = 0
+        self.busy_s = 0.0
+
+    def __call__(self, rows: list[dict]) -> list[dict]:
+        t0 = time.perf_counter()
+        out = [row for row in rows if self.fn(row)] if self.filter else (self.fn(rows) or [])
+        with self._lock:
+            self.busy_s += time.perf_counter() - t0
+            self.rows_in += len(rows)
+            self.dropped += max(0, len(rows) - len(out))
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"cost": self.cost, "rows_in": self.rows_in, "dropped": self.dropped,
+                    "busy_s": round(self.busy_s, 3)}
+
+
+class _Segment:
+    """The consecutive steps run by one Stage; stops as soon as no rows are left."""
+
+    def __init__(self, steps: list[Step]):
+        self.steps = steps
+
+    def __call__(self, rows: list[dict]) -> list[dict]:
+        for step in self.steps:
+            if not rows:
+                break
+            rows = step(rows)
+        return rows
+
+    def stats(self) -> dict:
+        return {step.name: step.stats() for step in self.steps}
+
+
+class Window:
+    """
+    Batch step that merges rows sharing a key over a short time window.
+
+    The first batch to bring a key opens its window and holds it for
+    window_s. Rows with that key from batches arriving meanwhile (on other
+    workers of the same stage) join it and are not passed on. When the
+    window closes, merge(rows) turns the group into one row (or None to
+    drop it). The stage needs enough workers to take new batches while
+    windows are open. window_s=0 merges within a batch only.
+    """
+
+    def __init__(self, key, merge, window_s: float):
+        self.key = key
+        self.merge = merge
+        self.window_s = window_s
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, rows: list[dict]) -> list[dict]:
+        owned = []
+        with self._lock:
+            for row in rows:
+                k = self.key(row)
+                if k not in self._open:
+                    self._open[k] = []
+                    owned.append(k)
+                self._open[k].append(row)
+        if owned and self.window_s > 0:
+            time.sleep(self.window_s)
+        with self._lock:
+            groups = [self._open.pop(k) for k in owned]
+        return [row for row in map(self.merge, groups) if row is not None]
+
+
+class Chain:
+    """
+    Orders Steps by cost, subject to their field dependencies.
+
+    Args:
+        steps: the steps, in any order (declaration order breaks cost ties).
+        given: fields every row has on ingest.
+    """
+
+    def __init__(self, steps: list[Step], given=()):
+        self.steps = self._plan(steps, set(given))
+
+    @staticmethod
+    def _plan(steps: list[Step], available: set) -> list[Step]:
+        pending, order = list(steps), []
+        while pending:
+            ready = [s for s in pending if set(s.needs) <= available]
+            if not ready:
+                missing = {f for s in pending for f in s.needs} - available
+                raise ValueError(f"No step provides {sorted(missing)} "
+                                 f"(needed by {[s.name for s in pending]})")
+            step = min(ready, key=lambda s: s.cost)
+            pending.remove(step)
+            order.append(step)
+            available |= set(step.provides)
+        return order
+
+    def stages(self) -> list[Stage]:
+        """Cut the planned order into Stages at every step that declares workers."""
+        groups = []
+        for step in self.steps:
+            if not groups or step.workers is not None:
+                groups.append([step])
+            else:
+                groups[-1].append(step)
+        return [
+            Stage(group[0].name, _Segment(group), workers=group[0].workers or 1,
+                  queue_size=group[0].queue_size, explode=group[0].explode)
+            for group in groups
+        ]
+
+    def drops(self) -> dict:
+        """step name → rows dropped so far."""
+        return {step.name: step.stats()["dropped"] for step in self.steps}
+
+    def stats(self) -> dict:
+        return {step.name: step.stats() for step in self.steps}
+
+
+class Pipeline:
+    """
+    Connects a polling source to a chain of stages with bounded queues.
+
+    Args:
+        source:       blocking callable returning a list of new rows (may be empty).
+        stages:       ordered list of Stage objects.
+        priority:     optional row → float; higher is served first. A batch
+                      ranks by its best row.
+        shed:         optional row → bool; True drops the row when it comes off a queue.
+        ingest_batch: with priority set, rows per batch handed to the first stage.
+    """
+
+    def __init__(self, source, stages: list[Stage], priority=None, shed=None, ingest_batch: int = 32):
+        self.source = source
+        self.stages = stages
+        self.priority = priority
+        self.shed = shed
+        self.ingest_batch = ingest_batch
+        self._seq = itertools.count()
+        self._preload = {}
+        self.polls = 0
+        self.rows_ingested = 0
+        self.rows_completed = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._started = None
+
+    # --- Internals ------------------------------------------------------------
+
+    async def _emit(self, index: int, rows: list[dict]):
+        """Hand rows produced by stage[index - 1] to stage[index] (or complete them)."""
+        if index >= len(self.stages):
+            now = time.perf_counter()
+            for row in rows:
+                self._latencies.append(now - row.get("_t_ingest", now))
+            self.rows_completed += len(rows)
+            return
+
+        if index > 0 and self.stages[index - 1].explode:
+            batches = [[row] for row in rows]
+        elif index == 0 and self.priority is not None:
+            rows = sorted(rows, key=self.priority, reverse=True)
+            batches = [rows[i:i + self.ingest_batch] for i in range(0, len(rows), self.ingest_batch)]
+        else:
+            batches = [rows]
+
+        queue = self.stages[index].queue
+        for batch in batches:
+            rank = -max(map(self.priority, batch)) if self.priority is not None else 0
+            seq = next(self._seq)
+            self.stages[index]._pending[seq] = batch
+            await queue.put((rank, seq, time.perf_counter(), batch))
+
+    async def _worker(self, index: int):
+        stage = self.stages[index]
+        while True:
+            _, seq, queued_at, rows = await stage.queue.get()
+            stage._pending.pop(seq, None)
+            t0 = time.perf_counter()
+            stage._waits.append(t0 - queued_at)
+            if self.shed is not None:
+                kept = [row for row in rows if not self.shed(row)]
+                stage.shed += len(rows) - len(kept)
+                rows = kept
+                if not rows:
+                    stage.queue.task_done()
+                    continue
+            stage._inflight[seq] = rows
+            try:
+                out = await asyncio.to_thread(stage.fn, rows)
+            except Exception as e:
+                print(f"[{stage.name}] Error: {e}")
+                stage.errors += 1
+                out = []
+            finally:
+                stage._inflight.pop(seq, None)
+            stage.busy_s += time.perf_counter() - t0
+            stage.batches += 1
+            stage.rows_in += len(rows)
+            stage.rows_out += len(out or [])
+            try:
+                if out:
+                    await self._emit(index + 1, out)
+            finally:
+                stage.queue.task_done()
+
+    async def _poll_loop(self, poll_interval: float, max_polls):
+        while max_polls is None or self.polls < max_polls:
+            t0 = time.perf_counter()
+            try:
+                rows = await asyncio.to_thread(self.source)
+            except Exception as e:
+                print(f"[ingest] Error polling: {e}")
+                rows = []
+            self.polls += 1
+
+            if rows:
+                now = time.perf_counter()
+                for row in rows:
+                    row.setdefault("_t_ingest", now)
+                self.rows_ingested += len(rows)
+                await self._emit(0, rows)
+
+            await asyncio.sleep(max(0.0, poll_interval - (time.perf_counter() - t0)))
+
+    # --- Public API -------------------------------------------------------------
+
+    async def run(self, poll_interval: float, max_polls: int = None):
+        """
+        Run until cancelled. With max_polls set, stop polling after that many
+        polls and return once every in-flight batch has drained.
+        """
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=sum(s.workers for s in self.stages) + 1)
+        )
+        for stage in self.stages:
+            stage.queue = asyncio.PriorityQueue(maxsize=stage.queue_size)
+
+        self._started = time.perf_counter()
+        workers = [
+            asyncio.create_task(self._worker(i))
+            for i, stage in enumerate(self.stages)
+            for _ in range(stage.workers)
+        ]
+        now = time.perf_counter()
+        for index, stage in enumerate(self.stages):
+            rows = self._preload.pop(stage.name, None)
+            if rows:
+                for row in rows:
+                    row["_t_ingest"] = now
+                await self._emit(index, rows)
+        try:
+            await self._poll_loop(poll_interval, max_polls)
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def unfinished(self) -> dict:
+        """
+        stage name → rows queued for it or being processed by it, for a
+        snapshot (callable from any thread). Rows inside the last stage are
+        left out: their side effects (orders) may already have happened.
+        """
+        out = {}
+        for i, stage in enumerate(self.stages):
+            batches = list(stage._pending.values())
+            if i < len(self.stages) - 1:
+                batches += list(stage._inflight.values())
+            rows = [row for batch in batches for row in batch]
+            if rows:
+                out[stage.name] = rows
+        return out
+
+    def preload(self, rows_by_stage: dict):
+        """Rows from unfinished() to re-queue at their stage when run() starts."""
+        names = {stage.name for stage in self.stages}
+        self._preload = {name: rows for name, rows in rows_by_stage.items() if name in names}
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        lat = list(self._latencies)
+        return {
+            "polls":          self.polls,
+            "rows_ingested":  self.rows_ingested,
+            "rows_completed": self.rows_completed,
+            "rows_shed":      sum(s.shed for s in self.stages),
+            "elapsed_s":      round(elapsed, 3),
+            "throughput_rps": round(self.rows_completed / elapsed, 2) if elapsed else 0.0,
+            "latency_p50_s":  round(_percentile(lat, 50), 3),
+            "latency_p95_s":  round(_percentile(lat, 95), 3),
+            "latency_max_s":  round(max(lat), 3) if lat else 0.0,
+            "stages":         {s.name: s.stats() for s in self.stages},
+        }
+
+
+# ---------------------------------------------------------------------------
+# Benchmark against stubbed stage backends
+# ---------------------------------------------------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--polls", type=int, default=6)
+    parser.add_argument("--batch", type=int, default=8, help="articles per poll")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between polls")
+    args = parser.parse_args()
+
+    # Stub latencies (seconds) roughly shaped like the real backends
+    STUB = {"poll": 0.05, "match": 0.15, "score": 0.30, "resolve": 0.40, "price": 0.08, "execute": 0.12}
+
+    def make_source():
+        counter = iter(range(10**9))
+
+        def source():
+            time.sleep(STUB["poll"])
+            return [{"headline": f"headline {next(counter)}"} for _ in range(args.batch)]
+        return source
+
+    def batch_stub(name):
+        def fn(rows):
+            time.sleep(STUB[name])
+            return rows
+        return fn
+
+    def row_stub(name):
+        def fn(rows):
+            for _ in rows:
+                time.sleep(STUB[name])
+            return rows
+        return fn
+
+    def build_stages():
+        return [
+            Stage("match",   batch_stub("match"),   workers=1),
+            Stage("score",   batch_stub("score"),   workers=1, explode=True),
+            Stage("resolve", row_stub("resolve"),   workers=8, queue_size=64),
+            Stage("price",   row_stub("price"),     workers=4, queue_size=64),
+            Stage("execute", row_stub("execute"),   workers=2, queue_size=64),
+        ]
+
+    # Sequential baseline: the previous main.py loop shape
+    source = make_source()
+    stages = build_stages()
+    latencies = []
+    t_start = time.perf_counter()
+    for _ in range(args.polls):
+        t0 = time.perf_counter()
+        rows = source()
+        ingested = time.perf_counter()
+        for stage in stages[:2]:
+            rows = stage.fn(rows)
+        for row in rows:
+            out = [row]
+            for stage in stages[2:]:
+                out = stage.fn(out)
+            latencies.append(time.perf_counter() - ingested)
+        time.sleep(max(0.0, args.interval - (time.perf_counter() - t0)))
+    seq_elapsed = time.perf_counter() - t_start
+
+    # Pipelined
+    pipe = Pipeline(make_source(), build_stages())
+    asyncio.run(pipe.run(args.interval, max_polls=args.polls))
+    s = pipe.stats()
+
+    total = args.polls * args.batch
+    print(f"\n{args.polls} polls x {args.batch} articles, poll interval {args.interval}s")
+    print(f"stub latencies: {STUB}\n")
+    print(f"{'mode':12s} {'elapsed':>9s} {'rows/s':>8s} {'p50':>7s} {'p95':>7s} {'max':>7s}")
+    print(f"{'sequential':12s} {seq_elapsed:8.2f}s {total / seq_elapsed:8.2f} "
+          f"{_percentile(latencies, 50):6.2f}s {_percentile(latencies, 95):6.2f}s {max(latencies):6.2f}s")
+    print(f"{'pipelined':12s} {s['elapsed_s']:8.2f}s {s['throughput_rps']:8.2f} "
+          f"{s['latency_p50_s']:6.2f}s {s['latency_p95_s']:6.2f}s {s['latency_max_s']:6.2f}s")
+    print("\nper-stage:")
+    for name, st in s["stages"].items():
+        print(f"  {name:8s} workers={st['workers']} rows_in={st['rows_in']:4d} busy={st['busy_s']:.2f}s")
@@ -0,0 +1,100 @@
+"""
+Trading thresholds that can change while the pipeline runs.
+
+/api/thresholds writes runtime_config.json (atomically). Every process
+re-reads it when its mtime changes, checking at most every
+RELOAD_CHECK_S, so a new max price or profit target applies within a
+second with no restart. Values missing from the file fall back to env
+vars and then to the defaults below.
+
+Usage:
+    import runtime_config
+
+    runtime_config.get("max_buy_price")           # → 60
+    runtime_config.update(max_buy_price=55)        # from the API process
+"""
+
+import json
+import os
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.environ.get("RUNTIME_CONFIG_PATH", os.path.join(ROOT, "runtime_config.json"))
+RELOAD_CHECK_S = 0.5
+
+# name → (env var, type, default)
+FIELDS = {
+    "max_buy_price":         ("MAX_BUY_PRICE", int, 60),
+    "profit_target_cents":   ("PROFIT_TARGET_CENTS", int, 7),
+    "min_finbert_score":     ("MIN_FINBERT_SCORE", float, 0.70),
+    "min_ticker_confidence": ("MIN_TICKER_CONFIDENCE", float, 0.40),
+}
+
+_lock = threading.Lock()
+_values = {}
+_mtime = None
+_checked = 0.0
+
+
+def _defaults() -> dict:
+    return {name: kind(os.environ.get(env, default)) for name, (env, kind, default) in FIELDS.items()}
+
+
+def _reload():
+    global _values, _mtime, _checked
+    _checked = time.monotonic()
+    try:
+        mtime = os.stat(CONFIG_PATH).st_mtime_ns
+    except OSError:
+        mtime = None
+    if mtime == _mtime and _values:
+        return
+    values = _defaults()
+    if mtime is not None:
+        try:
+            with open(CONFIG_PATH, encoding="utf-8") as f:
+                stored = json.load(f)
+            for name, (_, kind, _) in FIELDS.items():
+                if stored.get(name) is not None:
+                    values[name] = kind(stored[name])
+        except (OSError, ValueError, TypeError) as e:
+            print(f"[config] Could not read {CONFIG_PATH}: {e}")
+    if _values and values != _values:
+        changed = {k: v for k, v in values.items() if _values.get(k) != v}
+        print(f"[config] Reloaded: {changed}")
+    _values, _mtime = values, mtime
+
+
+def get(name: str):
+    with _lock:
+        if not _values or time.monotonic() - _checked >= RELOAD_CHECK_S:
+            _reload()
+        return _values[name]
+
+
+def current() -> dict:
+    with _lock:
+        _reload()
+        return dict(_values)
+
+
+def update(**values) -> dict:
+    """Validate, merge into the file and return the full current config."""
+    unknown = set(values) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown setting(s): {sorted(unknown)}")
+    with _lock:
+        stored = {}
+        try:
+            with open(CONFIG_PATH, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            pass
+        stored.update({name: FIELDS[name][1](v) for name, v in values.items() if v is not None})
+        tmp = f"{CONFIG_PATH}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2)
+        os.replace(tmp, CONFIG_PATH)
+        _reload()
+        return dict(_values)
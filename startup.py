@@ -0,0 +1,147 @@
+"""
+Startup phase for main.py: time what happens before the first trade and
+warm up slow first-use paths in the background.
+
+main.py only imports what the first poll needs. Everything else is
+imported and initialised here, in parallel threads, while the first RSS
+poll runs:
+
+    pandas        imported (only used to assemble poll results)
+    modal-ticker  Modal client + TickerMatcher class lookup
+    modal-finbert SentimentScorer class lookup
+    groq          Groq client
+    kalshi-key    PEM key parsed and one request signed
+    kalshi-pool   TLS handshakes for the shared Kalshi connection pool
+
+Each task's import and init time is recorded, in the spirit of
+`python -X importtime`. So are milestones counted from process start:
+imports done, warm-up done, first article, first trade. print_report()
+shows them once warm-up finishes, and the first-trade milestone is logged
+when it happens. metrics() returns all of it.
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+KALSHI_WARM_CONNECTIONS = 4
+
+
+def _process_start() -> float:
+    """perf_counter() value at interpreter start (Linux); falls back to first import of this module."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        age = uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+        return time.perf_counter() - max(0.0, age)
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter()
+
+
+T0 = _process_start()
+
+_lock = threading.Lock()
+_milestones = {}        # name → seconds since process start
+_tasks = {}             # name → {"import_ms", "init_ms", "error"}
+
+
+def mark(name: str, once: bool = True) -> float:
+    """Record a milestone (seconds since process start); with once=True only the first call counts."""
+    elapsed = time.perf_counter() - T0
+    with _lock:
+        if once and name in _milestones:
+            return _milestones[name]
+        _milestones[name] = elapsed
+    return elapsed
+
+
+def _ticker():
+    from NLP import ticker_modal
+    ticker_modal.warm()
+
+
+def _finbert():
+    from NLP import sentiment
+    sentiment.warm()
+
+
+def _groq():
+    from LLM import llm_signal
+    llm_signal._get_client()
+
+
+def _kalshi_key():
+    from Kalshi.kalshi_auth import get_kalshi_auth_headers
+    get_kalshi_auth_headers("GET", "/trade-api/v2/portfolio/balance")
+
+
+def _kalshi_pool():
+    from Kalshi.client import get_client
+    get_client().warm(KALSHI_WARM_CONNECTIONS)
+
+
+# name → (module imported first, init callable or None)
+WARM_TASKS = {
+    "pandas":        ("pandas", None),
+    "modal-ticker":  ("NLP.ticker_modal", _ticker),
+    "modal-finbert": ("NLP.sentiment", _finbert),
+    "groq":          ("groq", _groq),
+    "kalshi-key":    ("Kalshi.kalshi_auth", _kalshi_key),
+    "kalshi-pool":   ("Kalshi.client", _kalshi_pool),
+}
+
+
+def _run(name: str, module: str, init):
+    t0 = time.perf_counter()
+    result = {"import_ms": 0.0, "init_ms": 0.0, "error": None}
+    try:
+        importlib.import_module(module)
+        t1 = time.perf_counter()
+        result["import_ms"] = (t1 - t0) * 1000
+        if init is not None:
+            init()
+        result["init_ms"] = (time.perf_counter() - t1) * 1000
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    with _lock:
+        _tasks[name] = result
+
+
+def warm_up(tasks: dict = WARM_TASKS, wait: bool = False):
+    """Run the warm-up tasks concurrently; returns at once unless wait=True."""
+    mark("imports")
+
+    def run_all():
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="warm") as pool:
+            for name, (module, init) in tasks.items():
+                pool.submit(_run, name, module, init)
+        mark("warm")
+        print_report()
+
+    thread = threading.Thread(target=run_all, name="startup-warm", daemon=True)
+    thread.start()
+    if wait:
+        thread.join()
+    return thread
+
+
+def print_report(file=sys.stdout):
+    with _lock:
+        tasks = dict(_tasks)
+        milestones = dict(_milestones)
+    print("[startup] task            import ms   init ms", file=file)
+    for name, t in sorted(tasks.items(), key=lambda kv: -(kv[1]["import_ms"] + kv[1]["init_ms"])):
+        note = f"  ({t['error']})" if t["error"] else ""
+        print(f"[startup] {name:14s} {t['import_ms']:10.1f} {t['init_ms']:9.1f}{note}", file=file)
+    for name, at in sorted(milestones.items(), key=lambda kv: kv[1]):
+        print(f"[startup] {name} at {at:.2f}s", file=file)
+
+
+def metrics() -> dict:
+    with _lock:
+        return {"milestones_s": dict(_milestones), "tasks": {k: dict(v) for k, v in _tasks.items()}}
@@ -0,0 +1,298 @@
+"""
+Multi-process (sharded) mode for main.py, so the pipeline can use more than
+one core:
+
+    python main.py --sharded          (or: python supervisor.py)
+
+    ingest-0..I-1   poll a fixed group of RSS feeds, match headlines to
+                    markets, shed stale articles, route each row by ticker
+        │           hash (crc32, so every process agrees)
+        ▼  one multiprocessing queue per decision shard
+    decide-0..D-1   the rest of the decision chain (filters, FinBERT,
+                    aggregation, LLM, price check) for the tickers in
+        │           their shard
+        ▼  one queue
+    gateway         the only process that places orders. It also runs
+                    the exit engine, ledger, catalog sync, mask refresh,
+                    the one orderbook WebSocket and the CSV decision log
+
+A ticker always lands on the same decision shard, so its aggregation
+window and recent-buy state live in one process. The gateway re-checks
+the recent-buy window before submitting, so no trade is duplicated.
+
+Other processes read the gateway's orderbook mirror through a shared
+dict (Kalshi.orderbook.SharedBooks), and ask it to watch markets over a
+queue. Decision rows for sentiment_output.csv are queued to the gateway
+too, so only one process appends to the file.
+
+Kalshi's read budget is per account. The gateway and each decision
+shard get an equal share of KALSHI_READ_RPS. Ingest workers do not call
+Kalshi.
+
+Crashed workers are restarted. Every STATS_INTERVAL_S the supervisor
+prints combined throughput, shed and drop counts.
+
+    python supervisor.py --bench     # shard-queue throughput vs decision process count
+"""
+
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+INGEST_PROCS = int(os.environ.get("INGEST_PROCS", "2"))
+DECISION_PROCS = int(os.environ.get("DECISION_PROCS", str(max(1, (os.cpu_count() or 2) - 1))))
+SHARD_QUEUE_SIZE = 1000       # rows waiting per decision shard before ingest blocks
+WATCH_QUEUE_SIZE = 1000       # watch requests waiting for the gateway (dropped when full)
+STATS_INTERVAL_S = 30
+RESTART_DELAY_S = 5
+
+
+def shard_of(ticker: str, shards: int) -> int:
+    # Not hash(): str hashes are salted per process
+    return zlib.crc32(ticker.encode("utf-8")) % shards
+
+
+def feed_groups(groups: int) -> list[dict]:
+    from News.rss import NEWS_FEEDS
+
+    items = list(NEWS_FEEDS.items())
+    return [dict(items[i::groups]) for i in range(groups)]
+
+
+def _report(stats_q, role: str, index: int, stats):
+    def loop():
+        while True:
+            time.sleep(STATS_INTERVAL_S)
+            try:
+                stats_q.put_nowait((role, index, stats()))
+            except Exception:
+                pass
+
+    threading.Thread(target=loop, name="stats-report", daemon=True).start()
+
+
+def _share_read_budget(processes: int):
+    from Kalshi import scheduler
+
+    scheduler._scheduler = scheduler.KalshiScheduler(read_rps=scheduler.READ_RPS / processes)
+
+
+def _use_gateway_books(books):
+    """Read the gateway's orderbook mirror instead of opening another WebSocket."""
+    from Kalshi import orderbook
+
+    orderbook._service = orderbook.SharedBooks(*books)
+
+
+# --------------------------------------------------------------------------
+# Worker processes
+# --------------------------------------------------------------------------
+def ingest_worker(index: int, feeds: dict, shard_queues: list, stats_q, books):
+    _use_gateway_books(books)
+    import main
+    from News.rss import load_seen_links
+    from Kalshi.tradability import get_tradability_mask
+    from pipeline import Chain, Pipeline, Stage
+
+    # The gateway process refreshes quotes into the shared catalog; just re-read it here
+    get_tradability_mask().start(fetch=False)
+
+    def route(rows):
+        for row in rows:
+            shard_queues[shard_of(row["ticker"], len(shard_queues))].put(row)
+        return rows
+
+    chain = Chain(main.match_steps(), given=("headline",))
+    stages = chain.stages() + [Stage("route", route, queue_size=main.STAGE_QUEUE_SIZE)]
+    pipeline = Pipeline(main.make_source(load_seen_links(), chain, stages, feeds), stages,
+                        priority=main.priority, shed=main.is_stale, ingest_batch=main.INGEST_BATCH)
+    _report(stats_q, "ingest", index, pipeline.stats)
+    main.start_metrics(f"ingest-{index}", pipeline, chain)
+    print(f"[ingest-{index}] polling {len(feeds)} feeds")
+    asyncio.run(pipeline.run(main.POLL_INTERVAL_S))
+
+
+def decision_worker(index: int, rows_q, order_q, stats_q, readers: int, books, log_q):
+    _use_gateway_books(books)
+    import main
+    from NLP.sentiment import set_decision_sink
+    from pipeline import Chain, Pipeline
+
+    _share_read_budget(readers)
+    set_decision_sink(log_q.put)
+
+    def source():
+        rows = []
+        try:
+            rows.append(rows_q.get(timeout=0.05))
+            while len(rows) < main.INGEST_BATCH:
+                rows.append(rows_q.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+    def forward(rows):
+        """Hand the buy to the gateway process."""
+        for row in rows:
+            order_q.put({k: row[k] for k in ("ticker", "side", "quantity", "best_ask", "trace_id", "_trace")
+                         if k in row})
+            main._recent_orders[row["ticker"]] = time.monotonic()
+        return rows
+
+    chain = Chain(main.decision_steps(execute=forward), given=main.MATCHED_FIELDS)
+    pipeline = Pipeline(source, chain.stages(), priority=main.priority, shed=main.is_stale,
+                        ingest_batch=main.INGEST_BATCH)
+    _report(stats_q, "decide", index, pipeline.stats)
+    main.start_metrics(f"decide-{index}", pipeline, chain)
+    print(f"[decide-{index}] ready")
+    asyncio.run(pipeline.run(0.0))
+
+
+def gateway_worker(order_q, stats_q, readers: int, books, log_q):
+    import main
+    from Kalshi.kalshi_order_executor import get_gateway
+    from Kalshi.orderbook import get_orderbook_service, publish_books
+    from NLP.sentiment import write_decisions
+
+    def write_log():
+        while True:
+            try:
+                write_decisions(log_q.get())
+            except Exception as e:
+                print(f"[gateway] Decision log error: {e}")
+
+    _share_read_budget(readers)
+    main.start_services()
+    publish_books(get_orderbook_service(), *books)
+    threading.Thread(target=write_log, name="decision-log", daemon=True).start()
+    _report(stats_q, "gateway", 0, get_gateway().stats)
+    main.start_metrics("gateway", gateway=True)
+    print("[gateway] ready")
+    while True:
+        row = order_q.get()
+        if not main.not_recent(row):
+            print(f"[gateway] Skipping repeat buy on {row['ticker']}")
+            continue
+        main.execute_step([row])
+
+
+# --------------------------------------------------------------------------
+# Supervisor
+# --------------------------------------------------------------------------
+def _summary(latest: dict, previous: dict, interval_s: float) -> str:
+    def total(role, field):
+        return sum(s.get(field, 0) for (r, _), s in latest.items() if r == role)
+
+    ingested = total("ingest", "rows_ingested")
+    decided = total("decide", "rows_ingested")
+    shed = total("ingest", "rows_shed") + total("decide", "rows_shed")
+    rate = (ingested - previous.get("ingested", ingested)) / interval_s
+    previous["ingested"] = ingested
+    orders = latest.get(("gateway", 0), {}).get("submitted", 0)
+    return (f"[supervisor] {rate:.2f} articles/s | ingested {ingested} | to decide {decided} "
+            f"| shed {shed} | orders {orders}")
+
+
+def run(ingest_procs: int = INGEST_PROCS, decision_procs: int = DECISION_PROCS):
+    ctx = mp.get_context("spawn")
+    shard_queues = [ctx.Queue(SHARD_QUEUE_SIZE) for _ in range(decision_procs)]
+    order_q, stats_q, log_q = ctx.Queue(), ctx.Queue(), ctx.Queue()
+    manager = ctx.Manager()
+    books = (manager.dict(), ctx.Queue(WATCH_QUEUE_SIZE))   # top of book, watch requests
+    readers = decision_procs + 1
+
+    specs = [("gateway", 0, gateway_worker, (order_q, stats_q, readers, books, log_q))]
+    specs += [("decide", i, decision_worker, (i, shard_queues[i], order_q, stats_q, readers, books, log_q))
+              for i in range(decision_procs)]
+    specs += [("ingest", i, ingest_worker, (i, feeds, shard_queues, stats_q, books))
+              for i, feeds in enumerate(feed_groups(ingest_procs))]
+
+    procs = {}
+
+    def launch(role, index, target, args):
+        proc = ctx.Process(target=target, args=args, name=f"{role}-{index}", daemon=True)
+        proc.start()
+        procs[(role, index)] = (proc, target, args)
+
+    print(f"[supervisor] {ingest_procs} ingest, {decision_procs} decision, 1 gateway process(es)")
+    for spec in specs:
+        launch(*spec)
+
+    latest, previous = {}, {}
+    next_report = time.monotonic() + STATS_INTERVAL_S
+    try:
+        while True:
+            try:
+                role, index, stats = stats_q.get(timeout=1.0)
+                latest[(role, index)] = stats
+            except queue.Empty:
+                pass
+            for (role, index), (proc, target, args) in list(procs.items()):
+                if not proc.is_alive():
+                    print(f"[supervisor] {role}-{index} exited ({proc.exitcode}); restarting")
+                    time.sleep(RESTART_DELAY_S)
+                    launch(role, index, target, args)
+            if time.monotonic() >= next_report:
+                print(_summary(latest, previous, STATS_INTERVAL_S))
+                next_report += STATS_INTERVAL_S
+    except KeyboardInterrupt:
+        print("[supervisor] Stopping workers...")
+    finally:
+        for proc, _, _ in procs.values():
+            proc.terminate()
+        for proc, _, _ in procs.values():
+            proc.join(timeout=5)
+        manager.shutdown()
+
+
+# --------------------------------------------------------------------------
+# Benchmark: shard queues + CPU-bound per-row work, 1..N decision processes
+# --------------------------------------------------------------------------
+def _bench_worker(rows_q, done_q, work: int):
+    import json
+
+    while True:
+        row = rows_q.get()
+        if row is None:
+            return
+        for _ in range(work):          # stand-in for parsing / result assembly under the GIL
+            row = json.loads(json.dumps(row))
+        done_q.put(row["ticker"])
+
+
+def _bench(rows: int = 4000, work: int = 60):
+    ctx = mp.get_context("spawn")
+    print(f"{rows} rows, {os.cpu_count()} CPU(s)")
+    for shards in sorted({1, 2, max(1, os.cpu_count() or 1)}):
+        queues = [ctx.Queue() for _ in range(shards)]
+        done_q = ctx.Queue()
+        procs = [ctx.Process(target=_bench_worker, args=(q, done_q, work), daemon=True) for q in queues]
+        for p in procs:
+            p.start()
+        payload = {"headline": "x" * 120, "market_title": "y" * 60, "confidence": 0.8}
+        t0 = time.perf_counter()
+        for i in range(rows):
+            ticker = f"KXBENCH-{i % 500}"
+            queues[shard_of(ticker, shards)].put({**payload, "ticker": ticker})
+        for _ in range(rows):
+            done_q.get()
+        elapsed = time.perf_counter() - t0
+        for q in queues:
+            q.put(None)
+        for p in procs:
+            p.join()
+        print(f"{shards} decision process(es): {rows / elapsed:8.0f} rows/s")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        _bench()
+    else:
+        run()